@@ -0,0 +1,172 @@
+"""
+Procesamiento por lotes con bitácora reanudable.
+
+Cada archivo terminado se registra en una bitácora JSON junto a las salidas,
+con una clave formada por la huella SHA-256 del archivo de entrada, el
+procesador, su versión, las opciones que cambian el resultado y el nombre del
+archivo de salida. Al relanzar el lote se omiten los archivos ya registrados
+(si su salida sigue existiendo) y se continúa desde el primero pendiente.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from core.jobs import create_processor, run_job
+from processors.base import output_mode
+
+JOURNAL_NAME = '.remupro_lote.json'
+JOURNAL_FORMAT = 1
+HASH_CHUNK = 1024 * 1024
+# Opciones que no cambian el archivo de salida (no forman parte de la clave)
+NEUTRAL_OPTIONS = ('profile', 'partitions', 'partition_column', 'reconciliation_path')
+
+
+def file_fingerprint(path: Path) -> str:
+    """
+    Huella SHA-256 del contenido del archivo o, si la entrada es de texto (una
+    carpeta o uno de los archivos CSV/TSV), de los textos de HORAS y TOTAL juntos:
+    cambiar solo la pareja también cambia la huella.
+    """
+    path = Path(path)
+    fuentes = _text_sources(path)
+    archivos = [fuentes[hoja] for hoja in ('HORAS', 'TOTAL')] if fuentes else [path]
+    digest = hashlib.sha256()
+    for archivo in archivos:
+        with open(archivo, 'rb') as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _text_sources(path: Path):
+    """Archivos de HORAS y TOTAL de una carpeta o archivo de texto; None si no es una entrada de texto válida."""
+    from processors.delimited import is_text_file, text_sources
+    if not (path.is_dir() or is_text_file(path)):
+        return None
+    try:
+        return text_sources(path)
+    except (ValueError, FileNotFoundError):
+        return None
+
+
+def expand_inputs(inputs):
+    """
+    Reemplaza cada directorio por sus archivos .xlsx/.xls, en orden alfabético; una
+    carpeta con HORAS y TOTAL en texto (CSV/TSV) es en sí misma una entrada. Las
+    entradas de texto que resuelven al mismo par HORAS/TOTAL (la carpeta y sus dos
+    archivos, o ``HORAS.csv`` y ``TOTAL.csv``) se procesan una sola vez.
+    """
+    archivos = []
+    pares = set()
+    for entrada in map(Path, inputs):
+        fuentes = _text_sources(entrada)
+        if fuentes:
+            par = frozenset(path.resolve() for path in fuentes.values())
+            if par not in pares:
+                pares.add(par)
+                archivos.append(entrada)
+        elif entrada.is_dir():
+            archivos.extend(sorted(
+                p for p in entrada.iterdir()
+                if p.suffix.lower() in ('.xlsx', '.xls') and not p.name.startswith('~$')
+            ))
+        else:
+            archivos.append(entrada)
+    return archivos
+
+
+class BatchJournal:
+    """Bitácora de archivos completados, reescrita de forma atómica tras cada uno."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding='utf-8'))
+                self.entries = data.get('completados', {})
+            except (OSError, ValueError, AttributeError) as e:
+                logging.warning(f"Bitácora de lote ilegible ({self.path}), se comienza de nuevo: {e}")
+
+    @staticmethod
+    def key(fingerprint: str, name: str, version, output_name: str, options=None) -> str:
+        opciones = {k: v for k, v in (options or {}).items() if k not in NEUTRAL_OPTIONS}
+        return f"{fingerprint}:{name}:{version}:{output_name}:{json.dumps(opciones, sort_keys=True, default=str)}"
+
+    def completed(self, key: str):
+        """Devuelve la ruta de salida registrada si el trabajo terminó y el archivo existe."""
+        entry = self.entries.get(key)
+        if entry and Path(entry['salida']).exists():
+            return Path(entry['salida'])
+        return None
+
+    def mark_completed(self, key: str, input_path: Path, output_path: Path):
+        self.entries[key] = {
+            'entrada': str(Path(input_path).resolve()),
+            'salida': str(Path(output_path).resolve()),
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+        }
+        self._write()
+
+    def _write(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {'formato': JOURNAL_FORMAT, 'completados': self.entries}
+        # Archivo temporal en el mismo directorio + os.replace: la bitácora nunca queda a medias
+        fd, temp_path = tempfile.mkstemp(prefix=self.path.name, suffix='.tmp', dir=self.path.parent)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False, indent=1)
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(temp_path, output_mode(self.path))
+            os.replace(temp_path, self.path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+
+
+def run_batch(name: str, inputs, output_dir: Path, progress_callback, options=None,
+              journal_path: Path = None, runner=run_job):
+    """
+    Procesa cada archivo de entrada por separado dejando ``<nombre>_<procesador>.xlsx``
+    en ``output_dir``. Se detiene en el primer error; los archivos ya registrados en
+    la bitácora se omiten al relanzar. ``runner`` permite usar el proceso residente.
+    Devuelve la lista de salidas (procesadas u omitidas).
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    journal = BatchJournal(journal_path or output_dir / JOURNAL_NAME)
+    version = create_processor(name).VERSION
+    archivos = expand_inputs(inputs)
+    if not archivos:
+        raise ValueError("No se encontraron archivos de entrada para el lote.")
+
+    salidas = []
+    for i, entrada in enumerate(archivos, start=1):
+        prefijo = f"[{i}/{len(archivos)}] {entrada.name}"
+        salida = output_dir / f"{entrada.stem}_{name}.xlsx"
+        key = journal.key(file_fingerprint(entrada), name, version, salida.name, options)
+        previa = journal.completed(key)
+        if previa:
+            logging.info(f"{prefijo}: ya procesado en un lote anterior ({previa}), se omite")
+            progress_callback(100, f"{prefijo}: omitido (ya procesado)")
+            salidas.append(previa)
+            continue
+        try:
+            salida = Path(runner(
+                name, [entrada], salida,
+                lambda value, message: progress_callback(value, f"{prefijo}: {message}"),
+                options
+            ))
+        except Exception as e:
+            logging.error(f"{prefijo}: error, el lote se detiene ({e}). Al relanzarlo continuará desde este archivo.")
+            raise
+        journal.mark_completed(key, entrada, salida)
+        salidas.append(salida)
+    logging.info(f"Lote {name} completado: {len(salidas)} archivo(s) en {output_dir}")
+    return salidas
@@ -0,0 +1,141 @@
+"""
+Ejecución de procesadores en un proceso hijo.
+
+El hijo informa el progreso por un Pipe y, al terminar, deja el DataFrame
+resultante en un archivo mapeado en memoria: los arreglos numéricos se
+escriben como buffers fuera de banda de pickle (protocolo 5) y el proceso
+principal los reconstruye sobre el mmap sin copiarlos.
+"""
+
+import atexit
+import logging
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from contextlib import nullcontext
+from pathlib import Path
+
+# Encabezado: largo de la parte pickle y cantidad de buffers; luego el largo de cada buffer
+_HEADER = struct.Struct('<QQ')
+_LENGTH = struct.Struct('<Q')
+# Alineación de cada buffer dentro del archivo
+_ALIGN = 64
+# Archivos que no se pudieron borrar mientras estaban mapeados (Windows)
+_pending_files = []
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_frame(frame) -> str:
+    """Escribe el DataFrame en un archivo temporal para mapearlo desde otro proceso."""
+    buffers = []
+    datos = pickle.dumps(frame, protocol=5, buffer_callback=buffers.append)
+    vistas = [buffer.raw() for buffer in buffers]
+    fd, path = tempfile.mkstemp(prefix='remupro_resultado_', suffix='.bin')
+    with os.fdopen(fd, 'wb') as file:
+        file.write(_HEADER.pack(len(datos), len(vistas)))
+        for vista in vistas:
+            file.write(_LENGTH.pack(vista.nbytes))
+        file.write(datos)
+        for vista in vistas:
+            file.write(b'\0' * (_align(file.tell()) - file.tell()))
+            file.write(vista)
+    return path
+
+
+def read_frame(path: str):
+    """Reconstruye el DataFrame escrito por write_frame; los arreglos quedan sobre el mmap."""
+    with open(path, 'rb') as file:
+        mapa = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    vista = memoryview(mapa)
+    largo_datos, cantidad = _HEADER.unpack_from(vista, 0)
+    offset = _HEADER.size
+    largos = []
+    for _ in range(cantidad):
+        largos.append(_LENGTH.unpack_from(vista, offset)[0])
+        offset += _LENGTH.size
+    datos = vista[offset:offset + largo_datos]
+    offset += largo_datos
+    buffers = []
+    for largo in largos:
+        offset = _align(offset)
+        buffers.append(vista[offset:offset + largo])
+        offset += largo
+    frame = pickle.loads(datos, buffers=buffers)
+    _discard(path)
+    return frame
+
+
+def _discard(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        # En Windows un archivo mapeado no se puede borrar: se intenta al salir
+        if not _pending_files:
+            atexit.register(_remove_pending)
+        _pending_files.append(path)
+
+
+def _remove_pending():
+    for path in _pending_files:
+        Path(path).unlink(missing_ok=True)
+
+
+def _send_result(conn, saved_path, frame):
+    frame_path = write_frame(frame) if frame is not None else None
+    conn.send(('ok', None if saved_path is None else str(saved_path), frame_path))
+
+
+def _send_error(conn, error):
+    conn.send(('error', type(error).__name__, str(error)))
+
+
+def _setup(log_queue):
+    from core.logging_setup import configure_worker_logging
+    configure_worker_logging(log_queue)
+
+
+def run_processor(conn, processor, method, args, log_queue):
+    """Punto de entrada del hijo: ejecuta ``processor.<method>(*args, progress_callback)``."""
+    _setup(log_queue)
+    from core.metrics import recorded_run
+    from core.profiling import profiled
+    try:
+        def progress_callback(value, message):
+            conn.send(('progreso', value, message))
+
+        # Los argumentos son las entradas (rutas o listas de rutas) y al final la salida
+        entradas = [p for arg in args[:-1] for p in (arg if isinstance(arg, (list, tuple)) else [arg])]
+        nombre = type(processor).__name__.replace('Processor', '').lower()
+        perfilado = (profiled(type(processor).__name__, processor=processor)
+                     if getattr(processor, 'profile', False) else nullcontext())
+        with recorded_run(processor, nombre, entradas), perfilado:
+            getattr(processor, method)(*args, progress_callback)
+        _send_result(conn, processor.saved_path, processor.result)
+    except Exception as e:
+        logging.error(f"Error en el proceso de cálculo: {str(e)}")
+        _send_error(conn, e)
+    finally:
+        conn.close()
+
+
+def read_sheet(conn, input_path, sheet_name, log_queue):
+    """Punto de entrada del hijo para la vista previa de una hoja."""
+    _setup(log_queue)
+    try:
+        import pandas as pd
+        from processors.delimited import read_delimited, text_sources
+        fuentes = text_sources(input_path)
+        if fuentes:
+            frame = read_delimited(fuentes[sheet_name], sheet_name=sheet_name)
+        else:
+            frame = pd.read_excel(str(input_path), sheet_name=sheet_name, engine='openpyxl')
+        _send_result(conn, None, frame)
+    except Exception as e:
+        _send_error(conn, e)
+    finally:
+        conn.close()
@@ -0,0 +1,325 @@
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+from core.logging_setup import configure_logging
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='remupro',
+        description="RemuPro: procesamiento de remuneraciones SEP/PIE-NORMAL. Sin argumentos abre la interfaz gráfica."
+    )
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    servicio = subparsers.add_parser('servicio', help="Inicia el servicio HTTP local de procesamiento")
+    servicio.add_argument('--host', default='127.0.0.1', help="Dirección de escucha (por defecto solo local)")
+    servicio.add_argument('--puerto', type=int, default=8765, help="Puerto de escucha")
+    servicio.add_argument('--procesos', type=int, default=2, help="Cantidad de procesos de trabajo")
+    servicio.add_argument('--max-cola', type=int, default=8, help="Máximo de trabajos pendientes admitidos")
+    servicio.add_argument('--retencion', type=int, default=3600, metavar='SEGUNDOS',
+                          help="Tiempo que se conservan los trabajos terminados y sus archivos")
+    servicio.add_argument('--max-terminados', type=int, default=100,
+                          help="Máximo de trabajos terminados que se conservan (se eliminan los más antiguos)")
+    servicio.set_defaults(func=cmd_servicio)
+
+    residente = subparsers.add_parser('residente', help="Inicia el proceso residente con los procesadores cargados")
+    residente.add_argument('--detener', action='store_true', help="Detiene el proceso residente en ejecución")
+    residente.set_defaults(func=cmd_residente)
+
+    # Opciones de procesamiento comunes a procesar y lote
+    opciones = argparse.ArgumentParser(add_help=False)
+    opciones.add_argument('--local', action='store_true', help="Procesa en este proceso aunque exista uno residente")
+    opciones.add_argument('--periodo', help="Periodo de la planilla (p. ej. 2024-03), requerido con --historial")
+    opciones.add_argument('--historial', nargs='?', const='', metavar='DB',
+                          help="Agrega los resultados al historial SQLite (ruta opcional)")
+    opciones.add_argument('--perfil', action='store_true',
+                          help="Perfila la ejecución (cProfile + tracemalloc) y deja los reportes junto al log")
+    opciones.add_argument('--salida-perfil', choices=['completo', 'prorrateo', 'resumen', 'auditoria'],
+                          default='completo',
+                          help="SEP/PIE: columnas a escribir (completo, prorrateo, resumen por docente o auditoria)")
+    opciones.add_argument('--conciliacion', metavar='ARCHIVO',
+                          help="SEP/PIE: guarda las diferencias entre montos prorrateados y TOTAL (.xlsx o .csv)")
+    opciones.add_argument('--particiones', type=int, default=1, metavar='N',
+                          help="SEP/PIE: reparte los docentes en N particiones procesadas en paralelo")
+    opciones.add_argument('--columna-particion', metavar='COLUMNA',
+                          help="SEP/PIE: agrupa las particiones por esta columna de HORAS (p. ej. RBD) en vez del Rut")
+    opciones.add_argument('--codificacion', metavar='COD',
+                          help="SEP/PIE con HORAS y TOTAL en texto: codificación (por defecto utf-8; p. ej. cp1252)")
+    opciones.add_argument('--decimal', choices=[',', '.'],
+                          help="SEP/PIE con HORAS y TOTAL en texto: separador decimal (por defecto ',')")
+    opciones.add_argument('--separador', metavar='SEP',
+                          help="SEP/PIE con HORAS y TOTAL en texto: separador de campos (por defecto se detecta)")
+    opciones.add_argument('--dividir-por', metavar='COLUMNA',
+                          help="SEP/PIE: escribe un archivo por valor de la columna (p. ej. ESTABLECIMIENTO) "
+                               "y un manifiesto con filas y totales")
+    opciones.add_argument('--prorrateo', choices=['redondeo', 'exacto'], default='redondeo',
+                          help="SEP/PIE: redondeo por monto (por defecto) o reparto exacto en pesos enteros "
+                               "que suma el monto de TOTAL")
+    opciones.add_argument('--motor', choices=['pandas', 'polars'], default='pandas',
+                          help="Motor de la consolidación de duplicados (polars requiere tener Polars instalado)")
+
+    procesar = subparsers.add_parser('procesar', parents=[opciones],
+                                     help="Procesa un archivo (usa el proceso residente si está activo)")
+    procesar.add_argument('procesador', choices=['sep', 'pie', 'duplicados'])
+    procesar.add_argument('salida', help="Archivo Excel de salida")
+    procesar.add_argument('entradas', nargs='+', help="Archivo(s) Excel de entrada (SEP/PIE: también HORAS y TOTAL en CSV/TSV, o su carpeta)")
+    procesar.add_argument('--consolidar', action='store_true',
+                          help="Duplicados: consolida todos los archivos de entrada (automático con más de dos)")
+    procesar.set_defaults(func=cmd_procesar)
+
+    lote = subparsers.add_parser('lote', parents=[opciones],
+                                 help="Procesa varios archivos por separado; al relanzarlo omite los ya terminados")
+    lote.add_argument('procesador', choices=['sep', 'pie', 'duplicados'])
+    lote.add_argument('carpeta_salida', help="Carpeta donde se dejan los resultados y la bitácora del lote")
+    lote.add_argument('entradas', nargs='+', help="Archivos Excel o carpetas de entrada")
+    lote.add_argument('--bitacora', help="Ruta de la bitácora (por defecto .remupro_lote.json en la carpeta de salida)")
+    lote.set_defaults(func=cmd_lote)
+
+    panel = subparsers.add_parser('panel', parents=[opciones],
+                                  help="Procesa juntas las planillas de varios periodos (recálculo de retroactivos)")
+    panel.add_argument('procesador', choices=['sep', 'pie'])
+    panel.add_argument('carpeta_salida', help="Carpeta donde se deja un resultado por periodo y el resumen por Rut")
+    panel.add_argument('entradas', nargs='+', metavar='PERIODO=ARCHIVO',
+                       help="Planilla de cada periodo (o carpeta con HORAS y TOTAL en texto); "
+                            "sin PERIODO= se usa el nombre del archivo")
+    panel.set_defaults(func=cmd_panel)
+
+    simular = subparsers.add_parser('simular', help="Consola para cambiar horas o montos y ver el recálculo al instante")
+    simular.add_argument('procesador', choices=['sep', 'pie'])
+    simular.add_argument('entradas', nargs='+', help="Archivo Excel de entrada (o HORAS y TOTAL en CSV/TSV, o su carpeta)")
+    simular.add_argument('--salida', help="Archivo Excel donde escribe el comando guardar")
+    simular.add_argument('--codificacion', metavar='COD', help="HORAS y TOTAL en texto: codificación")
+    simular.add_argument('--decimal', choices=[',', '.'], help="HORAS y TOTAL en texto: separador decimal")
+    simular.add_argument('--separador', metavar='SEP', help="HORAS y TOTAL en texto: separador de campos")
+    simular.set_defaults(func=cmd_simular)
+
+    historial = subparsers.add_parser('historial', help="Consulta el historial de resultados SEP/PIE")
+    historial.add_argument('--db', help="Ruta del historial SQLite")
+    historial.add_argument('--rut', help="Muestra los montos de un docente en todos los periodos")
+    historial.add_argument('--periodo', help="Muestra los montos de un periodo")
+    historial.add_argument('--programa', choices=['SEP', 'PIE'], help="Filtra por programa")
+    historial.add_argument('--columna', help="Filtra por columna (solo con --rut)")
+    historial.set_defaults(func=cmd_historial)
+
+    metricas = subparsers.add_parser('metricas', help="Muestra la duración de las ejecuciones y marca las lentas")
+    metricas.add_argument('--db', help="Ruta del registro de métricas SQLite")
+    metricas.add_argument('--procesador', choices=['sep', 'pie', 'duplicados'], help="Filtra por procesador")
+    metricas.add_argument('--ultimas', type=int, default=20, metavar='N', help="Cantidad de ejecuciones a mostrar")
+    metricas.set_defaults(func=cmd_metricas)
+    return parser
+
+
+def cmd_servicio(args):
+    from core.service import ProcessingService
+    if args.host not in ('127.0.0.1', 'localhost', '::1'):
+        logging.warning(f"El servicio quedará expuesto en {args.host}; úselo solo en redes de confianza.")
+    ProcessingService(args.host, args.puerto, args.procesos, args.max_cola,
+                      result_ttl=args.retencion, max_finished=args.max_terminados).serve_forever()
+    return 0
+
+
+def cmd_residente(args):
+    from core import resident
+    if args.detener:
+        if not resident.is_running():
+            logging.info("No hay un proceso residente en ejecución.")
+            return 1
+        resident.stop_server()
+        logging.info("Proceso residente detenido.")
+        return 0
+    resident.ResidentServer().serve_forever()
+    return 0
+
+
+def _print_progress(value, message):
+    print(f"[{value:3d}%] {message}", file=sys.stderr)
+
+
+def _processor_options(args):
+    options = {}
+    if args.historial is not None:
+        from core.history import default_history_path
+        # En el panel cada planilla se guarda con su propio periodo
+        if not args.periodo and args.comando != 'panel':
+            raise SystemExit("Debe indicar --periodo para guardar el historial.")
+        options['history_path'] = str(Path(args.historial).resolve()) if args.historial else str(default_history_path())
+        if args.periodo:
+            options['periodo'] = args.periodo
+    if args.perfil:
+        options['profile'] = True
+    if getattr(args, 'consolidar', False):
+        if args.procesador != 'duplicados':
+            raise SystemExit("--consolidar solo aplica al procesador duplicados.")
+        options['consolidate_all'] = True
+    if args.salida_perfil != 'completo':
+        if args.procesador == 'duplicados':
+            raise SystemExit("--salida-perfil solo aplica a los procesadores sep y pie.")
+        options['output_profile'] = args.salida_perfil
+    if args.conciliacion:
+        if args.procesador == 'duplicados':
+            raise SystemExit("--conciliacion solo aplica a los procesadores sep y pie.")
+        options['reconciliation_path'] = str(Path(args.conciliacion).resolve())
+    if args.particiones > 1 or args.columna_particion:
+        if args.procesador == 'duplicados':
+            raise SystemExit("--particiones solo aplica a los procesadores sep y pie.")
+        options['partitions'] = max(args.particiones, 1)
+        options['partition_column'] = args.columna_particion
+    for flag, clave in (('codificacion', 'text_encoding'), ('decimal', 'text_decimal'),
+                        ('separador', 'text_delimiter')):
+        valor = getattr(args, flag)
+        if valor:
+            if args.procesador == 'duplicados':
+                raise SystemExit(f"--{flag} solo aplica a los procesadores sep y pie.")
+            options[clave] = '\t' if valor in ('\\t', 'tab') else valor
+    if args.dividir_por:
+        if args.procesador == 'duplicados':
+            raise SystemExit("--dividir-por solo aplica a los procesadores sep y pie.")
+        options['shard_column'] = args.dividir_por
+    if args.prorrateo != 'redondeo':
+        if args.procesador == 'duplicados':
+            raise SystemExit("--prorrateo solo aplica a los procesadores sep y pie.")
+        options['proration'] = args.prorrateo
+    if args.motor != 'pandas':
+        if args.procesador != 'duplicados':
+            raise SystemExit("--motor solo aplica al procesador duplicados.")
+        from processors.polars_engine import check_engine
+        try:
+            check_engine(args.motor)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        options['engine'] = args.motor
+    return options
+
+
+def cmd_procesar(args):
+    from core import resident
+    options = _processor_options(args)
+    if not args.local and resident.is_running():
+        output = resident.submit(args.procesador, args.entradas, args.salida, _print_progress, options=options)
+    else:
+        from core.jobs import run_job
+        output = run_job(args.procesador, args.entradas, args.salida, _print_progress, options)
+    print(output)
+    return 0
+
+
+def cmd_lote(args):
+    from core import resident
+    from core.batch import run_batch
+    options = _processor_options(args)
+    if not args.local and resident.is_running():
+        def runner(name, inputs, output_path, progress_callback, options):
+            return resident.submit(name, inputs, output_path, progress_callback, options=options)
+    else:
+        from core.jobs import run_job as runner
+    salidas = run_batch(
+        args.procesador, args.entradas, Path(args.carpeta_salida), _print_progress, options,
+        Path(args.bitacora) if args.bitacora else None, runner
+    )
+    for salida in salidas:
+        print(salida)
+    return 0
+
+
+def _period_input(texto: str):
+    """``PERIODO=ARCHIVO`` -> ``(periodo, archivo)``; sin ``PERIODO=`` el periodo es el nombre del archivo."""
+    periodo, separador, archivo = texto.partition('=')
+    if not separador or Path(texto).exists():
+        return Path(texto).stem, texto
+    return periodo, archivo
+
+
+def cmd_panel(args):
+    from core.jobs import run_panel
+    if args.periodo:
+        raise SystemExit("--periodo no aplica al panel: indique el periodo de cada planilla como PERIODO=ARCHIVO.")
+    options = _processor_options(args)
+    salidas = run_panel(args.procesador, [_period_input(texto) for texto in args.entradas],
+                        Path(args.carpeta_salida), _print_progress, options)
+    for salida in salidas:
+        print(salida)
+    return 0
+
+
+def cmd_simular(args):
+    from core.jobs import create_processor
+    from core.simulation import SimulationShell
+    from processors.session import WhatIfSession
+    processor = create_processor(args.procesador)
+    for flag, clave in (('codificacion', 'text_encoding'), ('decimal', 'text_decimal'),
+                        ('separador', 'text_delimiter')):
+        valor = getattr(args, flag)
+        if valor:
+            setattr(processor, clave, '\t' if valor in ('\\t', 'tab') else valor)
+    entradas = [Path(p) for p in args.entradas]
+    entrada = entradas[0] if len(entradas) == 1 else tuple(entradas)
+    session = WhatIfSession(processor, entrada)
+    SimulationShell(session, args.salida).cmdloop()
+    return 0
+
+
+def cmd_historial(args):
+    from core.history import HistoryStore
+    with HistoryStore(args.db) as store:
+        if args.rut:
+            rows = store.by_rut(args.rut, args.programa, args.columna)
+            header = ('PERIODO', 'PROGRAMA', 'COLUMNA', 'MONTO')
+        elif args.periodo:
+            rows = store.by_period(args.periodo, args.programa)
+            header = ('PROGRAMA', 'RUT', 'NOMBRE', 'COLUMNA', 'MONTO')
+        else:
+            rows = store.periods(args.programa)
+            header = ('PERIODO', 'PROGRAMA', 'ORIGEN', 'DOCENTES')
+    print('\t'.join(header))
+    for row in rows:
+        print('\t'.join('' if value is None else f"{value:.0f}" if isinstance(value, float) else str(value)
+                        for value in row))
+    return 0
+
+
+
+def cmd_metricas(args):
+    from core.metrics import MetricsStore, is_slow
+    with MetricsStore(args.db) as store:
+        tendencias = store.trends(args.procesador)
+        runs = store.runs(args.procesador, args.ultimas)
+        referencias = [
+            store.reference_rate(run['procesador'], run['perfil'], run['filas'], before_id=run['id'])
+            if run['estado'] == 'ok' and run['filas'] else None
+            for run in runs
+        ]
+    for (procesador, perfil), (cantidad, mediana, recientes) in sorted(tendencias.items()):
+        cambio = (recientes / mediana - 1) * 100 if mediana else 0
+        print(f"{procesador} ({perfil or '-'}): {cantidad} ejecuciones, mediana {mediana:.0f} filas/s, "
+              f"últimas 5 {recientes:.0f} filas/s ({cambio:+.0f}%)")
+    if tendencias:
+        print()
+    print('\t'.join(('FECHA', 'PROCESADOR', 'ORIGEN', 'MB', 'FILAS', 'COLUMNAS', 'SEGUNDOS',
+                     'FILAS/S', 'MEMORIA MB', 'ETAPAS', 'ESTADO')))
+    for run, referencia in zip(runs, referencias):
+        tasa = run['filas'] / run['segundos'] if run['filas'] and run['segundos'] else None
+        estado = run['estado']
+        if tasa is not None and is_slow(tasa, referencia):
+            estado = f"LENTA ({referencia:.0f} filas/s habituales)"
+        etapas = ', '.join(f"{etapa} {segundos:.1f}s" for etapa, segundos in run['etapas'].items())
+        print('\t'.join((
+            time.strftime('%Y-%m-%d %H:%M', time.localtime(run['fecha'])),
+            run['procesador'], run['origen'] or '',
+            f"{(run['bytes'] or 0) / 1e6:.1f}", str(run['filas'] or ''), str(run['columnas'] or ''),
+            f"{run['segundos']:.1f}", '' if tasa is None else f"{tasa:.0f}",
+            '' if run['memoria_pico'] is None else f"{run['memoria_pico'] / 2**20:.0f}",
+            etapas, estado,
+        )))
+    return 0
+
+def main(argv=None):
+    configure_logging()
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Historial en SQLite de los resultados procesados (SEP/PIE).
+
+Cada ejecución puede agregar sus montos prorrateados por Rut, periodo y
+programa. Las consultas por docente o por periodo usan índices y no
+requieren abrir ningún Excel.
+"""
+
+import sqlite3
+import time
+from itertools import repeat
+from pathlib import Path
+
+from core.paths import app_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    periodo  TEXT NOT NULL,
+    programa TEXT NOT NULL,
+    rut      TEXT NOT NULL,
+    nombre   TEXT,
+    columna  TEXT NOT NULL,
+    monto    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_resultados_rut ON resultados (rut, periodo, programa);
+CREATE INDEX IF NOT EXISTS idx_resultados_periodo ON resultados (periodo, programa, rut);
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    periodo  TEXT NOT NULL,
+    programa TEXT NOT NULL,
+    origen   TEXT,
+    fecha    REAL NOT NULL,
+    docentes INTEGER NOT NULL,
+    PRIMARY KEY (periodo, programa)
+);
+"""
+
+
+def default_history_path() -> Path:
+    return app_dir() / "historial.sqlite"
+
+
+def canonical_rut(rut) -> str:
+    """RUT de una consulta en la forma en que se guarda (``12345678-9``, ver processors.rut)."""
+    # Importación diferida: consultar el historial no requiere cargar pandas al inicio
+    import pandas as pd
+    from processors.rut import normalize_ruts
+    return normalize_ruts(pd.Series([str(rut)]))[0].iloc[0]
+
+
+class HistoryStore:
+    """Almacén de resultados indexado por periodo, programa y Rut."""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else default_history_path()
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, df, periodo: str, programa: str, columnas, origen=None) -> int:
+        """
+        Agrega (o reemplaza) los resultados de un periodo y programa.
+        Los montos se suman por Rut y solo se guardan los distintos de cero.
+        """
+        from processors.rut import normalize_ruts
+        columnas = [c for c in dict.fromkeys(columnas) if c in df.columns]
+        agregados = {c: 'sum' for c in columnas}
+        if 'Nombre' in df.columns:
+            agregados = {'Nombre': 'first', **agregados}
+        # Los RUT se guardan canonizados (como los deja el proceso) para que coincidan
+        # con las consultas, que también se canonizan
+        ruts = normalize_ruts(df['Rut'])[0].rename('Rut')
+        por_rut = df.groupby(ruts, sort=False).agg(agregados).reset_index()
+        largo = por_rut.melt(
+            id_vars=[c for c in ('Rut', 'Nombre') if c in por_rut.columns],
+            value_vars=columnas, var_name='columna', value_name='monto'
+        )
+        largo = largo[largo['monto'].fillna(0) != 0]
+        if 'Nombre' in largo.columns:
+            nombres = largo['Nombre'].astype(object).where(largo['Nombre'].notna(), None)
+        else:
+            nombres = repeat(None)
+        filas = zip(
+            repeat(periodo), repeat(programa), largo['Rut'].astype(str),
+            nombres, largo['columna'], largo['monto'].astype(float).tolist()
+        )
+        with self.conn:
+            self.conn.execute("DELETE FROM resultados WHERE periodo = ? AND programa = ?", (periodo, programa))
+            self.conn.executemany("INSERT INTO resultados VALUES (?, ?, ?, ?, ?, ?)", filas)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ejecuciones VALUES (?, ?, ?, ?, ?)",
+                (periodo, programa, str(origen) if origen else None, time.time(), len(por_rut))
+            )
+        return len(largo)
+
+    def periods(self, programa=None):
+        sql = "SELECT periodo, programa, origen, docentes FROM ejecuciones"
+        params = ()
+        if programa:
+            sql += " WHERE programa = ?"
+            params = (programa,)
+        return self.conn.execute(sql + " ORDER BY periodo, programa", params).fetchall()
+
+    def by_rut(self, rut: str, programa=None, columna=None):
+        """Montos de un docente en todos los periodos: (periodo, programa, columna, monto)."""
+        sql = "SELECT periodo, programa, columna, monto FROM resultados WHERE rut = ?"
+        params = [canonical_rut(rut)]
+        if programa:
+            sql += " AND programa = ?"
+            params.append(programa)
+        if columna:
+            sql += " AND columna = ?"
+            params.append(columna)
+        return self.conn.execute(sql + " ORDER BY periodo, programa, columna", params).fetchall()
+
+    def by_period(self, periodo: str, programa=None, rut=None):
+        """Montos de un periodo: (programa, rut, nombre, columna, monto)."""
+        sql = "SELECT programa, rut, nombre, columna, monto FROM resultados WHERE periodo = ?"
+        params = [periodo]
+        if programa:
+            sql += " AND programa = ?"
+            params.append(programa)
+        if rut:
+            sql += " AND rut = ?"
+            params.append(canonical_rut(rut))
+        return self.conn.execute(sql + " ORDER BY programa, rut, columna", params).fetchall()
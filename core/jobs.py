@@ -0,0 +1,96 @@
+import logging
+from contextlib import nullcontext
+from pathlib import Path
+
+from core.metrics import recorded_run
+from core.profiling import profiled
+
+# Nombres aceptados por los modos de servicio y línea de comandos
+PROCESSOR_NAMES = ('sep', 'pie', 'duplicados')
+
+
+def create_processor(name: str):
+    """Instancia el procesador asociado al nombre indicado."""
+    # Importación diferida: pandas solo se carga cuando realmente se procesa
+    if name == 'sep':
+        from processors.sep import SEPProcessor
+        return SEPProcessor()
+    if name == 'pie':
+        from processors.pie import PIEProcessor
+        return PIEProcessor()
+    if name == 'duplicados':
+        from processors.duplicados import DuplicadosProcessor
+        return DuplicadosProcessor()
+    raise ValueError(f"Procesador no reconocido: {name}")
+
+
+def warm_imports():
+    """Carga pandas, numpy, openpyxl y los procesadores por adelantado."""
+    import pandas  # noqa: F401
+    import numpy  # noqa: F401
+    import openpyxl  # noqa: F401
+    for name in PROCESSOR_NAMES:
+        create_processor(name)
+
+
+def configured_processor(name: str, options=None):
+    """Procesador con las opciones indicadas asignadas como atributos."""
+    processor = create_processor(name)
+    for key, value in (options or {}).items():
+        if not hasattr(processor, key):
+            raise ValueError(f"Opción no reconocida para {name}: {key}")
+        setattr(processor, key, value)
+    return processor
+
+
+def run_job(name: str, inputs, output_path: Path, progress_callback, options=None):
+    """
+    Ejecuta un procesador sobre los archivos de entrada indicados.
+    ``options`` asigna atributos opcionales del procesador (p. ej. periodo, history_path).
+    """
+    inputs = [Path(p) for p in inputs]
+    output_path = Path(output_path)
+    processor = configured_processor(name, options)
+    if name == 'duplicados':
+        if len(inputs) > 2:
+            processor.consolidate_all = True
+        if processor.consolidate_all:
+            with recorded_run(processor, name, inputs), \
+                    profiled(name, processor=processor) if processor.profile else nullcontext():
+                processor.process_files(inputs, output_path, progress_callback)
+            output_path = processor.saved_path or output_path
+            logging.info(f"Trabajo {name} completado: {output_path}")
+            return output_path
+        if len(inputs) == 1:
+            # El segundo archivo es opcional: hoy solo se procesa el primero
+            inputs = inputs * 2
+        if len(inputs) != 2:
+            raise ValueError("El proceso de duplicados requiere uno o dos archivos de entrada.")
+    elif len(inputs) == 2:
+        # Par de archivos de texto con HORAS y TOTAL (ver processors.delimited)
+        inputs = [tuple(inputs)]
+    elif len(inputs) != 1:
+        raise ValueError(f"El proceso {name.upper()} requiere un archivo de entrada (o el par HORAS y TOTAL en texto).")
+    with recorded_run(processor, name, inputs), \
+            profiled(name, processor=processor) if processor.profile else nullcontext():
+        processor.process_file(*inputs, output_path, progress_callback)
+    # El procesador puede haber usado un nombre alternativo si el destino estaba abierto
+    output_path = processor.saved_path or output_path
+    logging.info(f"Trabajo {name} completado: {output_path}")
+    return output_path
+
+
+def run_panel(name: str, entradas, output_dir: Path, progress_callback, options=None) -> list:
+    """
+    Modo panel de SEP/PIE: procesa juntas las planillas de ``entradas``
+    (``[(periodo, archivo)]``) y devuelve las rutas escritas en ``output_dir``.
+    """
+    if name not in ('sep', 'pie'):
+        raise ValueError("El modo panel solo aplica a los procesadores sep y pie.")
+    entradas = [(periodo, Path(entrada)) for periodo, entrada in entradas]
+    processor = configured_processor(name, options)
+    with recorded_run(processor, name, [entrada for _, entrada in entradas]), \
+            profiled(name, processor=processor) if processor.profile else nullcontext():
+        salidas = processor.process_periods(entradas, Path(output_dir), progress_callback)
+    logging.info(f"Panel {name} completado: {len(entradas)} periodos en {output_dir}")
+    return salidas
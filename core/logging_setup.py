@@ -0,0 +1,101 @@
+import sys
+import atexit
+import logging
+import multiprocessing
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+
+from core.paths import app_dir
+
+LOG_FILE = 'proceso_remuneraciones.log'
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
+
+# Handlers reales (archivo rotativo + consola) atendidos por hilos de QueueListener
+_handlers = []
+_listeners = []
+# Cola compartida por los procesos hijos que se crean bajo demanda
+_shared_queue = []
+
+
+def log_dir() -> Path:
+    """Directorio del log (no se crea hasta configurar el log o guardar un perfil)."""
+    return app_dir() / "logs"
+
+
+def configure_logging():
+    """
+    Configura el log de la aplicación sin bloquear a quien registra: los mensajes
+    se encolan y un hilo aparte los escribe en el archivo rotativo y la consola.
+    """
+    if _listeners:
+        return
+    directorio = log_dir()
+    directorio.mkdir(parents=True, exist_ok=True)
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = RotatingFileHandler(
+        directorio / LOG_FILE, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding='utf-8'
+    )
+    stream_handler = logging.StreamHandler(sys.stderr)
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+        _handlers.append(handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+
+    listener = QueueListener(log_queue, *_handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Vacía las colas pendientes y cierra los handlers."""
+    while _listeners:
+        _listeners.pop().stop()
+    for handler in _handlers:
+        handler.close()
+    _handlers.clear()
+
+
+def create_worker_log_queue():
+    """
+    Crea una cola entre procesos cuyos mensajes se escriben con los handlers de
+    este proceso. Devuelve None si el log no fue configurado con configure_logging.
+    """
+    if not _handlers:
+        return None
+    # Contexto spawn: la cola sirve tanto a hijos creados con fork como con spawn
+    log_queue = multiprocessing.get_context('spawn').Queue()
+    listener = QueueListener(log_queue, *_handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return log_queue
+
+
+def shared_worker_log_queue():
+    """Como create_worker_log_queue, pero reutiliza una única cola para todos los hijos."""
+    if not _shared_queue:
+        log_queue = create_worker_log_queue()
+        if log_queue is None:
+            return None
+        _shared_queue.append(log_queue)
+    return _shared_queue[0]
+
+
+def configure_worker_logging(log_queue):
+    """En un proceso hijo, envía todo el log a la cola del proceso principal."""
+    if log_queue is None:
+        return
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
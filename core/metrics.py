@@ -0,0 +1,303 @@
+"""
+Métricas de rendimiento de cada ejecución.
+
+Cada proceso (interfaz, línea de comandos, lote o servicio) registra en un
+SQLite local el tamaño de la entrada, sus filas y columnas, la duración de
+cada etapa y la memoria máxima alcanzada durante la ejecución. El reporte muestra la tendencia
+por procesador y marca las ejecuciones mucho más lentas que el histórico de
+filas por segundo con entradas de tamaño comparable.
+"""
+
+import logging
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from core.paths import app_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id           INTEGER PRIMARY KEY,
+    fecha        REAL NOT NULL,
+    procesador   TEXT NOT NULL,
+    perfil       TEXT NOT NULL,
+    origen       TEXT,
+    bytes        INTEGER,
+    filas        INTEGER,
+    columnas     INTEGER,
+    segundos     REAL NOT NULL,
+    memoria_pico INTEGER,
+    estado       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ejecuciones_procesador ON ejecuciones (procesador, perfil, filas);
+CREATE TABLE IF NOT EXISTS etapas (
+    ejecucion INTEGER NOT NULL REFERENCES ejecuciones (id),
+    etapa     TEXT NOT NULL,
+    segundos  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_etapas_ejecucion ON etapas (ejecucion);
+"""
+
+# Una ejecución es lenta si procesa menos de la mitad de las filas por segundo habituales
+SLOWDOWN_FACTOR = 2.0
+# Entradas comparables: entre la mitad y el doble de filas
+COMPARABLE_RATIO = 2.0
+# Ejecuciones previas necesarias para tener una referencia
+MIN_HISTORY = 3
+
+
+def default_metrics_path() -> Path:
+    return app_dir() / "metricas.sqlite"
+
+
+def peak_memory():
+    """Memoria máxima del proceso desde su inicio, en bytes (None si no se puede medir)."""
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_memory()
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss viene en bytes en macOS y en KB en Linux
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+
+def _windows_peak_memory():
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        contadores = Counters()
+        contadores.cb = ctypes.sizeof(Counters)
+        proceso = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(proceso, ctypes.byref(contadores), contadores.cb):
+            return int(contadores.PeakWorkingSetSize)
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def _reset_peak_memory() -> bool:
+    """Reinicia el máximo de memoria del proceso (solo Linux, vía /proc/self/clear_refs)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _status_peak_memory():
+    """VmHWM de /proc/self/status en bytes: el máximo desde el último reinicio."""
+    try:
+        with open('/proc/self/status') as file:
+            for linea in file:
+                if linea.startswith('VmHWM:'):
+                    return int(linea.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+# Ejecuciones en curso en este proceso: el proceso residente atiende cada trabajo
+# en su propio hilo y el máximo de memoria es uno solo para todo el proceso
+_ACTIVE_RUNS = set()
+_ACTIVE_LOCK = threading.Lock()
+
+
+class RunPeakMemory:
+    """
+    Memoria máxima de una sola ejecución. El máximo del proceso abarca toda su vida
+    (en el proceso residente o en el servicio incluye las ejecuciones anteriores):
+    en Linux se reinicia al comenzar; en otros sistemas el máximo del proceso solo
+    corresponde a la ejecución si esta lo aumentó, y si no queda sin medir (None).
+    Si la ejecución se superpone con otra del mismo proceso, el máximo mezcla las
+    dos y ninguna lo registra (None); en ese caso tampoco se reinicia.
+    """
+
+    def __init__(self):
+        with _ACTIVE_LOCK:
+            self.shared = bool(_ACTIVE_RUNS)
+            for otra in _ACTIVE_RUNS:
+                otra.shared = True
+            _ACTIVE_RUNS.add(self)
+            self.reset = not self.shared and _reset_peak_memory()
+            self.before = None if self.reset else peak_memory()
+
+    def result(self):
+        with _ACTIVE_LOCK:
+            _ACTIVE_RUNS.discard(self)
+        if self.shared:
+            return None
+        if self.reset:
+            return _status_peak_memory()
+        pico = peak_memory()
+        if pico is None or self.before is None or pico <= self.before:
+            return None
+        return pico
+
+
+class MetricsStore:
+    """Registro de ejecuciones con sus etapas."""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else default_metrics_path()
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, run: dict, etapas: dict) -> int:
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO ejecuciones (fecha, procesador, perfil, origen, bytes, filas, columnas, "
+                "segundos, memoria_pico, estado) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run['fecha'], run['procesador'], run['perfil'], run['origen'], run['bytes'], run['filas'],
+                 run['columnas'], run['segundos'], run['memoria_pico'], run['estado'])
+            )
+            self.conn.executemany(
+                "INSERT INTO etapas VALUES (?, ?, ?)",
+                [(cursor.lastrowid, etapa, segundos) for etapa, segundos in etapas.items()]
+            )
+        return cursor.lastrowid
+
+    def reference_rate(self, procesador: str, perfil: str, filas: int, before_id=None):
+        """
+        Mediana de filas por segundo de las ejecuciones correctas anteriores con
+        entradas comparables; None si todavía no hay suficientes.
+        """
+        sql = ("SELECT filas / segundos FROM ejecuciones WHERE procesador = ? AND perfil = ? "
+               "AND estado = 'ok' AND segundos > 0 AND filas BETWEEN ? AND ?")
+        params = [procesador, perfil, filas / COMPARABLE_RATIO, filas * COMPARABLE_RATIO]
+        if before_id is not None:
+            sql += " AND id < ?"
+            params.append(before_id)
+        tasas = [row[0] for row in self.conn.execute(sql, params)]
+        return statistics.median(tasas) if len(tasas) >= MIN_HISTORY else None
+
+    def runs(self, procesador=None, limit=20):
+        """Últimas ejecuciones (de la más antigua a la más reciente) con sus etapas."""
+        sql = "SELECT * FROM ejecuciones"
+        params = []
+        if procesador:
+            sql += " WHERE procesador = ?"
+            params.append(procesador)
+        self.conn.row_factory = sqlite3.Row
+        try:
+            filas = self.conn.execute(sql + " ORDER BY id DESC LIMIT ?", params + [limit]).fetchall()
+            runs = [dict(fila) for fila in reversed(filas)]
+            for run in runs:
+                run['etapas'] = dict(self.conn.execute(
+                    "SELECT etapa, segundos FROM etapas WHERE ejecucion = ?", (run['id'],)
+                ).fetchall())
+        finally:
+            self.conn.row_factory = None
+        return runs
+
+    def trends(self, procesador=None):
+        """Por procesador y perfil: (ejecuciones, filas/s de todas y de las últimas cinco)."""
+        sql = ("SELECT procesador, perfil, filas / segundos FROM ejecuciones "
+               "WHERE estado = 'ok' AND segundos > 0 AND filas > 0")
+        params = []
+        if procesador:
+            sql += " AND procesador = ?"
+            params.append(procesador)
+        tasas = {}
+        for nombre, perfil, tasa in self.conn.execute(sql + " ORDER BY id", params):
+            tasas.setdefault((nombre, perfil), []).append(tasa)
+        return {
+            clave: (len(valores), statistics.median(valores), statistics.median(valores[-5:]))
+            for clave, valores in tasas.items()
+        }
+
+
+def is_slow(rate: float, reference) -> bool:
+    return reference is not None and rate < reference / SLOWDOWN_FACTOR
+
+
+def _flatten(inputs):
+    """Rutas de entrada, con los pares de archivos de texto desplegados."""
+    for entrada in inputs:
+        yield from (entrada if isinstance(entrada, (list, tuple)) else [entrada])
+
+
+def _input_size(inputs) -> int:
+    archivos = []
+    for path in map(Path, _flatten(inputs)):
+        archivos.extend(sorted(p for p in path.iterdir() if p.is_file()) if path.is_dir() else [path])
+    total = 0
+    # Duplicados puede recibir dos veces el mismo archivo
+    for path in dict.fromkeys(archivos):
+        try:
+            total += path.stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+@contextmanager
+def recorded_run(processor, name: str, inputs):
+    """
+    Mide la ejecución del bloque y la guarda en el registro de métricas. Las
+    etapas las informa el procesador en ``stage_times`` (ver BaseProcessor.timed).
+    Un error al guardar las métricas nunca interrumpe el proceso.
+    """
+    processor.stage_times = {}
+    memoria = RunPeakMemory()
+    inicio = time.perf_counter()
+    estado = 'error'
+    try:
+        yield
+        estado = 'ok'
+    finally:
+        try:
+            _store_run(processor, name, inputs, time.perf_counter() - inicio, memoria.result(), estado)
+        except Exception as e:
+            logging.warning(f"No se pudieron guardar las métricas de la ejecución: {e}")
+
+
+def _store_run(processor, name, inputs, segundos, memoria_pico, estado):
+    filas, columnas = getattr(processor, 'input_shape', None) or (None, None)
+    if filas is None and processor.result is not None:
+        filas, columnas = processor.result.shape
+    run = {
+        'fecha': time.time(),
+        'procesador': name,
+        'perfil': getattr(processor, 'output_profile', '') or '',
+        'origen': ', '.join(Path(p).name for p in _flatten(inputs)),
+        'bytes': _input_size(inputs),
+        'filas': filas,
+        'columnas': columnas,
+        'segundos': segundos,
+        'memoria_pico': memoria_pico,
+        'estado': estado,
+    }
+    with MetricsStore(getattr(processor, 'metrics_path', None)) as store:
+        run_id = store.record(run, processor.stage_times or {})
+        if estado != 'ok' or not filas or segundos <= 0:
+            return
+        referencia = store.reference_rate(name, run['perfil'], filas, before_id=run_id)
+    tasa = filas / segundos
+    if is_slow(tasa, referencia):
+        logging.warning(
+            f"Ejecución lenta: {tasa:.0f} filas/s frente a {referencia:.0f} filas/s habituales "
+            f"en {name} con entradas de tamaño similar ({filas} filas)"
+        )
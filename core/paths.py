@@ -0,0 +1,12 @@
+import sys
+from pathlib import Path
+
+
+def app_dir() -> Path:
+    """Directorio de datos de RemuPro para el usuario actual."""
+    if sys.platform == 'win32':
+        path = Path.home() / "AppData" / "Local" / "RemuPro"
+    else:
+        path = Path.home() / ".remupro"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
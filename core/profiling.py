@@ -0,0 +1,160 @@
+"""
+Modo de perfilado para diagnosticar ejecuciones lentas.
+
+Envuelve la ejecución de un procesador con cProfile y tracemalloc, guarda el
+perfil (.prof) y un reporte de asignaciones de memoria junto al log de la
+aplicación y deja un resumen de las funciones más costosas en el log. Con el
+procesador indicado se mide el pico de memoria de cada etapa (ver
+BaseProcessor.timed) y las asignaciones se toman al terminar la etapa de mayor
+pico, no al final, cuando lo que lo provocó ya se liberó.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from core.logging_setup import log_dir as default_log_dir
+
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 30
+TOP_TRACEBACKS = 5
+
+
+def _hot_functions(profile, limit):
+    stats = pstats.Stats(profile)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    lines = []
+    for (filename, line, func), (_, ncalls, tottime, cumtime, _) in rows:
+        lines.append(f"{tottime:8.3f}s propio {cumtime:8.3f}s acum {ncalls:>9} llamadas  "
+                     f"{func} ({Path(filename).name}:{line})")
+    return lines
+
+
+class StageMemory:
+    """
+    Pico de memoria (tracemalloc) de cada etapa de un procesador, como su
+    ``stage_listener``. Guarda la instantánea de asignaciones al terminar la etapa
+    de mayor pico.
+    """
+
+    def __init__(self):
+        self.peak = 0
+        self.stages = {}
+        self.snapshot = None
+        self.snapshot_stage = None
+        self._open = []
+        self._snapshot_peak = -1
+
+    def _fold(self):
+        """Lleva el pico desde el último reinicio al total y a las etapas abiertas."""
+        _, pico = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, pico)
+        for abierta in self._open:
+            abierta[1] = max(abierta[1], pico)
+        tracemalloc.reset_peak()
+
+    def __call__(self, etapa, terminada):
+        if not tracemalloc.is_tracing():
+            return
+        self._fold()
+        if not terminada:
+            self._open.append([etapa, 0])
+            return
+        posicion = next((i for i in range(len(self._open) - 1, -1, -1) if self._open[i][0] == etapa), None)
+        if posicion is None:
+            return
+        _, pico = self._open.pop(posicion)
+        self.stages[etapa] = max(self.stages.get(etapa, 0), pico)
+        if pico > self._snapshot_peak:
+            self.snapshot, self.snapshot_stage, self._snapshot_peak = tracemalloc.take_snapshot(), etapa, pico
+
+    def start(self):
+        """Comienza a medir desde la memoria actual."""
+        self._fold()
+        self.peak = tracemalloc.get_traced_memory()[0]
+
+    def finish(self):
+        """Pico total del bloque; sin etapas, la instantánea se toma al final."""
+        self._fold()
+        if self.snapshot is None:
+            self.snapshot = tracemalloc.take_snapshot()
+        return self.peak
+
+
+def report_paths(log_dir: Path, label: str):
+    """Rutas del perfil y del reporte de memoria, únicas aunque haya ejecuciones en el mismo segundo."""
+    ahora = time.time()
+    stamp = f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(ahora))}_{int(ahora * 1000) % 1000:03d}_{os.getpid()}"
+    for intento in range(1000):
+        base = f"perfil_{label}_{stamp}" + (f"_{intento}" if intento else "")
+        prof_path = log_dir / f"{base}.prof"
+        if not prof_path.exists():
+            return prof_path, log_dir / f"{base}_memoria.txt"
+    raise FileExistsError(f"No hay un nombre libre para el perfil {label} en {log_dir}")
+
+
+@contextmanager
+def profiled(label: str, log_dir: Path = None, processor=None):
+    """
+    Perfila el bloque y escribe los reportes en ``log_dir`` (por defecto el del log).
+    Con ``processor`` se mide además la memoria de cada una de sus etapas.
+    """
+    log_dir = Path(log_dir or default_log_dir())
+    log_dir.mkdir(parents=True, exist_ok=True)
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start(5)
+    memoria = StageMemory()
+    memoria.start()
+    if processor is not None:
+        listener_original = getattr(processor, 'stage_listener', None)
+        processor.stage_listener = memoria
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        elapsed = time.perf_counter() - start
+        if processor is not None:
+            processor.stage_listener = listener_original
+        peak = memoria.finish()
+        snapshot = memoria.snapshot
+        if not already_tracing:
+            tracemalloc.stop()
+
+        prof_path, mem_path = report_paths(log_dir, label)
+        profile.dump_stats(str(prof_path))
+
+        report = io.StringIO()
+        report.write(f"Perfil de memoria: {label}\n")
+        report.write(f"Duración: {elapsed:.2f}s | Pico de memoria: {peak / 1024 / 1024:.1f} MiB\n\n")
+        if memoria.stages:
+            report.write("Pico de memoria por etapa:\n")
+            for etapa, pico in sorted(memoria.stages.items(), key=lambda item: item[1], reverse=True):
+                report.write(f"  {etapa}: {pico / 1024 / 1024:.1f} MiB\n")
+            report.write(f"\nTop {TOP_ALLOCATIONS} asignaciones vivas al terminar la etapa de mayor "
+                         f"pico, {memoria.snapshot_stage} (por línea):\n")
+        else:
+            report.write(f"Top {TOP_ALLOCATIONS} asignaciones vivas al finalizar (por línea):\n")
+        for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+            report.write(f"{stat}\n")
+        report.write(f"\nTop {TOP_TRACEBACKS} asignaciones (por traza):\n")
+        for stat in snapshot.statistics('traceback')[:TOP_TRACEBACKS]:
+            report.write(f"{stat.size / 1024:.1f} KiB en {stat.count} bloques\n")
+            for line in stat.traceback.format():
+                report.write(f"    {line}\n")
+        mem_path.write_text(report.getvalue(), encoding='utf-8')
+
+        logging.info(
+            f"Perfil {label}: {elapsed:.2f}s, pico de memoria {peak / 1024 / 1024:.1f} MiB. "
+            f"Funciones más costosas (tiempo propio):\n" + "\n".join(_hot_functions(profile, TOP_FUNCTIONS))
+        )
+        logging.info(f"Perfil guardado en {prof_path} y {mem_path}")
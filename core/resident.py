@@ -0,0 +1,164 @@
+"""
+Proceso residente que mantiene los procesadores cargados en memoria.
+
+El servidor importa pandas, numpy y openpyxl una sola vez y atiende trabajos
+por un socket local (tubería con nombre en Windows). El cliente es liviano:
+no importa pandas, por lo que una ejecución pequeña no paga ese costo.
+"""
+
+import logging
+import os
+import secrets
+import sys
+import tempfile
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+from core.jobs import run_job, warm_imports
+from core.paths import app_dir
+
+
+def default_address():
+    user = os.environ.get('USERNAME') or os.environ.get('USER') or 'remupro'
+    if sys.platform == 'win32':
+        return rf'\\.\pipe\remupro-{user}'
+    return str(Path(tempfile.gettempdir()) / f'remupro-{user}.sock')
+
+
+def _authkey_path(address):
+    """Clave del socket en un directorio privado del usuario (no en el temporal compartido)."""
+    directory = app_dir() / 'residente'
+    directory.mkdir(mode=0o700, exist_ok=True)
+    return directory / f'{Path(address).name}.key'
+
+
+def _write_authkey(path: Path, authkey: bytes) -> None:
+    """Crea el archivo de la clave ya con permisos 0600: nunca queda legible por otros."""
+    path.unlink(missing_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o600)
+    with os.fdopen(fd, 'wb') as key_file:
+        key_file.write(authkey)
+
+
+def _family(address):
+    return 'AF_PIPE' if sys.platform == 'win32' else 'AF_UNIX'
+
+
+class ResidentServer:
+    """Atiende trabajos de procesamiento con los módulos ya importados."""
+
+    def __init__(self, address=None):
+        self.address = address or default_address()
+        self._listener = None
+        self._stopping = threading.Event()
+
+    def serve_forever(self):
+        warm_imports()
+        if _family(self.address) == 'AF_UNIX' and Path(self.address).exists():
+            if is_running(self.address):
+                raise RuntimeError(f"Ya existe un proceso residente en {self.address}")
+            Path(self.address).unlink()
+        authkey = secrets.token_bytes(32)
+        key_path = _authkey_path(self.address)
+        _write_authkey(key_path, authkey)
+        self._listener = Listener(self.address, family=_family(self.address), authkey=authkey)
+        logging.info(f"Proceso residente listo en {self.address}")
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn = self._listener.accept()
+                except OSError:
+                    if self._stopping.is_set():
+                        break
+                    raise
+                except Exception as e:
+                    logging.warning(f"Conexión rechazada: {str(e)}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self._listener.close()
+            key_path.unlink(missing_ok=True)
+            if _family(self.address) == 'AF_UNIX':
+                Path(self.address).unlink(missing_ok=True)
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                request = conn.recv()
+            except EOFError:
+                return
+            if request.get('comando') == 'detener':
+                conn.send(('ok', None))
+                self.stop()
+                return
+            if request.get('comando') == 'ping':
+                conn.send(('ok', os.getpid()))
+                return
+
+            def progress_callback(value, message):
+                conn.send(('progreso', value, message))
+
+            try:
+                output = run_job(request['procesador'], request['entradas'], request['salida'],
+                                 progress_callback, request.get('opciones'))
+                conn.send(('ok', str(output)))
+            except Exception as e:
+                logging.error(f"Error en trabajo residente: {str(e)}", exc_info=True)
+                conn.send(('error', type(e).__name__, str(e)))
+
+    def stop(self):
+        self._stopping.set()
+        # Desbloquea accept() con una conexión propia
+        try:
+            _connect(self.address).close()
+        except Exception:
+            pass
+
+
+def _connect(address):
+    authkey = _authkey_path(address).read_bytes()
+    return Client(address, family=_family(address), authkey=authkey)
+
+
+def is_running(address=None):
+    """Indica si hay un proceso residente atendiendo en la dirección."""
+    address = address or default_address()
+    try:
+        with _connect(address) as conn:
+            conn.send({'comando': 'ping'})
+            return conn.recv()[0] == 'ok'
+    except (OSError, EOFError, AuthenticationError):
+        return False
+
+
+def stop_server(address=None):
+    with _connect(address or default_address()) as conn:
+        conn.send({'comando': 'detener'})
+        conn.recv()
+
+
+def submit(name, inputs, output_path, progress_callback=None, address=None, options=None):
+    """Envía un trabajo al proceso residente y espera su resultado."""
+    with _connect(address or default_address()) as conn:
+        conn.send({
+            'procesador': name,
+            'entradas': [str(Path(p).resolve()) for p in inputs],
+            'salida': str(Path(output_path).resolve()),
+            'opciones': options or {},
+        })
+        while True:
+            message = conn.recv()
+            if message[0] == 'progreso':
+                if progress_callback:
+                    progress_callback(message[1], message[2])
+            elif message[0] == 'ok':
+                return Path(message[1])
+            else:
+                _, error_type, error_msg = message
+                if error_type == 'PermissionError':
+                    raise PermissionError(error_msg)
+                if error_type == 'FileNotFoundError':
+                    raise FileNotFoundError(error_msg)
+                raise RuntimeError(error_msg)
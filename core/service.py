@@ -0,0 +1,391 @@
+"""
+Servicio HTTP local para procesar planillas SEP/PIE/Duplicados.
+
+Los clientes suben un libro Excel, eligen el procesador y consultan el estado
+del trabajo hasta descargar el resultado. Los trabajos se ejecutan en un pool
+de procesos con pandas ya importado y con un límite de admisión de la cola.
+Solo usa la biblioteca estándar; por defecto escucha únicamente en 127.0.0.1.
+"""
+
+import json
+import logging
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from email import policy
+from email.parser import BytesParser
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from core.jobs import PROCESSOR_NAMES, run_job, warm_imports
+from core.logging_setup import configure_worker_logging, create_worker_log_queue
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+ACTIVE_STATES = ('en_cola', 'procesando')
+# Retención de los trabajos terminados: se eliminan (con sus archivos) pasado este
+# tiempo en segundos o cuando hay más terminados que el máximo (los más antiguos)
+RESULT_TTL = 3600
+MAX_FINISHED_JOBS = 100
+# Cada cuántos segundos se revisan los trabajos vencidos
+CLEANUP_INTERVAL = 60
+
+# Cola de progreso del proceso hijo (se asigna en el inicializador del pool)
+_progress_queue = None
+
+
+def _init_worker(progress_queue, log_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+    configure_worker_logging(log_queue)
+    warm_imports()
+
+
+def _ping():
+    return True
+
+
+def _execute(job_id, name, inputs, output_path):
+    def progress_callback(value, message):
+        _progress_queue.put((job_id, value, message))
+
+    progress_callback(0, "Trabajo iniciado")
+    # Ruta donde realmente quedó el resultado (puede ser un nombre alternativo)
+    return str(run_job(name, inputs, Path(output_path), progress_callback))
+
+
+class Job:
+    def __init__(self, job_id, name, directory: Path):
+        self.id = job_id
+        self.name = name
+        self.directory = directory
+        self.output_path = directory / 'resultado.xlsx'
+        self.state = 'en_cola'
+        self.progress = 0
+        self.message = "En cola"
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'procesador': self.name,
+            'estado': self.state,
+            'progreso': self.progress,
+            'mensaje': self.message,
+            'error': self.error,
+        }
+
+
+class ProcessingService:
+    """Administra los trabajos, el pool de procesos y el servidor HTTP."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=2, max_pending=8, workdir=None,
+                 result_ttl=RESULT_TTL, max_finished=MAX_FINISHED_JOBS):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.max_finished = max_finished
+        self._own_workdir = workdir is None
+        self.workdir = Path(workdir or tempfile.mkdtemp(prefix='remupro_servicio_'))
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._progress_queue = multiprocessing.Queue()
+        self._pool = None
+        self._server = None
+        self._drain_thread = None
+        self._serve_thread = None
+        self._cleanup_thread = None
+        self._stopping = threading.Event()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2] if self._server else (self.host, self.port)
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Inicia el pool y el servidor en segundo plano."""
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self._progress_queue, create_worker_log_queue())
+        )
+        # Fuerza el arranque de los procesos para que los imports queden en caliente
+        for future in [self._pool.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+        self._drain_thread = threading.Thread(target=self._drain_progress, daemon=True)
+        self._drain_thread.start()
+        self._cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
+        self._cleanup_thread.start()
+        self._server = ThreadingHTTPServer((self.host, self.port), _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.service = self
+        self._serve_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._serve_thread.start()
+        logging.info(f"Servicio RemuPro escuchando en {self.url}")
+        return self
+
+    def serve_forever(self):
+        self.start()
+        try:
+            self._serve_thread.join()
+        except KeyboardInterrupt:
+            logging.info("Deteniendo servicio...")
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self._stopping.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._pool:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        self._progress_queue.put(None)
+        if self._drain_thread:
+            self._drain_thread.join(timeout=5)
+        if self._cleanup_thread:
+            self._cleanup_thread.join(timeout=5)
+        if self._own_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def submit(self, name, files):
+        """Registra un trabajo con los archivos ``[(nombre, bytes)]`` recibidos."""
+        if name not in PROCESSOR_NAMES:
+            raise ValueError(f"Procesador no reconocido: {name}")
+        if not files:
+            raise ValueError("No se recibió ningún archivo de entrada.")
+        self.evict_finished()
+        with self._lock:
+            pending = sum(1 for job in self.jobs.values() if job.state in ACTIVE_STATES)
+            if pending >= self.max_pending:
+                raise OverflowError("La cola de trabajos está llena, intente más tarde.")
+            job = Job(uuid.uuid4().hex, name, self.workdir / uuid.uuid4().hex)
+            self.jobs[job.id] = job
+        job.directory.mkdir(parents=True)
+        inputs = []
+        for index, (filename, content) in enumerate(files):
+            suffix = Path(filename or '').suffix.lower()
+            if suffix not in ('.xlsx', '.xls'):
+                suffix = '.xlsx'
+            path = job.directory / f"entrada_{index + 1}{suffix}"
+            path.write_bytes(content)
+            inputs.append(str(path))
+        future = self._pool.submit(_execute, job.id, name, inputs, str(job.output_path))
+        future.add_done_callback(lambda f, job=job: self._finish(job, f))
+        return job
+
+    def _finish(self, job, future):
+        with self._lock:
+            error = future.exception() if not future.cancelled() else RuntimeError("Trabajo cancelado")
+            job.finished = time.time()
+            if error is None:
+                job.output_path = Path(future.result())
+                job.state = 'completado'
+                job.progress = 100
+            else:
+                job.state = 'error'
+                job.error = str(error)
+                job.message = "Error en el procesamiento"
+                logging.error(f"Trabajo {job.id} ({job.name}) falló: {error}")
+
+    def evict_finished(self, now=None):
+        """
+        Elimina los trabajos terminados hace más de ``result_ttl`` segundos y los más
+        antiguos que excedan ``max_finished``, junto con su directorio de entrada y
+        resultado. Devuelve la cantidad eliminada.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            terminados = sorted((job for job in self.jobs.values() if job.finished is not None),
+                                key=lambda job: job.finished)
+            sobrantes = len(terminados) - self.max_finished
+            vencidos = [job for i, job in enumerate(terminados)
+                        if i < sobrantes or now - job.finished > self.result_ttl]
+            for job in vencidos:
+                del self.jobs[job.id]
+        for job in vencidos:
+            shutil.rmtree(job.directory, ignore_errors=True)
+        if vencidos:
+            logging.info(f"Servicio: {len(vencidos)} trabajos terminados eliminados")
+        return len(vencidos)
+
+    def _cleanup_loop(self):
+        while not self._stopping.wait(CLEANUP_INTERVAL):
+            self.evict_finished()
+
+    def _drain_progress(self):
+        while True:
+            item = self._progress_queue.get()
+            if item is None:
+                return
+            job_id, value, message = item
+            with self._lock:
+                job = self.jobs.get(job_id)
+                if job and job.state in ACTIVE_STATES:
+                    job.state = 'procesando'
+                    job.progress = value
+                    job.message = message
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+
+def _parse_multipart(content_type, body):
+    message = BytesParser(policy=policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    fields, files = {}, []
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        filename = part.get_filename()
+        payload = part.get_payload(decode=True) or b''
+        if filename is not None:
+            files.append((filename, payload))
+        elif name:
+            fields[name] = payload.decode('utf-8').strip()
+    return fields, files
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = 'RemuPro'
+
+    def log_message(self, format, *args):
+        logging.info("%s - %s" % (self.address_string(), format % args))
+
+    def _send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            self.send_header('Retry-After', '5')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send_json(status, {'error': message})
+
+    def do_GET(self):
+        service = self.server.service
+        parts = [p for p in urlparse(self.path).path.split('/') if p]
+        if parts == ['procesadores']:
+            return self._send_json(HTTPStatus.OK, {'procesadores': list(PROCESSOR_NAMES)})
+        if len(parts) in (2, 3) and parts[0] == 'trabajos':
+            job = service.get(parts[1])
+            if job is None:
+                return self._send_error(HTTPStatus.NOT_FOUND, "Trabajo no encontrado")
+            if len(parts) == 2:
+                return self._send_json(HTTPStatus.OK, job.to_dict())
+            if parts[2] == 'resultado':
+                if job.state != 'completado':
+                    return self._send_error(HTTPStatus.CONFLICT, f"El trabajo está en estado '{job.state}'")
+                try:
+                    content = job.output_path.read_bytes()
+                except FileNotFoundError:
+                    return self._send_error(HTTPStatus.GONE, "El resultado ya no está disponible")
+                self.send_response(HTTPStatus.OK)
+                self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+                self.send_header('Content-Disposition', f'attachment; filename="{job.name}_{job.id}.xlsx"')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+                return
+        self._send_error(HTTPStatus.NOT_FOUND, "Ruta no encontrada")
+
+    def do_POST(self):
+        service = self.server.service
+        url = urlparse(self.path)
+        if [p for p in url.path.split('/') if p] != ['trabajos']:
+            return self._send_error(HTTPStatus.NOT_FOUND, "Ruta no encontrada")
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            return self._send_error(HTTPStatus.BAD_REQUEST, "Cuerpo de la solicitud vacío")
+        if length > MAX_UPLOAD_BYTES:
+            return self._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Archivo demasiado grande")
+        body = self.rfile.read(length)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.startswith('multipart/form-data'):
+            fields, files = _parse_multipart(content_type, body)
+            query.update(fields)
+        else:
+            files = [(self.headers.get('X-Nombre-Archivo', 'entrada.xlsx'), body)]
+        try:
+            job = service.submit(query.get('procesador', '').lower(), files)
+        except OverflowError as e:
+            return self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, str(e))
+        except ValueError as e:
+            return self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+        self._send_json(HTTPStatus.ACCEPTED, job.to_dict())
+
+
+class ServiceClient:
+    """Cliente mínimo del servicio, útil para scripts y pruebas locales."""
+
+    def __init__(self, base_url=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method, path, data=None, headers=None):
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode('utf-8', errors='replace')
+            raise RuntimeError(f"Error {e.code} del servicio: {detail}") from None
+
+    def submit(self, name, paths):
+        boundary = uuid.uuid4().hex
+        body = bytearray()
+        body += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"procesador\"\r\n\r\n{name}\r\n").encode()
+        for path in paths:
+            path = Path(path)
+            body += (f"--{boundary}\r\nContent-Disposition: form-data; name=\"archivo\"; "
+                     f"filename=\"{path.name}\"\r\nContent-Type: application/octet-stream\r\n\r\n").encode()
+            body += path.read_bytes() + b"\r\n"
+        body += f"--{boundary}--\r\n".encode()
+        _, content = self._request('POST', '/trabajos', bytes(body),
+                                   {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+        return json.loads(content)['id']
+
+    def status(self, job_id):
+        _, content = self._request('GET', f'/trabajos/{job_id}')
+        return json.loads(content)
+
+    def wait(self, job_id, interval=0.2, progress_callback=None):
+        while True:
+            status = self.status(job_id)
+            if progress_callback:
+                progress_callback(status['progreso'], status['mensaje'])
+            if status['estado'] not in ACTIVE_STATES:
+                if status['estado'] == 'error':
+                    raise RuntimeError(status['error'])
+                return status
+            time.sleep(interval)
+
+    def download(self, job_id, output_path: Path):
+        _, content = self._request('GET', f'/trabajos/{job_id}/resultado')
+        Path(output_path).write_bytes(content)
+        return Path(output_path)
@@ -0,0 +1,111 @@
+"""
+Consola interactiva de simulación ("qué pasa si") para SEP/PIE.
+
+La planilla se procesa una vez al abrir la consola; cada cambio de horas o de
+montos recalcula solo al docente afectado (ver processors.session) y el
+archivo de salida se escribe recién con ``guardar``.
+"""
+
+import cmd
+import shlex
+
+import pandas as pd
+
+
+class SimulationShell(cmd.Cmd):
+    intro = ("Simulación abierta. Comandos: ver, horas, monto, excedidos, guardar, salir "
+             "(ayuda <comando> para el detalle).")
+    prompt = 'simular> '
+
+    def __init__(self, session, output_path=None, **kwargs):
+        super().__init__(**kwargs)
+        self.session = session
+        self.output_path = output_path
+
+    def _print(self, frame: pd.DataFrame, columnas=None):
+        if columnas:
+            frame = frame[[col for col in columnas if col in frame.columns]]
+        with pd.option_context('display.max_columns', 20, 'display.width', 200):
+            print(frame.to_string(), file=self.stdout)
+
+    def _run(self, accion, *args):
+        """Ejecuta la acción mostrando los errores de uso sin cerrar la consola."""
+        try:
+            return accion(*args)
+        except (KeyError, ValueError) as e:
+            print(f"Error: {e.args[0] if e.args else e}", file=self.stdout)
+            return None
+
+    def _edit(self, accion, arg: str, uso: str):
+        partes = shlex.split(arg)
+        if len(partes) not in (3, 4):
+            print(f"Uso: {uso}", file=self.stdout)
+            return
+        rut, columna, valor = partes[:3]
+        try:
+            valor = float(valor.replace(',', '.'))
+            fila = int(partes[3]) if len(partes) == 4 else None
+        except ValueError:
+            print(f"Uso: {uso}", file=self.stdout)
+            return
+        if valor.is_integer():
+            valor = int(valor)
+        filas = self._run(accion, rut, columna, valor, fila)
+        if filas is not None:
+            self._print(filas, self._columns())
+            if self.session.exceeds_limit(rut):
+                print("Atención: el docente supera el máximo de horas.", file=self.stdout)
+
+    def _columns(self):
+        procesador = self.session.processor
+        return (['Rut', 'Nombre'] + list(procesador.HOURS_COLUMNS) + ['TOTAL HORAS POR DOCENTE']
+                + procesador.prorated_columns(self.session.result))
+
+    def do_ver(self, arg):
+        """ver RUT: muestra las filas de HORAS y el resultado del docente."""
+        rut = arg.strip()
+        horas = self._run(self.session.hours_rows, rut)
+        if horas is None:
+            return
+        print("HORAS (la primera columna es el número de fila):", file=self.stdout)
+        self._print(horas)
+        print("Resultado:", file=self.stdout)
+        self._print(self.session.teacher(rut), self._columns())
+
+    def do_horas(self, arg):
+        """horas RUT COLUMNA VALOR [FILA]: cambia las horas (FILA si el docente tiene varias en HORAS)."""
+        self._edit(self.session.set_hours, arg, "horas RUT COLUMNA VALOR [FILA]")
+
+    def do_monto(self, arg):
+        """monto RUT COLUMNA VALOR [FILA]: cambia un monto de TOTAL (p. ej. "SUELDO BASE")."""
+        self._edit(self.session.set_amount, arg, "monto RUT COLUMNA VALOR [FILA]")
+
+    def do_excedidos(self, arg):
+        """excedidos: docentes que superan el máximo de horas."""
+        exceso = self.session.over_limit()
+        if exceso.empty:
+            print("Ningún docente supera el máximo de horas.", file=self.stdout)
+        else:
+            self._print(exceso)
+
+    def do_guardar(self, arg):
+        """guardar [RUTA]: escribe el resultado actual (por defecto en la salida indicada al abrir)."""
+        ruta = arg.strip() or self.output_path
+        if not ruta:
+            print("Indique la ruta de salida.", file=self.stdout)
+            return
+        print(self.session.save(ruta), file=self.stdout)
+
+    def do_salir(self, arg):
+        """salir: cierra la consola (los cambios no guardados se pierden)."""
+        return True
+
+    do_EOF = do_salir
+
+    def emptyline(self):
+        pass
+
+    def default(self, line):
+        print(f"Comando no reconocido: {line.split()[0]} (use ayuda)", file=self.stdout)
+
+    do_ayuda = cmd.Cmd.do_help
@@ -1,60 +1,149 @@
 import sys
+import multiprocessing
 from PyQt5.QtCore import QThread, pyqtSignal
 from pathlib import Path
+from core import child
+from core.logging_setup import shared_worker_log_queue
 
-class ProcessorWorker(QThread):
+# Intervalo con que el hilo revisa si el proceso hijo sigue vivo
+POLL_SECONDS = 0.1
+
+
+class ChildProcessWorker(QThread):
+    """
+    Hilo liviano que lanza el trabajo en un proceso hijo (spawn) y solo reenvía
+    el progreso: pandas y openpyxl no comparten el GIL con la interfaz y una
+    caída del procesador no cierra la aplicación.
+    """
     progress_signal = pyqtSignal(int, str)
     finished_signal = pyqtSignal(str)
     error_signal = pyqtSignal(str)
-    
-    def __init__(self, processor, input_path: Path, output_path: Path):
-        super().__init__()
-        self.processor = processor
-        self.input_path = input_path
-        self.output_path = output_path
-    
+
+    permission_hint = "El archivo podría estar abierto en Excel."
+
+    def child_call(self):
+        """Devuelve ``(función, argumentos)`` a ejecutar en el hijo."""
+        raise NotImplementedError
+
+    def on_result(self, saved_path, frame):
+        """Recibe la ruta guardada y el DataFrame (mapeado en memoria) del hijo."""
+
     def run(self):
+        contexto = multiprocessing.get_context('spawn')
+        receptor, emisor = contexto.Pipe(duplex=False)
+        funcion, argumentos = self.child_call()
+        proceso = contexto.Process(
+            target=funcion, args=(emisor, *argumentos, shared_worker_log_queue()), daemon=True
+        )
+        proceso.start()
+        emisor.close()
         try:
-            self.processor.process_file(self.input_path, self.output_path, self.progress_callback)
-            self.finished_signal.emit(str(self.output_path))
-        except PermissionError as e:
-            # Mensaje específico para errores de permisos en Windows
-            if sys.platform == 'win32':
-                error_msg = f"Error de permisos: El archivo podría estar abierto en Excel.\n{str(e)}"
-            else:
-                error_msg = f"Error de permisos: {str(e)}"
+            mensaje = self._receive(receptor, proceso)
+        finally:
+            receptor.close()
+            proceso.join()
+
+        if mensaje is None:
+            self.error_signal.emit(
+                f"El proceso de cálculo terminó inesperadamente (código {proceso.exitcode})."
+            )
+        elif mensaje[0] == 'ok':
+            _, saved_path, frame_path = mensaje
+            frame = child.read_frame(frame_path) if frame_path else None
+            self.on_result(saved_path, frame)
+        else:
+            _, error_type, error_msg = mensaje
+            if error_type == 'PermissionError':
+                # Mensaje específico para errores de permisos en Windows
+                if sys.platform == 'win32':
+                    error_msg = f"Error de permisos: {self.permission_hint}\n{error_msg}"
+                else:
+                    error_msg = f"Error de permisos: {error_msg}"
             self.error_signal.emit(error_msg)
-        except Exception as e:
-            self.error_signal.emit(str(e))
-    
-    def progress_callback(self, value, message):
-        self.progress_signal.emit(value, message)
 
-class DuplicadosWorker(QThread):
-    progress_signal = pyqtSignal(int, str)
-    finished_signal = pyqtSignal(str)
-    error_signal = pyqtSignal(str)
-    
-    def __init__(self, processor, input_path1: Path, input_path2: Path, output_path: Path):
+    def _receive(self, receptor, proceso):
+        while True:
+            if receptor.poll(POLL_SECONDS):
+                try:
+                    mensaje = receptor.recv()
+                except EOFError:
+                    return None
+                if mensaje[0] == 'progreso':
+                    self.progress_signal.emit(mensaje[1], mensaje[2])
+                    continue
+                return mensaje
+            if not proceso.is_alive() and not receptor.poll():
+                return None
+
+
+class _ProcessorChildWorker(ChildProcessWorker):
+    """Ejecuta un método del procesador en el hijo y deja el resultado en el procesador."""
+    method = 'process_file'
+
+    def __init__(self, processor):
         super().__init__()
         self.processor = processor
+
+    def processor_args(self):
+        raise NotImplementedError
+
+    def child_call(self):
+        return child.run_processor, (self.processor, self.method, self.processor_args())
+
+    def on_result(self, saved_path, frame):
+        self.processor.saved_path = Path(saved_path) if saved_path else None
+        self.processor.result = frame
+        self.finished_signal.emit(str(self.processor.saved_path or self.output_path))
+
+
+class ProcessorWorker(_ProcessorChildWorker):
+
+    def __init__(self, processor, input_path: Path, output_path: Path):
+        super().__init__(processor)
+        self.input_path = input_path
+        self.output_path = output_path
+
+    def processor_args(self):
+        return (self.input_path, self.output_path)
+
+
+class DuplicadosWorker(_ProcessorChildWorker):
+    permission_hint = "Uno de los archivos podría estar abierto en Excel."
+
+    def __init__(self, processor, input_path1: Path, input_path2: Path, output_path: Path):
+        super().__init__(processor)
         self.input_path1 = input_path1
         self.input_path2 = input_path2
         self.output_path = output_path
-    
-    def run(self):
-        try:
-            self.processor.process_file(self.input_path1, self.input_path2, self.output_path, self.progress_callback)
-            self.finished_signal.emit(str(self.output_path))
-        except PermissionError as e:
-            # Mensaje específico para errores de permisos en Windows
-            if sys.platform == 'win32':
-                error_msg = f"Error de permisos: Uno de los archivos podría estar abierto en Excel.\n{str(e)}"
-            else:
-                error_msg = f"Error de permisos: {str(e)}"
-            self.error_signal.emit(error_msg)
-        except Exception as e:
-            self.error_signal.emit(str(e))
-    
-    def progress_callback(self, value, message):
-        self.progress_signal.emit(value, message)
\ No newline at end of file
+
+    def processor_args(self):
+        return (self.input_path1, self.input_path2, self.output_path)
+
+
+class ConsolidacionWorker(_ProcessorChildWorker):
+    method = 'process_files'
+    permission_hint = "Uno de los archivos podría estar abierto en Excel."
+
+    def __init__(self, processor, input_paths, output_path: Path):
+        super().__init__(processor)
+        self.input_paths = list(input_paths)
+        self.output_path = output_path
+
+    def processor_args(self):
+        return (self.input_paths, self.output_path)
+
+
+class PreviewWorker(ChildProcessWorker):
+    """Lee una hoja de Excel en un proceso hijo para la vista previa."""
+    loaded_signal = pyqtSignal(object, str)
+
+    def __init__(self, input_path: Path, sheet_name):
+        super().__init__()
+        self.input_path = input_path
+        self.sheet_name = sheet_name
+
+    def child_call(self):
+        return child.read_sheet, (self.input_path, self.sheet_name)
+
+    def on_result(self, saved_path, frame):
+        self.loaded_signal.emit(frame, f"{self.input_path.name} [{self.sheet_name}]")
@@ -1,5 +1,13 @@
 #!/usr/bin/env python3
-from ui.main_window import main
+import sys
+import multiprocessing
 
 if __name__ == "__main__":
+    # Necesario para los procesos hijos en el ejecutable empaquetado (Windows)
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        # Modos sin interfaz gráfica (servicio, etc.): no requieren PyQt
+        from core.cli import main as cli_main
+        sys.exit(cli_main())
+    from ui.main_window import main
     main()
@@ -1,35 +1,708 @@
-import time
+import os
 import sys
+import stat
+import logging
+import tempfile
+import time
+from contextlib import contextmanager
 from pathlib import Path
+import numpy as np
 import pandas as pd
+from processors.rut import normalize_ruts
+from processors.reader import INVALID_CELLS, SheetSchema, read_sheets
+from processors.sparse import SPARSE_DENSITY, densify, is_sparse, sparsify
+from processors.fixedpoint import ExactSplitter, hour_weights
+from processors.delimited import DEFAULT_DECIMAL, DEFAULT_ENCODING, apply_schema, read_text_sheets, text_sources
+
+# Cantidad máxima de elementos detallados en un mensaje de log agregado
+MAX_LOG_ITEMS = 50
+
+# Perfiles de salida de SEP/PIE: qué columnas se generan y escriben
+OUTPUT_PROFILES = {
+    'completo': "Todas las columnas de TOTAL, las prorrateadas y las auxiliares",
+    'prorrateo': "Rut, Nombre, horas y montos prorrateados",
+    'resumen': "Una fila por docente con las horas y los montos prorrateados sumados",
+    'auditoria': "Horas, auxiliares y cada columna de origen junto a sus montos prorrateados",
+}
+# Modos de prorrateo de SEP/PIE (ver BaseProcessor.prorate_columns)
+PRORATION_MODES = {
+    'redondeo': "Cada monto prorrateado se redondea por separado al peso",
+    'exacto': "Pesos enteros repartidos por resto mayor: cada docente suma exactamente su monto de TOTAL",
+}
+KEY_COLUMNS = ('Rut', 'Nombre')
+# Máximo de horas semanales por docente
+MAX_HOURS = 44
+# Nombres alternativos que se prueban si el archivo de salida está en uso
+MAX_ALTERNATIVES = 50
+# Tabla de diferencias de la conciliación (ver BaseProcessor.reconcile)
+RECONCILIATION_COLUMNS = ['Rut', 'Nombre', 'COLUMNA', 'MONTO ORIGEN', 'MONTO PRORRATEADO', 'DIFERENCIA']
+
+def is_locked(path: Path) -> bool:
+    """
+    Detecta sin esperar si un archivo está abierto en otro programa: Excel deja un
+    archivo ``~$nombre`` junto al libro y en Windows impide abrirlo para escritura.
+    """
+    path = Path(path)
+    for nombre in (f"~${path.name}", f"~${path.name[2:]}"):
+        if (path.parent / nombre).exists():
+            return True
+    if not path.exists():
+        return False
+    try:
+        with open(path, 'r+b'):
+            return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+
+
+def alternative_path(path: Path) -> Path:
+    """Primer nombre libre del tipo ``nombre (1).xlsx``, ``nombre (2).xlsx``..."""
+    path = Path(path)
+    for i in range(1, MAX_ALTERNATIVES + 1):
+        candidato = path.with_name(f"{path.stem} ({i}){path.suffix}")
+        if not candidato.exists() and not is_locked(candidato):
+            return candidato
+    raise PermissionError(f"No hay un nombre alternativo libre para {path.name}")
+
+
+def _current_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Máscara de permisos del proceso, leída una vez al importar: os.umask no se puede
+# consultar sin cambiarla y los resultados se escriben también desde hilos
+_UMASK = _current_umask()
+
+
+def output_mode(path: Path) -> int:
+    """Permisos para un resultado: los del archivo que reemplaza o los que da la umask."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def atomic_write(output_path: Path, write) -> Path:
+    """
+    Escribe con ``write(ruta_temporal)`` en un temporal del mismo directorio y lo
+    mueve al destino con os.replace, de modo que nunca queda un archivo a medias.
+    El temporal (que mkstemp crea con permisos 0600) recibe antes los permisos de
+    un archivo creado normalmente (ver output_mode). Si el destino está bloqueado
+    se usa de inmediato un nombre alternativo. Devuelve la ruta final.
+    """
+    output_path = Path(output_path)
+    fd, temp_path = tempfile.mkstemp(prefix='.~remupro_', suffix=output_path.suffix, dir=output_path.parent)
+    os.close(fd)
+    try:
+        write(temp_path)
+        os.chmod(temp_path, output_mode(output_path))
+        try:
+            os.replace(temp_path, output_path)
+        except PermissionError:
+            alternativa = alternative_path(output_path)
+            logging.warning(f"{output_path.name} está en uso; el resultado se guardó en {alternativa.name}")
+            os.replace(temp_path, alternativa)
+            output_path = alternativa
+    except PermissionError:
+        if sys.platform == 'win32':
+            message = "El archivo está siendo utilizado por otro programa. Ciérrelo e intente nuevamente."
+        else:
+            message = "Error de permisos al acceder al archivo."
+        raise PermissionError(message)
+    finally:
+        Path(temp_path).unlink(missing_ok=True)
+    return output_path
+
+
+def as_frame(tabla) -> pd.DataFrame:
+    """DataFrame con los datos de ``tabla`` (DataFrame o tabla Arrow); nunca el mismo objeto."""
+    if isinstance(tabla, pd.DataFrame):
+        return tabla.copy()
+    if hasattr(tabla, 'to_pandas'):
+        return tabla.to_pandas()
+    raise TypeError(f"Se esperaba un DataFrame o una tabla Arrow, no {type(tabla).__name__}")
+
+
+def group_sums(columna: pd.Series, codigos: np.ndarray, grupos: int) -> np.ndarray:
+    """
+    Suma de la columna por código de grupo (los códigos negativos no suman). En
+    las columnas dispersas solo se recorren las filas distintas de 0.
+    """
+    if is_sparse(columna):
+        filas = columna.array.sp_index.indices
+        valores = columna.array.sp_values.astype(np.float64)
+        codigos = codigos[filas]
+    else:
+        valores = columna.to_numpy(dtype=np.float64, na_value=0)
+    validos = codigos >= 0
+    return np.bincount(codigos[validos], weights=valores[validos], minlength=grupos)
+
 
 class BaseProcessor:
     """Clase base para procesadores de remuneraciones."""
+
+    # Versión del resultado: incrementarla cuando cambie lo que escribe el procesador
+    # (los lotes reanudables no reutilizan salidas de otra versión)
+    VERSION = 1
+    # Historial SQLite opcional (ver core.history); requiere indicar el periodo
+    history_path = None
+    periodo = None
+    # Modo de perfilado (cProfile + tracemalloc), ver core.profiling
+    profile = False
+    # Observador de las etapas de ``timed``: ``stage_listener(etapa, terminada)`` al
+    # inicio y al final de cada una (el perfilado mide así la memoria por etapa)
+    stage_listener = None
+    # Reporte de RUT inválidos o sin pareja de la última carga
+    rut_report = None
+    # Procesamiento en paralelo por particiones de docentes (ver processors.parallel)
+    partitions = 1
+    partition_column = None
+    # Salida dividida: un archivo por valor de esta columna (ver processors.shards)
+    shard_column = None
+    # Último DataFrame guardado por process_file (vista previa en la interfaz)
+    result = None
+    # Ruta donde realmente quedó el último resultado (puede ser un nombre alternativo)
+    saved_path = None
+    # Perfil de salida (ver OUTPUT_PROFILES)
+    output_profile = 'completo'
+    # Diferencias de la última conciliación y archivo opcional donde guardarlas
+    reconciliation = None
+    reconciliation_path = None
+    # Entrada como texto delimitado (ver processors.delimited): codificación, separador
+    # decimal y separador de campos (None = se detecta en el encabezado)
+    text_encoding = DEFAULT_ENCODING
+    text_decimal = DEFAULT_DECIMAL
+    text_delimiter = None
+    # Métricas de la ejecución (ver core.metrics): duración por etapa, filas y
+    # columnas de entrada y registro donde se guardan (None = el predeterminado)
+    stage_times = None
+    input_shape = None
+    metrics_path = None
+    # Montos de TOTAL con a lo más esta fracción de filas distintas de 0 se guardan
+    # y prorratean como columnas dispersas (None = siempre densas)
+    sparse_density = SPARSE_DENSITY
+    # Motor del procesamiento: 'pandas' o 'polars' (solo Duplicados, ver processors.polars_engine)
+    engine = 'pandas'
+    # Modo de prorrateo (ver PRORATION_MODES y processors.fixedpoint)
+    proration = 'redondeo'
+    # Reporte de validación del último proceso (ver validation_report)
+    report = None
+    # Modo panel (ver processors.panel): columna con el periodo de cada fila, que se
+    # suma al Rut como clave del cruce (None = un solo periodo)
+    period_column = None
+    # Programa en el historial y en los nombres del modo panel (None = sin modo panel)
+    PROGRAM = None
+    # Columnas propias de cada procesador: horas, sufijos de los prorrateos y auxiliares
+    HOURS_COLUMNS = ()
+    # Columnas de HORAS que se leen (posiciones; None = todas)
+    HOURS_USECOLS = None
+    PRORATED_SUFFIXES = ()
+    AUX_COLUMNS = ()
     
+    @contextmanager
+    def timed(self, etapa: str):
+        """Acumula la duración del bloque en ``stage_times[etapa]``."""
+        if self.stage_listener:
+            self.stage_listener(etapa, False)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.stage_times is None:
+                self.stage_times = {}
+            self.stage_times[etapa] = self.stage_times.get(etapa, 0.0) + time.perf_counter() - inicio
+            if self.stage_listener:
+                self.stage_listener(etapa, True)
+
     def validate_file(self, file_path: Path) -> None:
-        """Realiza validaciones básicas del archivo."""
-        if not file_path.exists():
+        """Realiza validaciones básicas del archivo (o de los archivos de texto de HORAS y TOTAL)."""
+        if not isinstance(file_path, (list, tuple)) and not Path(file_path).exists():
             raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
-        if file_path.suffix.lower() not in ('.xlsx', '.xls'):
-            raise ValueError("Formato de archivo no válido")
-        if file_path.stat().st_size == 0:
-            raise ValueError("El archivo está vacío")
+        # Solo SEP/PIE (procesadores con hoja HORAS) aceptan archivos de texto
+        fuentes = text_sources(file_path) if self.HOURS_COLUMNS else None
+        for path in (fuentes.values() if fuentes else [Path(file_path)]):
+            if not path.exists():
+                raise FileNotFoundError(f"Archivo no encontrado: {path}")
+            if not fuentes and path.suffix.lower() not in ('.xlsx', '.xls'):
+                raise ValueError("Formato de archivo no válido")
+            if path.stat().st_size == 0:
+                raise ValueError(f"El archivo está vacío: {path.name}")
+
+    def input_files(self, file_path) -> list:
+        """Archivos que componen la entrada: el libro o los textos de HORAS y TOTAL."""
+        fuentes = text_sources(file_path) if self.HOURS_COLUMNS else None
+        return list(fuentes.values()) if fuentes else [Path(file_path)]
+
+    def input_label(self, file_path) -> str:
+        return ', '.join(path.name for path in self.input_files(file_path))
     
+    def log_summary(self, message: str, items, total: int = None, level=logging.WARNING) -> None:
+        """Registra un único mensaje con el detalle de varios elementos (en vez de uno por elemento)."""
+        items = list(items)[:MAX_LOG_ITEMS]
+        total = len(items) if total is None else total
+        lines = [message] + [f"  {item}" for item in items]
+        if total > len(items):
+            lines.append(f"  ... y {total - len(items)} más")
+        logging.log(level, "\n".join(lines))
+    
+    def input_schemas(self) -> dict:
+        """Esquemas de HORAS y TOTAL: horas como enteros pequeños y montos de TOTAL como int64."""
+        return {
+            'HORAS': SheetSchema(keys=KEY_COLUMNS, hours=self.HOURS_COLUMNS, usecols=self.HOURS_USECOLS),
+            'TOTAL': SheetSchema(keys=('Rut', 'rut'), money=self.prorate_sources(), usecols=self.total_usecols()),
+        }
+
+    def read_input(self, file_path: Path):
+        """
+        Lee HORAS y TOTAL abriendo el libro una sola vez (o de sus archivos de texto),
+        con tipos declarados: horas como enteros pequeños y montos de TOTAL como
+        int64 (vacío = 0); los montos casi siempre en 0 quedan dispersos.
+        """
+        esquemas = self.input_schemas()
+        fuentes = text_sources(file_path)
+        if fuentes:
+            hojas = read_text_sheets(fuentes, esquemas, self.text_encoding, self.text_decimal, self.text_delimiter)
+        else:
+            hojas = read_sheets(file_path, esquemas)
+        return self._typed_input(hojas)
+
+    def frames_input(self, horas, total):
+        """
+        HORAS y TOTAL ya cargados en memoria (DataFrame o tabla Arrow, con las columnas
+        de las hojas) con los mismos tipos que al leer el archivo. Se trabaja sobre
+        copias: la entrada no se modifica.
+
+        Las columnas de HORAS se toman por nombre (todas las del DataFrame; deben estar
+        las claves y las de horas): las posiciones de HOURS_USECOLS son las de la hoja
+        del libro y no sirven para un DataFrame que ya no tiene esa forma, como el que
+        devuelve read_input.
+        """
+        esquemas = self.input_schemas()
+        esquemas['HORAS'] = SheetSchema(keys=KEY_COLUMNS, hours=self.HOURS_COLUMNS)
+        horas = as_frame(horas)
+        faltantes = [col for col in KEY_COLUMNS + self.HOURS_COLUMNS if col not in horas.columns]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en HORAS: {', '.join(faltantes)}")
+        return self._typed_input({
+            hoja: apply_schema(tabla, esquemas[hoja], hoja, self.text_decimal)
+            for hoja, tabla in (('HORAS', horas), ('TOTAL', as_frame(total)))
+        })
+
+    def _typed_input(self, hojas: dict):
+        df_horas, df_total = hojas['HORAS'], hojas['TOTAL'].rename(columns={'rut': 'Rut'})
+        if self.sparse_density:
+            sparsify(df_total, self.prorate_sources(), self.sparse_density)
+        self.input_shape = (len(df_horas) + len(df_total), df_horas.shape[1] + df_total.shape[1])
+        return df_horas, df_total
+
+    def normalize_rut_keys(self, df_horas: pd.DataFrame, df_total: pd.DataFrame, columna='Rut') -> dict:
+        """
+        Canoniza los RUT de HORAS y TOTAL antes del cruce y reporta en bloque los
+        inválidos y los que no tienen pareja en la otra hoja.
+        """
+        reporte = {}
+        for hoja, df in (('HORAS', df_horas), ('TOTAL', df_total)):
+            normalizados, _, valido = normalize_ruts(df[columna])
+            df[columna] = normalizados
+            invalidos = normalizados[~valido & normalizados.notna()].unique()
+            if len(invalidos):
+                self.log_summary(
+                    f"Hoja {hoja}: {len(invalidos)} RUT con formato o dígito verificador inválido:",
+                    invalidos, total=len(invalidos)
+                )
+            reporte[f'invalidos_{hoja.lower()}'] = list(invalidos)
+        ruts_horas = pd.Index(df_horas[columna].dropna().unique())
+        ruts_total = pd.Index(df_total[columna].dropna().unique())
+        sin_total = ruts_horas.difference(ruts_total)
+        sin_horas = ruts_total.difference(ruts_horas)
+        if len(sin_total):
+            self.log_summary(
+                f"{len(sin_total)} RUT de HORAS no existen en TOTAL (no se cruzarán):",
+                sin_total, total=len(sin_total)
+            )
+        if len(sin_horas):
+            self.log_summary(
+                f"{len(sin_horas)} RUT de TOTAL no tienen horas en HORAS:",
+                sin_horas, total=len(sin_horas), level=logging.INFO
+            )
+        reporte['sin_total'] = list(sin_total)
+        reporte['sin_horas'] = list(sin_horas)
+        self.rut_report = reporte
+        return reporte
+    
+    def prepare_input(self, df_horas: pd.DataFrame, df_total: pd.DataFrame) -> None:
+        """Valida HORAS y TOTAL y canoniza sus RUT (modifica los DataFrames)."""
+        self.normalize_rut_keys(df_horas, df_total)
+
+    def load_data(self, file_path: Path):
+        """Lee y prepara HORAS y TOTAL del archivo (o de sus archivos de texto)."""
+        self.verify_file(file_path)
+        df_horas, df_total = self.read_input(file_path)
+        self.prepare_input(df_horas, df_total)
+        return df_horas, df_total
+
+    def process_frames(self, horas, total, progress_callback=None):
+        """
+        Procesa HORAS y TOTAL ya cargados en memoria (DataFrame o tabla Arrow) sin
+        leer ni escribir archivos y sin modificar la entrada. Devuelve el resultado,
+        con las columnas del perfil de salida, y el reporte de validación.
+        """
+        df_horas, df_total = self.frames_input(horas, total)
+        datos = self.process_input(df_horas, df_total, progress_callback)
+        return self.select_output(densify(datos)), self.report
+
+    def process_periods(self, entradas, output_dir: Path, progress_callback=None) -> list:
+        """
+        Modo panel: procesa juntas las planillas de varios periodos (``[(periodo,
+        archivo)]``) y escribe un resultado por periodo y el resumen por Rut en
+        ``output_dir`` (ver processors.panel). Devuelve las rutas escritas.
+        """
+        from processors.panel import run_panel
+        return run_panel(self, entradas, output_dir, progress_callback)
+
+    def process_input(self, df_horas: pd.DataFrame, df_total: pd.DataFrame, progress_callback=None) -> pd.DataFrame:
+        """
+        Validación, cruce, prorrateo y conciliación de HORAS y TOTAL ya tipados;
+        deja el reporte en ``report``. Lo comparten process_frames y process_file.
+        """
+        celdas = {hoja: df.attrs.pop(INVALID_CELLS, {}) for hoja, df in (('HORAS', df_horas), ('TOTAL', df_total))}
+        self.prepare_input(df_horas, df_total)
+        datos = self.process_data(df_horas, df_total, progress_callback)
+        with self.timed('conciliacion'):
+            self.reconcile(df_total, datos)
+        self.report = self.validation_report(datos, celdas)
+        return datos
+
+    def validation_report(self, datos: pd.DataFrame, celdas=None) -> dict:
+        """
+        Reporte de validación: RUT inválidos o sin pareja, celdas no numéricas
+        leídas como 0 (por hoja y columna), docentes sobre el máximo de horas y
+        diferencias de la conciliación.
+        """
+        exceso = datos.loc[datos['TOTAL HORAS POR DOCENTE'] > MAX_HOURS, ['Rut', 'Nombre', 'TOTAL HORAS POR DOCENTE']]
+        return {
+            'ruts': dict(self.rut_report or {}),
+            'celdas_invalidas': {hoja: valores for hoja, valores in (celdas or {}).items() if valores},
+            'exceso_horas': exceso.drop_duplicates(['Rut', 'Nombre']).reset_index(drop=True),
+            'conciliacion': self.reconciliation,
+        }
+
+    def merge_keys(self) -> list:
+        """Columnas que identifican al docente en el cruce: el Rut y, en el modo panel, el periodo."""
+        return [self.period_column, 'Rut'] if self.period_column else ['Rut']
+
+    def key_index(self, df: pd.DataFrame) -> pd.Index:
+        """Claves del cruce de cada fila (un MultiIndex en el modo panel)."""
+        claves = self.merge_keys()
+        return pd.MultiIndex.from_frame(df[claves]) if len(claves) > 1 else pd.Index(df['Rut'])
+
+    def combine_data(self, df_horas: pd.DataFrame, df_total: pd.DataFrame, progress_callback=None) -> pd.DataFrame:
+        """Etapas independientes por docente: agregar horas, cruzar HORAS con TOTAL y prorratear."""
+        raise NotImplementedError
+
+    def finalize_data(self, datos: pd.DataFrame, progress_callback=None) -> pd.DataFrame:
+        """Etapas sobre el resultado completo (limpieza final, orden y validaciones)."""
+        return datos
+
+    def run_stages(self, df_horas: pd.DataFrame, df_total: pd.DataFrame, progress_callback=None) -> pd.DataFrame:
+        """
+        Ejecuta las etapas, repartiendo combine_data en procesos si ``partitions`` > 1.
+        """
+        if self.engine != 'pandas':
+            raise ValueError(f"El motor {self.engine} solo está disponible para duplicados")
+        with self.timed('cruce'):
+            if self.partitions and self.partitions > 1:
+                from processors.parallel import combine_partitioned
+                datos = combine_partitioned(self, df_horas, df_total, progress_callback)
+            else:
+                datos = self.combine_data(df_horas, df_total, progress_callback)
+        with self.timed('ajuste'):
+            return self.finalize_data(datos, progress_callback)
+
+    def prorate_sources(self) -> list:
+        """Columnas de TOTAL que el procesador prorratea."""
+        return []
+
+    def prorated_columns(self, datos: pd.DataFrame) -> list:
+        return [col for col in datos.columns if str(col).endswith(self.PRORATED_SUFFIXES)]
+
+    def check_proration(self) -> str:
+        if self.proration not in PRORATION_MODES:
+            raise ValueError(
+                f"Modo de prorrateo no reconocido: {self.proration} "
+                f"(opciones: {', '.join(PRORATION_MODES)})"
+            )
+        return self.proration
+
+    def exact_proration(self) -> bool:
+        return self.check_proration() == 'exacto'
+
+    def check_output_profile(self) -> str:
+        if self.output_profile not in OUTPUT_PROFILES:
+            raise ValueError(
+                f"Perfil de salida no reconocido: {self.output_profile} "
+                f"(opciones: {', '.join(OUTPUT_PROFILES)})"
+            )
+        return self.output_profile
+
+    def total_usecols(self):
+        """
+        Filtro de columnas para leer TOTAL: salvo en el perfil completo, solo se
+        cargan el Rut y las columnas que se prorratean.
+        """
+        if self.check_output_profile() == 'completo':
+            return None
+        fuentes = set(self.prorate_sources())
+        return lambda col: col in fuentes or str(col).strip().lower() == 'rut'
+
+    def select_output(self, datos: pd.DataFrame) -> pd.DataFrame:
+        """Deja solo las columnas del perfil de salida elegido."""
+        perfil = self.check_output_profile()
+        if perfil == 'completo':
+            return datos
+        prorrateadas = self.prorated_columns(datos)
+        base = [col for col in KEY_COLUMNS + self.HOURS_COLUMNS + ('TOTAL HORAS POR DOCENTE',)
+                if col in datos.columns]
+        if perfil == 'prorrateo':
+            return datos[base + prorrateadas]
+        if perfil == 'resumen':
+            claves = [col for col in KEY_COLUMNS if col in datos.columns]
+            agregados = {col: 'sum' for col in base + prorrateadas if col not in claves}
+            if 'TOTAL HORAS POR DOCENTE' in agregados:
+                agregados['TOTAL HORAS POR DOCENTE'] = 'first'
+            return datos.groupby(claves, dropna=False).agg(agregados).reset_index()
+        # Auditoría: cada columna de origen seguida de sus montos prorrateados
+        columnas = base + [col for col in self.AUX_COLUMNS if col in datos.columns]
+        presentes = set(prorrateadas)
+        for fuente in self.prorate_sources():
+            partes = [f"{fuente}{sufijo}" for sufijo in self.PRORATED_SUFFIXES]
+            partes = [col for col in partes if col in presentes]
+            if partes:
+                columnas += [fuente] + partes
+        return datos[list(dict.fromkeys(columnas))]
+
+    def reconcile(self, df_total: pd.DataFrame, datos: pd.DataFrame, tolerancia: float = 0) -> pd.DataFrame:
+        """
+        Compara, por docente y columna, la suma de los montos prorrateados con el
+        monto de origen en TOTAL (solo docentes con horas). Devuelve solo las
+        diferencias mayores que ``tolerancia`` (por redondeo suelen ser de pocos pesos).
+        """
+        fuentes = {}
+        for fuente in dict.fromkeys(self.prorate_sources()):
+            partes = [f"{fuente}{sufijo}" for sufijo in self.PRORATED_SUFFIXES if f"{fuente}{sufijo}" in datos.columns]
+            if partes and fuente in df_total.columns:
+                fuentes[fuente] = partes
+        if not fuentes:
+            self.reconciliation = pd.DataFrame(columns=RECONCILIATION_COLUMNS)
+            return self.reconciliation
+
+        columnas = [col for partes in fuentes.values() for col in partes]
+        con_horas = datos['TOTAL HORAS POR DOCENTE'].to_numpy(dtype=np.float64, na_value=0) > 0
+        con_horas &= datos['Rut'].notna().to_numpy()
+        # Un código por docente con horas (ordenados por Rut); -1 en el resto de las filas
+        codigos = np.full(len(datos), -1, dtype=np.intp)
+        codigos_con_horas, ruts = pd.factorize(self.key_index(datos)[con_horas], sort=True)
+        codigos[con_horas] = codigos_con_horas
+        ruts = ruts.set_names(self.merge_keys())
+        # Matriz 0/1 que suma las partes de cada columna de origen (p. ej. " PIE" + " SN")
+        suma_partes = np.zeros((len(columnas), len(fuentes)))
+        suma_partes[np.arange(len(columnas)), np.repeat(np.arange(len(fuentes)), [len(p) for p in fuentes.values()])] = 1
+        prorrateado = np.column_stack(
+            [group_sums(datos[col], codigos, len(ruts)) for col in columnas]
+        ) @ suma_partes
+
+        codigos_total = ruts.get_indexer(self.key_index(df_total))
+        origen = np.column_stack([group_sums(df_total[col], codigos_total, len(ruts)) for col in fuentes])
+        nombres_docentes = datos['Nombre'][codigos >= 0].groupby(codigos[codigos >= 0]).first()
+        diferencia = prorrateado - origen
+        filas, cols = np.nonzero(np.abs(diferencia) > tolerancia)
+
+        nombres = np.asarray(list(fuentes), dtype=object)
+        tabla = ruts.to_frame(index=False).iloc[filas].reset_index(drop=True).assign(**{
+            'Nombre': nombres_docentes.reindex(range(len(ruts))).to_numpy()[filas],
+            'COLUMNA': nombres[cols],
+            'MONTO ORIGEN': origen[filas, cols],
+            'MONTO PRORRATEADO': prorrateado[filas, cols],
+            'DIFERENCIA': diferencia[filas, cols],
+        })
+        self.reconciliation = tabla
+        if tabla.empty:
+            logging.info(f"Conciliación: los montos prorrateados cuadran con TOTAL ({len(ruts)} docentes)")
+        else:
+            detalle = tabla.reindex(tabla['DIFERENCIA'].abs().sort_values(ascending=False).index).head(MAX_LOG_ITEMS)
+            self.log_summary(
+                f"Conciliación: {len(tabla)} diferencia(s) en {tabla['Rut'].nunique()} de {len(ruts)} docentes "
+                f"(máxima {tabla['DIFERENCIA'].abs().max():.0f}):",
+                detalle['Rut'].astype(str) + " " + detalle['COLUMNA'] + ": origen " + detalle['MONTO ORIGEN'].map('{:.0f}'.format)
+                + ", prorrateado " + detalle['MONTO PRORRATEADO'].map('{:.0f}'.format),
+                total=len(tabla), level=logging.INFO
+            )
+        return tabla
+
+    def save_reconciliation(self) -> None:
+        """Guarda la tabla de la última conciliación en ``reconciliation_path``, si se indicó."""
+        if not self.reconciliation_path or self.reconciliation is None:
+            return
+        ruta = Path(self.reconciliation_path)
+        if ruta.suffix.lower() == '.csv':
+            self.reconciliation.to_csv(ruta, index=False, encoding='utf-8-sig')
+        else:
+            self.reconciliation.to_excel(str(ruta), index=False, engine='openpyxl')
+        logging.info(f"Conciliación guardada en {ruta}")
+
+    def prorate_columns(self, df: pd.DataFrame, columnas, horas_totales, pesos, grupos=None):
+        """
+        Prorratea las columnas de montos según las horas.
+
+        ``pesos`` es una lista de ``(formato_nombre, horas)``; para cada columna se
+        genera el par ``(formato_nombre.format(columna), valores)`` con
+        ``round(monto / horas_totales * horas)`` (0 si no hay horas), en el mismo
+        orden en que se calculaban una a una. Los temporales son vectores
+        reutilizados, por lo que no se copia el DataFrame completo. En las columnas
+        dispersas solo se calculan las filas distintas de 0 y el resultado
+        también queda disperso.
+
+        En el modo ``exacto`` ``grupos`` indica la fila de TOTAL de origen de cada
+        fila (ver fixedpoint.merge_rows) y el reparto es entero y por resto mayor.
+        """
+        if self.exact_proration():
+            yield from self._prorate_exact(df, columnas, horas_totales, grupos, pesos)
+            return
+        totales = np.asarray(horas_totales, dtype=np.float64)
+        horas = [(formato, np.asarray(h, dtype=np.float64)) for formato, h in pesos]
+        valor_hora = np.empty(len(df), dtype=np.float64)
+        for col in dict.fromkeys(columnas):
+            if is_sparse(df[col]):
+                yield from self._prorate_sparse(df[col].array, col, totales, horas)
+                continue
+            try:
+                montos = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            except (TypeError, ValueError) as e:
+                logging.warning(f"Error calculando columna {col}: {str(e)}")
+                continue
+            with np.errstate(divide='ignore', invalid='ignore'):
+                np.divide(montos, totales, out=valor_hora)
+            valor_hora[~np.isfinite(valor_hora)] = 0
+            for formato, h in horas:
+                valores = np.round(valor_hora * h)
+                np.nan_to_num(valores, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+                yield formato.format(col), valores.astype(np.int64)
+
+    @staticmethod
+    def _prorate_sparse(montos: pd.arrays.SparseArray, col, totales, horas):
+        """Prorrateo de una columna dispersa: las filas en 0 siguen en 0 sin calcularlas."""
+        filas = montos.sp_index.indices
+        with np.errstate(divide='ignore', invalid='ignore'):
+            valor_hora = montos.sp_values.astype(np.float64) / totales[filas]
+        valor_hora[~np.isfinite(valor_hora)] = 0
+        for formato, h in horas:
+            valores = np.round(valor_hora * h[filas])
+            np.nan_to_num(valores, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+            yield formato.format(col), pd.arrays.SparseArray(
+                valores.astype(np.int64), sparse_index=montos.sp_index, fill_value=0
+            )
+
+    @staticmethod
+    def _prorate_exact(df: pd.DataFrame, columnas, horas_totales, grupos, pesos):
+        """
+        Prorrateo entero por resto mayor: las partes de cada fila de TOTAL suman su
+        monto. Como en el redondeo, las filas sin horas totales no reciben monto.
+        """
+        if grupos is None:
+            raise ValueError("El prorrateo exacto requiere la fila de TOTAL de cada fila cruzada")
+        con_horas = np.asarray(horas_totales, dtype=np.float64) > 0
+        repartidor = ExactSplitter(grupos, [hour_weights(h) * con_horas for _, h in pesos])
+        for col in dict.fromkeys(columnas):
+            montos = df[col]
+            if is_sparse(montos):
+                filas = montos.array.sp_index.indices
+                partes = repartidor.split(montos.array.sp_values, filas)
+                for j, (formato, _) in enumerate(pesos):
+                    yield formato.format(col), pd.arrays.SparseArray(
+                        partes[:, j], sparse_index=montos.array.sp_index, fill_value=0
+                    )
+                continue
+            try:
+                montos = montos.to_numpy() if montos.dtype.kind in 'iu' else montos.to_numpy(dtype=np.float64, na_value=0)
+            except (TypeError, ValueError) as e:
+                logging.warning(f"Error calculando columna {col}: {str(e)}")
+                continue
+            partes = repartidor.split(montos)
+            for j, (formato, _) in enumerate(pesos):
+                yield formato.format(col), partes[:, j]
+
+    def insert_columns(self, df: pd.DataFrame, columnas) -> pd.DataFrame:
+        """Agrega de una vez los pares ``(nombre, valores)`` sin fragmentar el DataFrame."""
+        nuevas = dict(columnas)
+        for nombre in [col for col in nuevas if col in df.columns]:
+            df[nombre] = nuevas.pop(nombre)
+        return pd.concat([df, pd.DataFrame(nuevas, index=df.index)], axis=1)
+
     def verify_file(self, file_path: Path):
         """Alias de validación de archivo."""
         self.validate_file(file_path)
     
-    def safe_save(self, data: pd.DataFrame, output_path: Path) -> None:
-        """Guarda el archivo con reintentos en caso de error de permisos."""
-        for attempt in range(3):
-            try:
-                data.to_excel(str(output_path), index=False, engine='openpyxl')
-                return
-            except PermissionError:
-                if attempt == 2:
-                    if sys.platform == 'win32':
-                        message = "El archivo está siendo utilizado por otro programa. Ciérrelo e intente nuevamente."
-                    else:
-                        message = "Error de permisos al acceder al archivo."
-                    raise PermissionError(message)
-                time.sleep(1)
+    def check_input_readable(self, file_path: Path) -> None:
+        """Falla de inmediato (sin reintentos) si el archivo de entrada no se puede abrir."""
+        try:
+            for path in self.input_files(file_path):
+                with open(path, 'rb'):
+                    pass
+        except PermissionError:
+            if sys.platform == 'win32':
+                message = "El archivo de entrada está siendo utilizado por otro programa. Ciérrelo e intente nuevamente."
+            else:
+                message = "Error de permisos al acceder al archivo de entrada."
+            raise PermissionError(message)
+
+    def resolve_output_path(self, output_path: Path) -> Path:
+        """
+        Revisa antes de procesar si el destino está abierto (p. ej. en Excel); en ese
+        caso devuelve de inmediato un nombre alternativo libre.
+        """
+        output_path = Path(output_path)
+        if is_locked(output_path):
+            alternativa = alternative_path(output_path)
+            logging.warning(f"{output_path.name} está en uso; el resultado se guardará en {alternativa.name}")
+            return alternativa
+        return output_path
+
+    def atomic_write(self, output_path: Path, write) -> Path:
+        """Escribe el resultado con ``atomic_write`` y deja la ruta final en ``saved_path``."""
+        self.saved_path = atomic_write(output_path, write)
+        return self.saved_path
+
+    def save_output(self, datos: pd.DataFrame, output_path: Path, progress_callback=None) -> Path:
+        """
+        Aplica el perfil de salida y guarda el resultado; con ``shard_column`` se
+        escribe un archivo por valor de la columna y se devuelve el manifiesto.
+        """
+        # El libro se escribe celda a celda: las columnas dispersas se expanden una sola vez
+        datos = densify(datos)
+        self.result = self.select_output(datos)
+        if self.shard_column:
+            from processors.shards import write_shards
+            self.saved_path = write_shards(self, datos, output_path, progress_callback)
+            return self.saved_path
+        return self.safe_save(self.result, output_path)
+
+    def safe_save(self, data: pd.DataFrame, output_path: Path) -> Path:
+        """Guarda el DataFrame de forma atómica y devuelve la ruta donde quedó."""
+        return self.atomic_write(
+            output_path, lambda ruta: data.to_excel(ruta, index=False, engine='openpyxl')
+        )
+
+    def record_history(self, data: pd.DataFrame, programa: str, columnas, origen=None) -> None:
+        """Agrega los resultados al historial SQLite si está habilitado."""
+        if not self.history_path:
+            return
+        if not self.periodo:
+            raise ValueError("Debe indicar el periodo para guardar el historial")
+        from core.history import HistoryStore
+        with HistoryStore(self.history_path) as store:
+            filas = store.append(densify(data), self.periodo, programa, columnas, origen)
+        logging.info(f"Historial {programa} {self.periodo}: {filas} montos guardados en {self.history_path}")
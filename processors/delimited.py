@@ -0,0 +1,208 @@
+"""
+Lectura de HORAS y TOTAL exportadas como texto delimitado (CSV/TSV).
+
+Con pyarrow instalado se usa su lector CSV columnar y multihilo; si no, el
+lector en C de pandas. La codificación, el separador de campos y el separador
+decimal se indican de forma explícita, y las columnas reciben los mismos tipos
+que al leer el libro Excel (ver processors.reader). Las dos hojas se leen a la
+vez.
+"""
+
+import csv
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from processors.reader import (
+    HOURS, INVALID_CELLS, KEY, MONEY, SheetSchema, _as_integers, _as_keys, _header_names, _log_invalid,
+    _to_number
+)
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+
+TEXT_SUFFIXES = ('.csv', '.tsv', '.txt')
+SHEET_NAMES = ('HORAS', 'TOTAL')
+# utf-8-sig también lee UTF-8 sin BOM; las exportaciones antiguas suelen venir en cp1252
+DEFAULT_ENCODING = 'utf-8-sig'
+DEFAULT_DECIMAL = ','
+# Separadores que se prueban en el encabezado si no se indica uno
+DELIMITERS = (';', '\t', ',', '|')
+
+
+def is_text_file(path) -> bool:
+    return Path(path).suffix.lower() in TEXT_SUFFIXES
+
+
+def _sheet_of(path: Path):
+    nombre = path.stem.upper()
+    hojas = [hoja for hoja in SHEET_NAMES if hoja in nombre]
+    return hojas[0] if len(hojas) == 1 else None
+
+
+def text_sources(source):
+    """
+    Archivos de texto de HORAS y TOTAL de una entrada: una carpeta con un archivo
+    de cada uno (p. ej. ``HORAS.csv`` y ``TOTAL.csv``), uno de los dos archivos (el otro
+    se busca a su lado cambiando HORAS por TOTAL en el nombre, o al revés) o el
+    par de archivos. Devuelve None si la entrada es un libro Excel.
+    """
+    if isinstance(source, (list, tuple)):
+        if len(source) != 1:
+            return _pair(source)
+        source = source[0]
+    source = Path(source)
+    if source.is_dir():
+        candidatos = {}
+        for path in sorted(source.iterdir()):
+            if is_text_file(path) and _sheet_of(path):
+                candidatos.setdefault(_sheet_of(path), []).append(path)
+        faltan = [hoja for hoja in SHEET_NAMES if hoja not in candidatos]
+        if faltan:
+            raise ValueError(
+                f"La carpeta {source.name} no tiene el archivo de texto de {', '.join(faltan)} "
+                "(p. ej. HORAS.csv y TOTAL.csv)"
+            )
+        repetidas = [hoja for hoja, paths in candidatos.items() if len(paths) > 1]
+        if repetidas:
+            raise ValueError(f"La carpeta {source.name} tiene más de un archivo de {', '.join(repetidas)}")
+        return {hoja: paths[0] for hoja, paths in candidatos.items()}
+    if not is_text_file(source):
+        return None
+    hoja = _sheet_of(source)
+    if hoja is None:
+        raise ValueError(f"No se reconoce si {source.name} es HORAS o TOTAL: el nombre debe incluir una de las dos")
+    otra = 'TOTAL' if hoja == 'HORAS' else 'HORAS'
+    buscado = re.sub(hoja, otra, source.name, flags=re.IGNORECASE).lower()
+    pareja = next((p for p in source.parent.iterdir() if p.name.lower() == buscado), None)
+    if pareja is None:
+        raise FileNotFoundError(f"No se encontró el archivo de {otra} junto a {source.name}")
+    return {hoja: source, otra: pareja}
+
+
+def _pair(paths):
+    paths = [Path(p) for p in paths]
+    if len(paths) != 2 or not all(map(is_text_file, paths)):
+        raise ValueError("Se esperaba un libro Excel o un par de archivos de texto (HORAS y TOTAL).")
+    hojas = [_sheet_of(p) for p in paths]
+    if set(hojas) != set(SHEET_NAMES):
+        # Sin nombres reconocibles: primero HORAS y luego TOTAL
+        hojas = list(SHEET_NAMES)
+    return dict(zip(hojas, paths))
+
+
+def read_text_sheets(sources: dict, schemas: dict, encoding=DEFAULT_ENCODING, decimal=DEFAULT_DECIMAL,
+                     delimiter=None) -> dict:
+    """Lee en paralelo los archivos ``{hoja: ruta}`` con sus esquemas y devuelve ``{hoja: DataFrame}``."""
+    with ThreadPoolExecutor(max_workers=len(schemas)) as pool:
+        futuros = {
+            hoja: pool.submit(read_delimited, sources[hoja], schema, hoja, encoding, decimal, delimiter)
+            for hoja, schema in schemas.items()
+        }
+        return {hoja: futuro.result() for hoja, futuro in futuros.items()}
+
+
+def _detect_delimiter(path: Path, encabezado: str) -> str:
+    if path.suffix.lower() == '.tsv':
+        return '\t'
+    return max(DELIMITERS, key=encabezado.count) if any(d in encabezado for d in DELIMITERS) else ','
+
+
+def read_delimited(path, schema: SheetSchema = None, sheet_name=None, encoding=DEFAULT_ENCODING,
+                   decimal=DEFAULT_DECIMAL, delimiter=None) -> pd.DataFrame:
+    path = Path(path)
+    schema = schema or SheetSchema()
+    sheet_name = sheet_name or path.stem
+    with open(path, encoding=encoding, newline='') as file:
+        encabezado = file.readline()
+    delimiter = delimiter or _detect_delimiter(path, encabezado)
+    header = [valor if valor.strip() else None
+              for valor in next(csv.reader([encabezado.rstrip('\r\n')], delimiter=delimiter), [])]
+    if not header:
+        return pd.DataFrame()
+    # Todos los campos tienen nombre para leer; las columnas vacías al final se descartan
+    ancho = len(header)
+    while ancho and header[ancho - 1] is None:
+        ancho -= 1
+    nombres = _header_names(header)
+    columnas = [nombre for i, nombre in enumerate(nombres[:ancho]) if schema.selected(i, nombre)]
+    claves = [nombre for nombre in columnas if schema.kind(nombre) == KEY]
+
+    if pa is not None:
+        frame = _read_arrow(path, nombres, columnas, claves, encoding, decimal, delimiter)
+    else:
+        frame = pd.read_csv(
+            path, sep=delimiter, encoding=encoding, decimal=decimal,
+            thousands='.' if decimal == ',' else None,
+            header=None, skiprows=1, names=nombres, usecols=columnas,
+            dtype={nombre: str for nombre in claves}, engine='c',
+        )[columnas]
+    return _coerce(frame.dropna(how='all').reset_index(drop=True), schema, sheet_name, decimal)
+
+
+def apply_schema(frame: pd.DataFrame, schema: SheetSchema, sheet_name: str, decimal=DEFAULT_DECIMAL) -> pd.DataFrame:
+    """
+    Aplica el esquema a una hoja ya cargada en memoria (con las columnas de la hoja):
+    selecciona las columnas y les da los mismos tipos que al leer el archivo. Devuelve
+    un DataFrame nuevo; ``frame`` no se modifica.
+    """
+    columnas = [nombre for i, nombre in enumerate(frame.columns) if schema.selected(i, nombre)]
+    return _coerce(frame[columnas].dropna(how='all').reset_index(drop=True), schema, sheet_name, decimal)
+
+
+def _coerce(frame: pd.DataFrame, schema: SheetSchema, sheet_name: str, decimal: str) -> pd.DataFrame:
+    """Horas y montos numéricos (vacío = 0) y claves como texto, como en processors.reader."""
+    invalidos = {}
+    for nombre in frame.columns:
+        kind = schema.kind(nombre)
+        if kind in (HOURS, MONEY):
+            valores = _numeric(frame[nombre], nombre, decimal, invalidos)
+            frame[nombre] = _as_integers(valores, np.int64 if kind == MONEY else np.int16)
+        elif kind == KEY:
+            frame[nombre] = _as_keys(frame[nombre].to_numpy(dtype=object))
+    _log_invalid(sheet_name, invalidos)
+    if invalidos:
+        frame.attrs[INVALID_CELLS] = invalidos
+    return frame
+
+
+def _read_arrow(path, nombres, columnas, claves, encoding, decimal, delimiter) -> pd.DataFrame:
+    tabla = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(
+            encoding=encoding, use_threads=True, skip_rows=1, column_names=nombres
+        ),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(
+            decimal_point=decimal, include_columns=columnas, strings_can_be_null=True,
+            column_types={nombre: pa.string() for nombre in claves},
+        ),
+    )
+    return tabla.to_pandas()
+
+
+def _numeric(columna: pd.Series, nombre, decimal: str, invalidos: dict) -> np.ndarray:
+    """Columna como float64 con vacíos en 0; el texto se convierte según el separador decimal."""
+    if pd.api.types.is_numeric_dtype(columna):
+        return columna.to_numpy(dtype=np.float64, na_value=0.0)
+    valores = np.zeros(len(columna), dtype=np.float64)
+    for i, valor in enumerate(columna.to_numpy(dtype=object)):
+        if valor is None or valor != valor:
+            continue
+        if isinstance(valor, (int, float)):
+            numero = valor
+        elif decimal == ',':
+            numero = _to_number(valor)
+        else:
+            numero = _to_number(str(valor).replace(',', '').replace('.', ','))
+        if numero is None:
+            invalidos.setdefault(nombre, []).append(valor)
+            numero = 0.0
+        valores[i] = numero
+    return valores
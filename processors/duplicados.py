@@ -1,30 +1,84 @@
 import sys
-import time
+import math
+import heapq
+import pickle
 import logging
+import tempfile
+from numbers import Number
+from operator import itemgetter
 import pandas as pd
-import numpy as np
+import openpyxl
 from pathlib import Path
-from processors.base import BaseProcessor
+from processors.base import BaseProcessor, as_frame
+from processors.reader import read_sheet
+from processors.rut import normalize_ruts
+
+# Consolidación de N archivos: filas leídas por bloque y filas por lote volcado a disco
+CHUNK_ROWS = 50000
+SPILL_BATCH = 1000
+ORIGIN_COLUMN = 'ARCHIVOS_ORIGEN'
+
+
+# Clave de orden de las filas sin clave DUPLICADOS (van al final)
+_BLANK_KEY = (2, 0, '')
+
+
+def _sort_key(key):
+    """Orden total para claves mixtas: números, luego texto y al final vacíos."""
+    if key is None or (isinstance(key, float) and math.isnan(key)):
+        return _BLANK_KEY
+    if isinstance(key, Number) and not isinstance(key, bool):
+        return (0, key, '')
+    return (1, 0, str(key))
+
+
+def _add(a, b):
+    """Suma dos celdas tratando vacíos como 0; si alguna no es numérica conserva la primera."""
+    if b is None:
+        return a
+    if a is None:
+        return b
+    if isinstance(a, Number) and isinstance(b, Number):
+        return a + b
+    return a
+
+
+def _read_run(path):
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
 
 class DuplicadosProcessor(BaseProcessor):
     """
     Procesador para consolidar registros duplicados.
     Este processor utiliza dos archivos de entrada (por ejemplo, uno principal y
     otro complementario, aunque en este ejemplo se procesa únicamente el primero).
+    Con ``process_files`` consolida cualquier cantidad de archivos por la clave
+    DUPLICADOS mediante una mezcla ordenada de k vías con memoria acotada.
     """
+
+    # Consolidar todos los archivos de entrada (process_files) en vez de solo el primero
+    consolidate_all = False
+
     def process_file(self, input_path1: Path, input_path2: Path, output_path: Path, progress_callback):
         try:
             progress_callback(0, "Iniciando proceso de duplicados...")
             # Cargar el primer archivo (por ejemplo, el consolidado principal)
             progress_callback(10, "Cargando primer archivo...")
             
-            # Verificar archivos de entrada
+            # Verificar archivos de entrada y que el destino no esté abierto
             self.verify_file(input_path1)
             self.verify_file(input_path2)
+            output_path = self.resolve_output_path(output_path)
             
             # Intentar cargar los archivos con manejo de errores
             try:
-                df = pd.read_excel(str(input_path1), sheet_name='Hoja1', engine='openpyxl')
+                with self.timed('lectura'):
+                    df = read_sheet(input_path1, 'Hoja1')
             except PermissionError:
                 if sys.platform == 'win32':
                     raise PermissionError("El primer archivo está siendo utilizado por otro programa. Ciérrelo e intente nuevamente.")
@@ -36,7 +90,8 @@ class DuplicadosProcessor(BaseProcessor):
             # Si se requiere utilizar el segundo archivo, se puede cargar y usar sus datos.
             progress_callback(20, "Cargando segundo archivo...")
             try:
-                df_extra = pd.read_excel(str(input_path2), sheet_name='Hoja1', engine='openpyxl')
+                with self.timed('lectura'):
+                    df_extra = read_sheet(input_path2, 'Hoja1')
             except PermissionError:
                 if sys.platform == 'win32':
                     raise PermissionError("El segundo archivo está siendo utilizado por otro programa. Ciérrelo e intente nuevamente.")
@@ -45,67 +100,298 @@ class DuplicadosProcessor(BaseProcessor):
             except Exception as e:
                 raise ValueError(f"Error al leer el segundo archivo: {str(e)}")
             
+            self.input_shape = df.shape
+
             # Aquí podrías, por ejemplo, usar información de df_extra para algún cruce
             # En este ejemplo simplemente se continua con el procesamiento en df
-            
-            progress_callback(30, "Detectando duplicados...")
-            
-            # Verificar que exista la columna 'DUPLICADOS'
-            if 'DUPLICADOS' not in df.columns:
-                raise ValueError("La columna 'DUPLICADOS' no existe en el archivo. Verifique la estructura del archivo.")
-            
-            # Determinar las filas duplicadas basadas en la columna 'DUPLICADOS'
-            duplicados = df.duplicated(subset=['DUPLICADOS'], keep=False)
-            df_duplicados = df[duplicados]
-            
-            # Verificar si hay duplicados
-            if df_duplicados.empty:
-                logging.info("No se encontraron registros duplicados")
-                progress_callback(40, "No se encontraron duplicados, preparando archivo...")
-            else:
-                num_duplicados = len(df_duplicados)
-                logging.info(f"Se encontraron {num_duplicados} registros duplicados")
-                progress_callback(40, f"Calculando suma de columnas para {num_duplicados} duplicados...")
-                
-                # Asumimos que las columnas de interés a sumar son desde la 17ª columna en adelante
-                # Verificar que haya suficientes columnas
-                if len(df.columns) < 17:
-                    logging.warning("El archivo tiene menos de 17 columnas, se usarán todas las columnas numéricas")
-                    columnas_suma = df.select_dtypes(include=['number']).columns.tolist()
-                    if 'DUPLICADOS' in columnas_suma:
-                        columnas_suma.remove('DUPLICADOS')
-                else:
-                    columnas_suma = df.columns[16:]
-                
-                # Agrupar y sumar
-                try:
-                    df_suma = df_duplicados.groupby('DUPLICADOS')[columnas_suma].sum().reset_index()
-                except Exception as e:
-                    logging.error(f"Error al agrupar duplicados: {str(e)}")
-                    raise ValueError(f"Error al procesar duplicados: {str(e)}")
-
-                progress_callback(50, "Actualizando registros duplicados...")
-                # Actualizar cada grupo de duplicados con la suma correspondiente
-                for _, row in df_suma.iterrows():
-                    df.loc[df['DUPLICADOS'] == row['DUPLICADOS'], columnas_suma] = row[columnas_suma].values
-
-                progress_callback(60, "Eliminando duplicados adicionales...")
-                # Eliminar las filas duplicadas dejando solo la primera aparición
-                num_antes = len(df)
-                df.drop_duplicates(subset=['DUPLICADOS'], keep='first', inplace=True)
-                num_despues = len(df)
-                logging.info(f"Se eliminaron {num_antes - num_despues} filas duplicadas")
-
-            progress_callback(70, "Ordenando datos...")
-            # Ordenar el DataFrame según la columna 'DUPLICADOS' (u otro criterio)
-            df.sort_values(by='DUPLICADOS', inplace=True)
-
-            progress_callback(80, "Guardando resultado final...")
-            # Usar el método safe_save en lugar de to_excel directamente
-            self.safe_save(df, output_path)
-            
-            progress_callback(100, f"Proceso de duplicados completado! Archivo guardado en {output_path}")
-            return True
+            df = self.consolidate(df, progress_callback)
+            return self._save_result(df, output_path, progress_callback)
         except Exception as e:
             logging.error(f"Error en DuplicadosProcessor: {str(e)}", exc_info=True)
-            raise
\ No newline at end of file
+            raise
+
+    def process_frame(self, tabla, progress_callback=None):
+        """
+        Consolida una hoja ya cargada en memoria (DataFrame o tabla Arrow, con la
+        columna DUPLICADOS) sin leer ni escribir archivos y sin modificar la entrada.
+        Devuelve el resultado y el reporte de validación.
+        """
+        df = self.consolidate(as_frame(tabla), progress_callback)
+        self.result = df
+        return df, self.report
+
+    def consolidate(self, df, progress_callback=None):
+        """
+        Suma las columnas de montos de las filas con la misma clave DUPLICADOS, deja
+        la primera de cada clave y ordena por la clave (modifica ``df``). Deja en
+        ``report`` las claves con dígito verificador inválido y las filas consolidadas.
+        """
+        progress_callback = progress_callback or (lambda value, message: None)
+        progress_callback(30, "Detectando duplicados...")
+
+        # Verificar que exista la columna 'DUPLICADOS'
+        if 'DUPLICADOS' not in df.columns:
+            raise ValueError("La columna 'DUPLICADOS' no existe en el archivo. Verifique la estructura del archivo.")
+
+        # Canonizar las claves con forma de RUT para que '12.345.678-5' y '12345678-5' coincidan
+        invalidas = self.normalize_duplicate_keys(df)
+        # Determinar las filas duplicadas basadas en la columna 'DUPLICADOS'
+        duplicados = df.duplicated(subset=['DUPLICADOS'], keep=False)
+        num_antes = len(df)
+        self._log_blank_keys(int(df['DUPLICADOS'].isna().sum()))
+
+        if self.engine != 'pandas' and self._polars_ready(df):
+            from processors.polars_engine import consolidate_duplicates
+            progress_callback(40, "Consolidando duplicados...")
+            with self.timed('cruce'):
+                df = consolidate_duplicates(df, self.sum_columns(df))
+        else:
+            df = self._consolidate_pandas(df, duplicados, progress_callback)
+        self.report = {
+            'claves_invalidas': invalidas,
+            'registros_duplicados': int(duplicados.sum()),
+            'filas_eliminadas': num_antes - len(df),
+        }
+        return df
+
+    @staticmethod
+    def _log_blank_keys(vacias: int) -> None:
+        """Las filas sin clave no se consolidan: se conserva la primera, sin sumar, y se descarta el resto."""
+        if vacias > 1:
+            logging.warning(f"{vacias} filas no tienen clave DUPLICADOS: se conserva solo la primera "
+                            f"(sin sumar) y se descartan {vacias - 1}")
+
+    def _consolidate_pandas(self, df, duplicados, progress_callback):
+        df_duplicados = df[duplicados]
+
+        # Verificar si hay duplicados
+        if df_duplicados.empty:
+            logging.info("No se encontraron registros duplicados")
+            progress_callback(40, "No se encontraron duplicados, preparando archivo...")
+        else:
+            num_duplicados = len(df_duplicados)
+            logging.info(f"Se encontraron {num_duplicados} registros duplicados")
+            progress_callback(40, f"Calculando suma de columnas para {num_duplicados} duplicados...")
+
+            columnas_suma = self.sum_columns(df)
+
+            # Agrupar y sumar
+            try:
+                df_suma = df_duplicados.groupby('DUPLICADOS')[columnas_suma].sum().reset_index()
+            except Exception as e:
+                logging.error(f"Error al agrupar duplicados: {str(e)}")
+                raise ValueError(f"Error al procesar duplicados: {str(e)}")
+
+            progress_callback(50, "Actualizando registros duplicados...")
+            # Actualizar cada grupo de duplicados con la suma correspondiente
+            for _, row in df_suma.iterrows():
+                df.loc[df['DUPLICADOS'] == row['DUPLICADOS'], columnas_suma] = row[columnas_suma].values
+
+            progress_callback(60, "Eliminando duplicados adicionales...")
+            # Eliminar las filas duplicadas dejando solo la primera aparición
+            num_antes = len(df)
+            df.drop_duplicates(subset=['DUPLICADOS'], keep='first', inplace=True)
+            num_despues = len(df)
+            logging.info(f"Se eliminaron {num_antes - num_despues} filas duplicadas")
+
+        progress_callback(70, "Ordenando datos...")
+        # Ordenar el DataFrame según la columna 'DUPLICADOS' (u otro criterio)
+        df.sort_values(by='DUPLICADOS', inplace=True)
+        return df
+
+    def _save_result(self, df, output_path: Path, progress_callback):
+        progress_callback(80, "Guardando resultado final...")
+        # Usar el método safe_save en lugar de to_excel directamente
+        self.result = df
+        with self.timed('escritura'):
+            output_path = self.safe_save(df, output_path)
+        progress_callback(100, f"Proceso de duplicados completado! Archivo guardado en {output_path}")
+        return True
+
+    def sum_columns(self, df) -> list:
+        """Columnas que se suman en las claves repetidas: desde la 17ª, o las numéricas si hay menos."""
+        if len(df.columns) < 17:
+            logging.warning("El archivo tiene menos de 17 columnas, se usarán todas las columnas numéricas")
+            return [col for col in df.select_dtypes(include=['number']).columns if col != 'DUPLICADOS']
+        return list(df.columns[16:])
+
+    def _polars_ready(self, df) -> bool:
+        """El motor polars suma solo columnas numéricas; con texto en ellas se usa pandas."""
+        from processors.polars_engine import check_engine
+        check_engine(self.engine)
+        columnas = df.columns[16:] if len(df.columns) >= 17 else []
+        texto = [col for col in columnas if not pd.api.types.is_numeric_dtype(df[col])]
+        if texto:
+            logging.info(f"Motor polars: {len(texto)} columna(s) a sumar no son numéricas, se usa pandas")
+        return not texto
+
+    def normalize_duplicate_keys(self, df):
+        """Canoniza en bloque las claves DUPLICADOS que son RUT válidos; el resto solo se recorta."""
+        claves = df['DUPLICADOS']
+        if pd.api.types.is_numeric_dtype(claves):
+            return []
+        normalizados, es_rut, valido = normalize_ruts(claves)
+        recortadas = claves.where(claves.isna(), claves.astype(str).str.strip())
+        df['DUPLICADOS'] = normalizados.where(valido, recortadas)
+        invalidos = recortadas[es_rut & ~valido].unique()
+        if len(invalidos):
+            self.log_summary(
+                f"{len(invalidos)} clave(s) DUPLICADOS con forma de RUT tienen dígito verificador inválido:",
+                invalidos, total=len(invalidos)
+            )
+        return list(invalidos)
+
+    def process_files(self, input_paths, output_path: Path, progress_callback):
+        """
+        Consolida la hoja 'Hoja1' de varios archivos por la clave DUPLICADOS.
+
+        Cada archivo se lee por bloques, cada bloque se ordena por clave y se vuelca
+        a disco; luego una mezcla de k vías agrupa las claves iguales sumando las
+        columnas de montos (desde la 17ª, o las numéricas si hay menos de 17) y
+        conservando el primer valor del resto. La columna ARCHIVOS_ORIGEN indica de
+        qué archivos proviene cada fila.
+        """
+        try:
+            input_paths = [Path(p) for p in input_paths]
+            if not input_paths:
+                raise ValueError("Debe indicar al menos un archivo de entrada.")
+            for path in input_paths:
+                self.verify_file(path)
+            output_path = self.resolve_output_path(output_path)
+            progress_callback(0, f"Consolidando {len(input_paths)} archivos...")
+            columnas, columnas_suma = [], set()
+            with tempfile.TemporaryDirectory(prefix='remupro_duplicados_') as temp_dir:
+                runs = []
+                filas_leidas = 0
+                with self.timed('lectura'):
+                    for i, path in enumerate(input_paths):
+                        progress_callback(int(60 * i / len(input_paths)), f"Leyendo {path.name}...")
+                        for header, chunk, suma in self._iter_sorted_chunks(path, i):
+                            for col in header:
+                                if col not in columnas:
+                                    columnas.append(col)
+                            columnas_suma.update(suma)
+                            run_path = Path(temp_dir) / f"run_{len(runs)}.pkl"
+                            with open(run_path, 'wb') as f:
+                                for start in range(0, len(chunk), SPILL_BATCH):
+                                    pickle.dump(chunk[start:start + SPILL_BATCH], f, protocol=pickle.HIGHEST_PROTOCOL)
+                            filas_leidas += len(chunk)
+                            runs.append(run_path)
+                            del chunk
+                self.input_shape = (filas_leidas, len(columnas))
+                progress_callback(60, "Mezclando archivos por clave DUPLICADOS...")
+                nombres = [path.name for path in input_paths]
+                with self.timed('mezcla'):
+                    filas_salida = self._write_merged(
+                        (_read_run(run) for run in runs), columnas, columnas_suma, nombres, output_path
+                    )
+                output_path = self.saved_path
+            logging.info(
+                f"Consolidación: {filas_leidas} filas de {len(input_paths)} archivos "
+                f"-> {filas_salida} claves DUPLICADOS únicas"
+            )
+            progress_callback(100, f"Consolidación completada! Archivo guardado en {output_path}")
+            return True
+        except Exception as e:
+            logging.error(f"Error en DuplicadosProcessor (consolidación): {str(e)}", exc_info=True)
+            raise
+
+    def _iter_sorted_chunks(self, path: Path, origen: int):
+        """Lee 'Hoja1' por bloques y entrega cada bloque como registros ordenados por clave."""
+        try:
+            wb = openpyxl.load_workbook(str(path), read_only=True, data_only=True)
+        except PermissionError:
+            raise PermissionError(f"El archivo {path.name} está siendo utilizado por otro programa. "
+                                  "Ciérrelo e intente nuevamente.")
+        try:
+            if 'Hoja1' not in wb.sheetnames:
+                raise ValueError(f"El archivo {path.name} no tiene la hoja 'Hoja1'.")
+            rows = wb['Hoja1'].iter_rows(values_only=True)
+            header = self._unique_header(next(rows, ()))
+            if 'DUPLICADOS' not in header:
+                raise ValueError(f"La columna 'DUPLICADOS' no existe en el archivo {path.name}. "
+                                 "Verifique la estructura del archivo.")
+            columnas_suma = None if len(header) < 17 else header[16:]
+            bloque = []
+            for row in rows:
+                if any(value is not None for value in row):
+                    bloque.append(row)
+                if len(bloque) == CHUNK_ROWS:
+                    registros, columnas_suma = self._sorted_chunk(header, bloque, columnas_suma, origen)
+                    bloque = []
+                    yield header, registros, columnas_suma
+            if bloque:
+                registros, columnas_suma = self._sorted_chunk(header, bloque, columnas_suma, origen)
+                yield header, registros, columnas_suma
+        finally:
+            wb.close()
+
+    def _sorted_chunk(self, header, bloque, columnas_suma, origen):
+        df = pd.DataFrame(bloque, columns=header)
+        if columnas_suma is None:
+            logging.warning("El archivo tiene menos de 17 columnas, se usarán todas las columnas numéricas")
+            columnas_suma = [col for col in df.select_dtypes(include=['number']).columns if col != 'DUPLICADOS']
+        self.normalize_duplicate_keys(df)
+        claves = df['DUPLICADOS'].tolist()
+        filas = [
+            {col: valor for col, valor in fila.items() if valor is not None}
+            for fila in df.astype(object).where(df.notna(), None).to_dict('records')
+        ]
+        registros = [(_sort_key(clave), clave, fila, origen) for clave, fila in zip(claves, filas)]
+        # sort() es estable: a igual clave se conserva el orden original de las filas
+        registros.sort(key=itemgetter(0))
+        return registros, columnas_suma
+
+    @staticmethod
+    def _unique_header(header):
+        """Nombres de columna únicos, igual que pandas ('X', 'X.1', ...)."""
+        vistos, resultado = {}, []
+        for i, col in enumerate(header):
+            col = f"Unnamed: {i}" if col is None else col
+            if col in vistos:
+                vistos[col] += 1
+                col = f"{col}.{vistos[col]}"
+            else:
+                vistos[col] = 0
+            resultado.append(col)
+        return resultado
+
+    def _write_merged(self, runs, columnas, columnas_suma, nombres, output_path: Path) -> int:
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet('Sheet1')
+        ws.append(columnas + [ORIGIN_COLUMN])
+        filas = 0
+
+        def emitir(actual):
+            fila = actual[2]
+            origenes = ', '.join(nombres[i] for i in sorted(actual[3]))
+            ws.append([fila.get(col) for col in columnas] + [origenes])
+
+        actual = None
+        vacias = 0
+        for sort_key, clave, fila, origen in heapq.merge(*runs, key=itemgetter(0)):
+            if sort_key == _BLANK_KEY:
+                # Como en el proceso de un archivo: las filas sin clave no se suman y
+                # solo queda la primera
+                vacias += 1
+                if vacias > 1:
+                    continue
+            if actual is not None and sort_key == actual[0]:
+                acumulado = actual[2]
+                for col, valor in fila.items():
+                    if col in columnas_suma:
+                        acumulado[col] = _add(acumulado.get(col), valor)
+                    elif acumulado.get(col) is None:
+                        acumulado[col] = valor
+                actual[3].add(origen)
+                continue
+            if actual is not None:
+                emitir(actual)
+                filas += 1
+            actual = [sort_key, clave, fila, {origen}]
+        if actual is not None:
+            emitir(actual)
+            filas += 1
+        self._log_blank_keys(vacias)
+        self.atomic_write(output_path, wb.save)
+        return filas
@@ -0,0 +1,143 @@
+"""
+Prorrateo exacto en aritmética entera (modo ``exacto`` de BaseProcessor).
+
+Los montos se llevan a pesos enteros (int64) y las horas a pesos enteros en
+centésimas de hora. Cada monto de una fila de TOTAL se reparte entre las filas
+(y partes, p. ej. PIE y SN) cruzadas con ella por el método del resto mayor:
+cada parte recibe ``(monto * peso) // suma_de_pesos`` y los pesos que faltan
+para llegar al monto se asignan, de a uno, a las partes con mayor resto (a
+igual resto, a la primera fila). Así la suma de los montos prorrateados de
+cada docente es exactamente el monto de TOTAL. Las filas sin horas quedan en
+0 sin divisiones por cero que limpiar después.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Las horas se usan en centésimas de hora como pesos enteros
+HOURS_SCALE = 100
+
+
+def hour_weights(horas) -> np.ndarray:
+    """Horas como pesos enteros (centésimas de hora); los vacíos cuentan como 0."""
+    horas = pd.Series(horas).to_numpy(dtype=np.float64, na_value=0)
+    return np.rint(horas * HOURS_SCALE).astype(np.int64)
+
+
+def integer_amounts(montos) -> np.ndarray:
+    """Montos como pesos enteros (int64); los vacíos cuentan como 0."""
+    montos = np.asarray(montos)
+    if montos.dtype.kind in 'iub':
+        return montos.astype(np.int64, copy=False)
+    montos = montos.astype(np.float64)
+    return np.rint(np.where(np.isfinite(montos), montos, 0)).astype(np.int64)
+
+
+def merge_rows(izquierda, derecha) -> np.ndarray:
+    """
+    Posición en ``izquierda`` de cada fila de ``pd.merge(..., how='left')`` sobre
+    esas claves (una Series, o un DataFrame si son varias columnas): cada fila
+    aparece una vez por coincidencia (al menos una) y en su orden. Los vacíos
+    coinciden entre sí, como en ``pd.merge``.
+    """
+    claves = pd.concat([izquierda, derecha], ignore_index=True)
+    if isinstance(claves, pd.DataFrame) and claves.shape[1] > 1:
+        codigos = claves.groupby(list(claves.columns), sort=False, dropna=False).ngroup().to_numpy()
+    else:
+        codigos, _ = pd.factorize(claves.squeeze(axis=1) if isinstance(claves, pd.DataFrame) else claves,
+                                  use_na_sentinel=False)
+    coincidencias = np.bincount(codigos[len(izquierda):], minlength=codigos.max(initial=-1) + 1)
+    por_fila = np.maximum(coincidencias[codigos[:len(izquierda)]], 1)
+    return np.repeat(np.arange(len(izquierda)), por_fila)
+
+
+class ExactSplitter:
+    """
+    Reparte montos por el resto mayor entre las filas de cada grupo (la fila de
+    TOTAL de origen) según ``pesos``: una lista de pesos enteros por fila, uno
+    por parte del prorrateo. Lo que depende solo de las horas (orden, divisores,
+    inicio de cada grupo) se calcula una vez y se reutiliza en todas las columnas.
+    """
+
+    def __init__(self, grupos, pesos):
+        grupos = np.asarray(grupos, dtype=np.int64)
+        # Las filas de un grupo deben quedar contiguas (el cruce de pandas ya las deja así)
+        self.orden = None
+        if len(grupos) and (np.diff(grupos) < 0).any():
+            self.orden = np.argsort(grupos, kind='stable')
+            grupos = grupos[self.orden]
+        self.grupos = grupos
+        self.pesos = np.column_stack([self._sorted(p) for p in pesos]).astype(np.int64, copy=False)
+        inicio = self._starts(grupos)
+        # Suma de los pesos del grupo de cada fila (el divisor del prorrateo); un grupo
+        # sin horas no reparte nada: monto 0 y divisor 1, sin divisiones por cero
+        suma = np.add.reduceat(self.pesos.sum(axis=1), inicio) if len(grupos) else np.zeros(0, np.int64)
+        divisor = np.repeat(suma, np.diff(np.append(inicio, len(grupos))))
+        self.con_horas = divisor > 0
+        self.divisor = np.where(self.con_horas, divisor, 1)[:, None]
+        self.tramos = self._layout(grupos, self.pesos.shape[1], self.divisor)
+
+    def _sorted(self, valores) -> np.ndarray:
+        valores = np.asarray(valores, dtype=np.int64)
+        return valores if self.orden is None else valores[self.orden]
+
+    @staticmethod
+    def _starts(grupos) -> np.ndarray:
+        return np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]]) if len(grupos) else np.zeros(0, np.intp)
+
+    @classmethod
+    def _layout(cls, grupos, partes, divisor) -> list:
+        """
+        Unidades (fila, parte) de los grupos con más de una, como posiciones de la
+        matriz aplanada: por cada tamaño de grupo, la matriz (unidades x grupos), la
+        primera fila y el divisor de cada grupo. Los grupos de una sola unidad
+        reciben el monto completo sin restos.
+        """
+        inicio = cls._starts(grupos)
+        largos = np.diff(np.append(inicio, len(grupos))) * partes
+        tramos = []
+        for k in np.unique(largos[largos > 1]):
+            filas = inicio[largos == k]
+            tramos.append((np.arange(k)[:, None] + filas * partes, filas, divisor[filas, 0]))
+        return tramos
+
+    def split(self, montos, filas=None) -> np.ndarray:
+        """
+        Matriz int64 (fila x parte) con el reparto de ``montos`` (un monto por fila,
+        igual en las filas de un grupo). Con ``filas`` (posiciones crecientes que
+        incluyen todas las filas de sus grupos, p. ej. las distintas de 0 de una
+        columna dispersa) se calculan solo esas filas.
+        """
+        montos = integer_amounts(montos)
+        if filas is None:
+            cuota = self._split(self._sorted(montos), self.pesos, self.divisor, self.con_horas, self.tramos)
+            if self.orden is None:
+                return cuota
+            reparto = np.empty_like(cuota)
+            reparto[self.orden] = cuota
+            return reparto
+        if self.orden is not None:
+            completos = np.zeros(len(self.grupos), dtype=np.int64)
+            completos[filas] = montos
+            return self.split(completos)[filas]
+        divisor = self.divisor[filas]
+        return self._split(montos, self.pesos[filas], divisor, self.con_horas[filas],
+                           self._layout(self.grupos[filas], self.pesos.shape[1], divisor))
+
+    @staticmethod
+    def _split(montos, pesos, divisor, con_horas, tramos) -> np.ndarray:
+        montos = montos * con_horas
+        producto = montos[:, None] * pesos
+        cuota = producto // divisor
+        for unidades, filas, divisores in tramos:
+            asignado = cuota.ravel()[unidades]
+            faltante = montos[filas] - asignado.sum(axis=0)
+            resto = producto.ravel()[unidades] - asignado * divisores
+            # Lugar de cada unidad en su grupo, de mayor a menor resto (a igual resto, la
+            # primera): las primeras ``faltante`` reciben un peso más
+            lugar = np.zeros(resto.shape, dtype=np.int64)
+            for j, otro in enumerate(resto):
+                lugar[:j] += otro > resto[:j]
+                lugar[j + 1:] += otro >= resto[j + 1:]
+            cuota.ravel()[unidades[lugar < faltante]] += 1
+        return cuota
@@ -0,0 +1,232 @@
+"""
+Modo panel: varios periodos de SEP/PIE en una sola pasada (recálculo de retroactivos).
+
+Las planillas de cada periodo se leen por separado y se apilan con la columna
+PERIODO, que se suma al Rut como clave del cruce (ver
+BaseProcessor.merge_keys): las filas de un periodo nunca se cruzan con las de
+otro y la suma de horas, los prorrateos, la conciliación y el control de las
+44 horas se calculan una sola vez para todos los periodos con el código de
+siempre (incluidas las particiones y el prorrateo exacto).
+Se escribe un resultado por periodo, igual al que se obtiene procesando esa
+planilla sola, y un resumen con una fila por Rut y sus horas y montos de todos
+los periodos.
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from processors.base import MAX_HOURS, group_sums
+from processors.reader import INVALID_CELLS
+from processors.shards import shard_label
+from processors.sparse import densify, sparsify, take_rows
+
+PERIOD_COLUMN = 'PERIODO'
+SUMMARY_NAME = 'resumen_periodos'
+# Columnas que faltan en la planilla de cada periodo (y sus prorrateos), en ``DataFrame.attrs``
+MISSING_COLUMNS = 'columnas_ausentes'
+# Columnas que numeran las filas de entrada (se llevan a la numeración de cada periodo)
+_ID_COLUMNS = {'ID_Horas': 'HORAS', 'ID_Total': 'TOTAL'}
+
+
+def check_periods(periodos) -> list:
+    """Periodos como texto, no vacíos, distintos y con nombres de archivo distintos."""
+    periodos = [str(periodo).strip() for periodo in periodos]
+    if not periodos:
+        raise ValueError("El modo panel requiere al menos un periodo")
+    etiquetas = {}
+    for periodo in periodos:
+        if not periodo:
+            raise ValueError("El periodo de cada planilla no puede estar vacío")
+        etiqueta = shard_label(periodo)
+        if etiqueta in etiquetas:
+            raise ValueError(f"Los periodos '{etiquetas[etiqueta]}' y '{periodo}' se repiten o generan el mismo archivo")
+        etiquetas[etiqueta] = periodo
+    return periodos
+
+
+def stack_frames(frames: list) -> pd.DataFrame:
+    """
+    Apila las hojas de los periodos con la unión de sus columnas: en el cálculo,
+    una columna numérica que falta en un periodo queda en 0 (como una celda
+    vacía) y una de texto queda vacía.
+    """
+    frames = [densify(frame) for frame in frames]
+    tipos = {}
+    for frame in frames:
+        for col, tipo in frame.dtypes.items():
+            tipos.setdefault(col, tipo)
+    columnas = list(tipos)
+    completos = []
+    for frame in frames:
+        faltantes = {
+            col: np.zeros(len(frame), dtype=tipos[col]) if tipos[col].kind in 'iufb' else np.nan
+            for col in columnas if col not in frame.columns
+        }
+        completos.append((frame.assign(**faltantes) if faltantes else frame)[columnas])
+    return pd.concat(completos, ignore_index=True)
+
+
+def load_periods(processor, entradas, progress_callback=None) -> dict:
+    """Lee HORAS y TOTAL de cada ``(periodo, archivo)``; devuelve ``{periodo: (horas, total)}``."""
+    progress_callback = progress_callback or (lambda value, message: None)
+    tablas = {}
+    for i, (periodo, entrada) in enumerate(entradas):
+        progress_callback(20 * i // len(entradas), f"Cargando periodo {periodo}...")
+        processor.check_input_readable(entrada)
+        with processor.timed('lectura'):
+            processor.verify_file(entrada)
+            tablas[periodo] = processor.read_input(entrada)
+    return tablas
+
+
+def process_periods(processor, tablas: dict, progress_callback=None) -> pd.DataFrame:
+    """
+    Procesa juntos HORAS y TOTAL (ya tipados) de cada periodo de ``tablas``.
+    Devuelve el resultado de todos los periodos con la columna PERIODO y deja
+    en ``processor.report`` el reporte de validación de cada periodo.
+    """
+    periodos = check_periods(tablas)
+    horas, totales, celdas, ruts = [], [], {}, {}
+    for periodo, (df_horas, df_total) in zip(periodos, tablas.values()):
+        celdas[periodo] = {hoja: valores for hoja, df in (('HORAS', df_horas), ('TOTAL', df_total))
+                           if (valores := df.attrs.pop(INVALID_CELLS, {}))}
+        logging.info(f"Panel: validando el periodo {periodo}")
+        processor.prepare_input(df_horas, df_total)
+        ruts[periodo] = processor.rut_report
+        horas.append(df_horas)
+        totales.append(df_total)
+
+    # Primera fila de cada periodo en las hojas apiladas
+    inicios = {
+        'HORAS': np.cumsum([0] + [len(df) for df in horas])[:-1],
+        'TOTAL': np.cumsum([0] + [len(df) for df in totales])[:-1],
+    }
+    df_horas, df_total = stack_frames(horas), stack_frames(totales)
+    ausentes = {}
+    for periodo, frames in zip(periodos, zip(horas, totales)):
+        faltantes = [col for apilada, frame in zip((df_horas, df_total), frames)
+                     for col in apilada.columns if col not in frame.columns]
+        ausentes[periodo] = faltantes + [f"{col}{sufijo}" for col in faltantes
+                                         for sufijo in processor.PRORATED_SUFFIXES]
+    for df, frames in ((df_horas, horas), (df_total, totales)):
+        df.insert(0, PERIOD_COLUMN, np.repeat(periodos, [len(frame) for frame in frames]))
+    if processor.sparse_density:
+        sparsify(df_total, processor.prorate_sources(), processor.sparse_density)
+    processor.input_shape = (len(df_horas) + len(df_total), df_horas.shape[1] + df_total.shape[1])
+
+    processor.period_column = PERIOD_COLUMN
+    try:
+        datos = processor.process_data(df_horas, df_total, progress_callback)
+        with processor.timed('conciliacion'):
+            conciliacion = processor.reconcile(df_total, datos)
+    finally:
+        processor.period_column = None
+
+    codigos = pd.Index(periodos).get_indexer(datos[PERIOD_COLUMN])
+    for col, hoja in _ID_COLUMNS.items():
+        if col in datos.columns:
+            datos[col] = datos[col] - inicios[hoja][codigos]
+
+    datos.attrs[MISSING_COLUMNS] = ausentes
+
+    exceso = datos.loc[datos['TOTAL HORAS POR DOCENTE'] > MAX_HOURS,
+                       [PERIOD_COLUMN, 'Rut', 'Nombre', 'TOTAL HORAS POR DOCENTE']]
+    processor.report = {
+        'ruts': ruts,
+        'celdas_invalidas': {periodo: valores for periodo, valores in celdas.items() if valores},
+        'exceso_horas': exceso.drop_duplicates([PERIOD_COLUMN, 'Rut', 'Nombre']).reset_index(drop=True),
+        'conciliacion': conciliacion,
+    }
+    return datos
+
+
+def period_summary(processor, datos: pd.DataFrame, periodos=None) -> pd.DataFrame:
+    """
+    Una fila por Rut (ordenadas por Rut) con la cantidad de periodos en que
+    aparece, el total de horas de cada periodo (en el orden de ``periodos``), los
+    periodos sobre el máximo de horas y cada monto prorrateado sumado en todos
+    los periodos.
+    """
+    periodos = pd.Index(datos[PERIOD_COLUMN].unique() if periodos is None else periodos)
+    codigos, ruts = pd.factorize(datos['Rut'], sort=True)
+    validos = codigos >= 0
+    fila, columna = codigos[validos], periodos.get_indexer(datos[PERIOD_COLUMN])[validos]
+    horas = np.zeros((len(ruts), len(periodos)))
+    np.maximum.at(horas, (fila, columna),
+                  datos['TOTAL HORAS POR DOCENTE'].to_numpy(dtype=np.float64, na_value=0)[validos])
+    presente = np.zeros((len(ruts), len(periodos)), dtype=bool)
+    presente[fila, columna] = True
+    nombres = datos['Nombre'][validos].groupby(fila).first()
+
+    resumen = {
+        'Rut': ruts.to_numpy(),
+        'Nombre': nombres.reindex(range(len(ruts))).to_numpy(),
+        'PERIODOS': presente.sum(axis=1),
+    }
+    resumen.update({f"HORAS {periodo}": horas[:, j] for j, periodo in enumerate(periodos)})
+    resumen[f"PERIODOS SOBRE {MAX_HOURS} HORAS"] = (horas > MAX_HOURS).sum(axis=1)
+    for col in processor.prorated_columns(datos):
+        sumas = group_sums(datos[col], codigos, len(ruts))
+        # Los montos enteros (también los dispersos) se mantienen enteros
+        tipo = getattr(datos[col].dtype, 'subtype', datos[col].dtype)
+        resumen[col] = np.rint(sumas).astype(np.int64) if tipo.kind in 'iu' else sumas
+    return pd.DataFrame(resumen)
+
+
+def write_periods(processor, datos: pd.DataFrame, entradas, output_dir: Path, progress_callback=None) -> list:
+    """
+    Escribe en ``output_dir`` un resultado por periodo (``<programa>_<periodo>.xlsx``,
+    con el perfil y la división de salida del procesador y sin las columnas que
+    faltaban en su planilla) y el resumen por Rut. Con historial habilitado,
+    guarda cada periodo con su propio periodo.
+    """
+    progress_callback = progress_callback or (lambda value, message: None)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    programa = processor.PROGRAM.lower()
+    filas = datos.groupby(PERIOD_COLUMN, sort=False).indices
+    ausentes = datos.attrs.get(MISSING_COLUMNS, {})
+    periodo_original = processor.periodo
+    salidas = []
+    try:
+        for i, (periodo, entrada) in enumerate(entradas):
+            progress_callback(70 + 25 * i // len(entradas), f"Guardando periodo {periodo}...")
+            resultado = take_rows(datos, filas.get(periodo, np.zeros(0, dtype=np.intp)))
+            sobrantes = [col for col in ausentes.get(periodo, ()) if col in resultado.columns]
+            resultado = resultado.drop(columns=[PERIOD_COLUMN, *sobrantes]).reset_index(drop=True)
+            with processor.timed('historial'):
+                processor.periodo = periodo
+                processor.record_history(
+                    resultado, processor.PROGRAM,
+                    list(processor.HOURS_COLUMNS) + processor.prorated_columns(resultado),
+                    processor.input_label(entrada)
+                )
+            ruta = processor.resolve_output_path(output_dir / f"{programa}_{shard_label(periodo)}.xlsx")
+            with processor.timed('escritura'):
+                salidas.append(processor.save_output(resultado, ruta))
+    finally:
+        processor.periodo = periodo_original
+
+    progress_callback(95, "Guardando resumen por Rut...")
+    ruta = processor.resolve_output_path(output_dir / f"{programa}_{SUMMARY_NAME}.xlsx")
+    with processor.timed('escritura'):
+        resumen = period_summary(processor, datos, [periodo for periodo, _ in entradas])
+        salidas.append(processor.safe_save(resumen, ruta))
+    with processor.timed('conciliacion'):
+        processor.save_reconciliation()
+    return salidas
+
+
+def run_panel(processor, entradas, output_dir: Path, progress_callback=None) -> list:
+    """Lee, procesa y escribe los periodos de ``entradas`` (``[(periodo, archivo)]``)."""
+    if not processor.PROGRAM:
+        raise ValueError(f"El modo panel no está disponible para {type(processor).__name__}")
+    progress_callback = progress_callback or (lambda value, message: None)
+    entradas = list(zip(check_periods(periodo for periodo, _ in entradas), (entrada for _, entrada in entradas)))
+    progress_callback(0, f"Iniciando panel {processor.PROGRAM} de {len(entradas)} periodos...")
+    datos = process_periods(processor, load_periods(processor, entradas, progress_callback), progress_callback)
+    salidas = write_periods(processor, datos, entradas, Path(output_dir), progress_callback)
+    progress_callback(100, f"Panel {processor.PROGRAM} completado!")
+    return salidas
@@ -0,0 +1,103 @@
+import os
+import logging
+import heapq
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from processors.sparse import take_rows
+
+# Columnas auxiliares para recuperar el orden del merge serial al unir las particiones
+_ORDEN_TOTAL = '__orden_total'
+_ORDEN_HORAS = '__orden_horas'
+
+
+def _init_partition_worker(log_queue):
+    from core.logging_setup import configure_worker_logging
+    configure_worker_logging(log_queue)
+
+
+def _combine_partition(processor, df_horas, df_total):
+    return processor.combine_data(df_horas, df_total)
+
+
+def _worker_log_queue():
+    try:
+        from core.logging_setup import shared_worker_log_queue
+    except ImportError:
+        return None
+    return shared_worker_log_queue()
+
+
+def assign_partitions(df_horas: pd.DataFrame, df_total: pd.DataFrame, partitions: int, column=None):
+    """
+    Asigna cada fila de HORAS y TOTAL a una partición de modo que todas las filas
+    de un mismo Rut queden juntas. Por defecto se reparte por hash del Rut; con
+    ``column`` (p. ej. el establecimiento en HORAS) cada docente va a la partición
+    de su primer establecimiento y los establecimientos se balancean por filas.
+    """
+    ruts = pd.concat([df_horas['Rut'], df_total['Rut']], ignore_index=True)
+    por_hash = pd.util.hash_pandas_object(ruts, index=False).to_numpy() % np.uint64(partitions)
+    particion = pd.Series(por_hash.astype(np.int64), index=ruts.to_numpy()).groupby(level=0, dropna=False).first()
+
+    if column is not None:
+        if column not in df_horas.columns:
+            raise ValueError(f"La hoja HORAS no tiene la columna de partición: {column}")
+        establecimiento = df_horas.groupby('Rut', dropna=False, sort=False)[column].first()
+        filas = establecimiento.value_counts(dropna=False)
+        # Asignación voraz: el establecimiento más grande a la partición con menos filas
+        cargas = [(0, i) for i in range(partitions)]
+        destino = {}
+        for valor, cantidad in filas.items():
+            carga, i = heapq.heappop(cargas)
+            destino[valor] = i
+            heapq.heappush(cargas, (carga + int(cantidad), i))
+        por_establecimiento = establecimiento.map(destino)
+        particion.update(por_establecimiento[por_establecimiento.index.isin(particion.index)])
+
+    return (
+        particion.reindex(df_horas['Rut'].to_numpy()).to_numpy(dtype=np.int64),
+        particion.reindex(df_total['Rut'].to_numpy()).to_numpy(dtype=np.int64),
+    )
+
+
+def combine_partitioned(processor, df_horas: pd.DataFrame, df_total: pd.DataFrame, progress_callback=None):
+    """
+    Ejecuta ``processor.combine_data`` sobre particiones de docentes en un pool de
+    procesos y une los resultados en el mismo orden que la ejecución serial.
+    """
+    progress_callback = progress_callback or (lambda value, message: None)
+    partitions = int(processor.partitions)
+    horas_part, total_part = assign_partitions(df_horas, df_total, partitions, processor.partition_column)
+
+    df_horas = df_horas.assign(**{_ORDEN_HORAS: np.arange(len(df_horas), dtype=np.int64)})
+    df_total = df_total.assign(**{_ORDEN_TOTAL: np.arange(len(df_total), dtype=np.int64)})
+    # Se conservan los índices originales: ID_Horas/ID_Total coinciden con la ejecución serial
+    trabajos = [
+        (df_horas[horas_part == i], take_rows(df_total, np.flatnonzero(total_part == i)))
+        for i in range(partitions) if (total_part == i).any()
+    ]
+    if not trabajos:
+        return processor.combine_data(
+            df_horas.drop(columns=_ORDEN_HORAS), df_total.drop(columns=_ORDEN_TOTAL), progress_callback
+        )
+
+    workers = min(len(trabajos), os.cpu_count() or 1)
+    logging.info(f"Procesando {len(trabajos)} particiones en {workers} procesos")
+    progress_callback(10, f"Procesando {len(trabajos)} particiones en paralelo...")
+    resultados = []
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_partition_worker, initargs=(_worker_log_queue(),)
+    ) as pool:
+        futuros = [pool.submit(_combine_partition, processor, horas, total) for horas, total in trabajos]
+        for hechos, futuro in enumerate(as_completed(futuros), start=1):
+            resultados.append(futuro.result())
+            progress_callback(10 + 55 * hechos // len(futuros), f"Particiones procesadas: {hechos}/{len(futuros)}")
+
+    datos = pd.concat(resultados, ignore_index=True)
+    orden = np.lexsort((
+        datos[_ORDEN_HORAS].fillna(-1).to_numpy(),
+        datos[_ORDEN_TOTAL].to_numpy(),
+    ))
+    return take_rows(datos, orden).reset_index(drop=True).drop(columns=[_ORDEN_TOTAL, _ORDEN_HORAS])
@@ -1,114 +1,173 @@
-import sys
-import time
 import logging
-import pandas as pd
 import numpy as np
+import pandas as pd
 from pathlib import Path
-from processors.base import BaseProcessor
+from processors.base import BaseProcessor, MAX_HOURS, MAX_LOG_ITEMS
+from processors.fixedpoint import merge_rows
+from processors.sparse import merge_left, take_rows
+
+def fill_zeros(df: pd.DataFrame, columnas) -> None:
+    """
+    Rellena con 0 los vacíos de ``columnas``. Las columnas de texto que solo tienen
+    números (o vacíos) se convierten antes a número, en enteros si todos los
+    valores lo son: el resultado de la inferencia que hacía fillna, sin depender de
+    ella (pandas la elimina). Las de texto conservan el texto.
+    """
+    for col in columnas:
+        valores = df[col]
+        if valores.dtype == object:
+            try:
+                numeros = pd.to_numeric(valores)
+            except (ValueError, TypeError):
+                df[col] = valores.where(valores.notna(), 0)
+                continue
+            numeros = numeros.fillna(0)
+            if numeros.dtype.kind == 'f' and np.array_equal(numeros, np.round(numeros)):
+                numeros = numeros.astype(np.int64)
+            df[col] = numeros
+        else:
+            df[col] = valores.fillna(0)
+
 
 class PIEProcessor(BaseProcessor):
     """Procesador para remuneraciones PIE (NORMAL)."""
-    
-    def process_file(self, file_path: Path, output_path: Path, progress_callback):
+
+    PROGRAM = 'PIE'
+    HOURS_COLUMNS = ('PIE', 'SN')
+    # La sexta columna de HORAS no se usa
+    HOURS_USECOLS = tuple(range(0, 5)) + tuple(range(6, 10))
+    PRORATED_SUFFIXES = (' PIE', ' SN', '_nuevo')
+    AUX_COLUMNS = ('SUMA POR FILA',)
+
+    COLUMNAS_ESPECIALES = [
+        'SUELDO BASE', 'RBMN (SUELDO BASE)', 'ASIGNACION EXPERIENCIA',
+        'Antic SEG.INV.SOB.', 'SEG.CESANTIA EMP.', 'MUTUAL'
+    ]
+
+    COLUMNAS_SALARIOS_BENEFICIOS = [
+        'ASIGNACION RESPONSABILIDAD', 'CONDICION DIFICIL',
+        'COMPLEMENTO DE ZONA', '(BRP) Asig. Titulo y M', 'PROF. ENCARGADO LEY.',
+        'HORAS EXTRAS RETROACT.', 'ASIGNACION ESPECIAL', 'ASIG.RESP. UTP',
+        'HORAS EXTRAS DEM', 'RETRO.FAMILIAR', 'BONO VACACIONES', 'PAGO RETROACTIVO',
+        'LEY 19464/96', 'BRP RETROAC/REEMPL.', 'BONIFICACION ESPECIAL',
+        'INCENTIVO (P.I.E)', 'EXCELENCIA ACADEMICA', 'ASIG. TITULO ESPECIAL',
+        'DEVOLUCION DESCUENTO', 'RETROBONO INCENTIVO', 'ASIG. FAMILIAR CORR.',
+        'BONO CUMPLIMIENTO METAS', 'ASIG.DIRECTOR.LEY 20501', 'RESP. INSPECTOR GENERAL',
+        'COND.DIFICIL.ASIST.EDUCACIÓN', 'ASIGNACION LEY 20.501/2011 DIR',
+        'RETROACTIVO BIENIOS', 'RETROACTIVO PROFESOR ENCARGADO', 'ASIG.RESPONS. 6HRS',
+        'RETROCT.ALS.PRIORIT.ASIST.EDUC', 'ART.59 LEY 20.883BONO ASISTEDU',
+        'RETROACT.ASIGN.RESPOS.DIRECTIV', 'ALS PRIORIT.ASIST.EDUC.AÑO2022',
+        'LEY 21.405 ART.44  ASISTE.EDUC', 'ASIGNACION INDUCCION CPEIP', 'AJUSTE BONO LEY 20.883ART59  A',
+        'RESTITUCION LICEN.MEDICA', 'ART.42 LEY 21.526 ASIST.EDUC', 'ALUMNOS. PRIORITARIOS ASIS. DE',
+        'ASIG.Por Tramo de Desarrollo P', 'Rec. Doc. Establ. Als Priorita',
+        'Planilla Suplementaria', 'ART.5°TRANS. LEY20.903', '  TOTAL HABERES',
+        '  IMPOSICIONES antic', '  SALUD', '  Imposicion Voluntaria', '  MONTO IMPONIBLE',
+        '  MONTO IMP.DESAHUCIO', '  IMPUESTO UNICO', '  MONTO TRIBUTABLE',
+        '  DIA NO TRABAJADO', '  RET. JUDICIAL', '  A.P.V', '  SEGURO DE CESANTIA',
+        '  HDI CIA. DE SEGUROS', '  HDI CONDUCTORES', '  AGRUPACION CODOCENTE',
+        '  TEMUCOOP (COOPERATIVA DE AHO', '  COOPAHOCRED.KUMEMOGEN LTDA',
+        '  CRED. COOPEUCH BIENESTAR', '  PRESTAMO/ACCIONES- COOPEUCH',
+        '  MUTUAL DE SEGUROS DE CHILE', '  1% PROFESORES DE RELIGION',
+        '  CUOTA BIENESTAR 1%', '  CHILENA CONSOLIDADA - SEGURO', '  ATRASOS',
+        '  VIDA SECURITY - SEGUROS DE V', '  BIENESTAR CUOTA INCORP. CUO',
+        '  REINTEGRO', '  CAJA LOS ANDES - SEGUROS Y P', '  CAJA LOS ANDES - AHORRO',
+        '  COLEGIO PROFESORES 1%', '  APORTE SEG. INV. SOB.', '  REINTEGRO BIENIO',
+        '  1% ASOC.AGFAE', '  AHORRO AFP', '  RETENCION POR LICEN. MEDICA',
+        '  BONO DOCENTE', '  SEGURO DE CESANTIA', '  SEGURO FALP',
+        '  COLEGIO PROFESORES 1% HABER', '  Ajuste IMPOSICIONES'
+    ]
+
+    def process_file(self, file_path, output_path: Path, progress_callback):
         try:
             progress_callback(0, "Iniciando proceso PIE...")
+            output_path = self.resolve_output_path(output_path)
+            self.check_input_readable(file_path)
             progress_callback(5, "Cargando datos para PIE...")
-            df_horas = pd.read_excel(
-                str(file_path), sheet_name='HORAS',
-                usecols=list(range(0, 5)) + list(range(6, 10)),
-                engine='openpyxl'
-            )
-            df_total = pd.read_excel(str(file_path), sheet_name='TOTAL', engine='openpyxl')
-            # Copias (si fuera necesario)
-            df_horas_copia = df_horas.copy()
-            df_total_copia = df_total.copy()
-            df_total.rename(columns={'rut': 'Rut'}, inplace=True)
-            df_horas['ID_Horas'] = df_horas.index
-            df_total['ID_Total'] = df_total.index
-            progress_callback(10, "Calculando horas PIE...")
-            df_horas['TOTAL HORAS'] = df_horas['PIE'] + df_horas['SN']
-            df_horas = df_horas[df_horas['TOTAL HORAS'] != 0]
-            horas_agrupadas = df_horas.groupby(['Rut', 'Nombre'])[['PIE', 'SN']].sum().reset_index()
-            horas_agrupadas['TOTAL HORAS'] = horas_agrupadas['PIE'] + horas_agrupadas['SN']
-            df_horas = df_horas.merge(
-                horas_agrupadas[['Rut', 'Nombre', 'TOTAL HORAS']],
-                on=['Rut', 'Nombre'],
-                how='left',
-                suffixes=('', '_SUMA')
-            )
-            df_horas.rename(columns={'TOTAL HORAS_SUMA': 'TOTAL HORAS POR DOCENTE'}, inplace=True)
-            df_horas.drop('TOTAL HORAS', axis=1, inplace=True)
-            progress_callback(30, "Combinando datos PIE...")
-            datos_combinados = pd.merge(df_total, df_horas, on=['Rut'], how='left')
-            datos_combinados.fillna({'PIE': 0, 'SN': 0, 'TOTAL HORAS POR DOCENTE': 0}, inplace=True)
-            for col in ['ID_Horas', 'ID_Total']:
-                if col in datos_combinados.columns:
-                    datos_combinados.drop(col, axis=1, inplace=True)
-            progress_callback(50, "Calculando salarios y beneficios PIE...")
-            columnas_especiales = [
-                'SUELDO BASE', 'RBMN (SUELDO BASE)', 'ASIGNACION EXPERIENCIA',
-                'Antic SEG.INV.SOB.', 'SEG.CESANTIA EMP.', 'MUTUAL'
-            ]
-            for columna in columnas_especiales:
-                if columna in datos_combinados.columns:
-                    valor_por_hora = datos_combinados[columna] / datos_combinados['TOTAL HORAS POR DOCENTE']
-                    valor_por_hora.replace([np.inf, -np.inf, np.nan], 0, inplace=True)
-                    datos_combinados[f'{columna} PIE'] = (valor_por_hora * datos_combinados['PIE']).round().fillna(0).astype(int)
-                    datos_combinados[f'{columna} SN'] = (valor_por_hora * datos_combinados['SN']).round().fillna(0).astype(int)
-            columnas_salarios_beneficios = [
-                'ASIGNACION RESPONSABILIDAD', 'CONDICION DIFICIL',
-                'COMPLEMENTO DE ZONA', '(BRP) Asig. Titulo y M', 'PROF. ENCARGADO LEY.',
-                'HORAS EXTRAS RETROACT.', 'ASIGNACION ESPECIAL', 'ASIG.RESP. UTP',
-                'HORAS EXTRAS DEM', 'RETRO.FAMILIAR', 'BONO VACACIONES', 'PAGO RETROACTIVO',
-                'LEY 19464/96', 'BRP RETROAC/REEMPL.', 'BONIFICACION ESPECIAL',
-                'INCENTIVO (P.I.E)', 'EXCELENCIA ACADEMICA', 'ASIG. TITULO ESPECIAL',
-                'DEVOLUCION DESCUENTO', 'RETROBONO INCENTIVO', 'ASIG. FAMILIAR CORR.',
-                'BONO CUMPLIMIENTO METAS', 'ASIG.DIRECTOR.LEY 20501', 'RESP. INSPECTOR GENERAL',
-                'COND.DIFICIL.ASIST.EDUCACIÓN', 'ASIGNACION LEY 20.501/2011 DIR',
-                'RETROACTIVO BIENIOS', 'RETROACTIVO PROFESOR ENCARGADO', 'ASIG.RESPONS. 6HRS',
-                'RETROCT.ALS.PRIORIT.ASIST.EDUC', 'ART.59 LEY 20.883BONO ASISTEDU',
-                'RETROACT.ASIGN.RESPOS.DIRECTIV', 'ALS PRIORIT.ASIST.EDUC.AÑO2022',
-                'LEY 21.405 ART.44  ASISTE.EDUC', 'ASIGNACION INDUCCION CPEIP', 'AJUSTE BONO LEY 20.883ART59  A',
-                'RESTITUCION LICEN.MEDICA', 'ART.42 LEY 21.526 ASIST.EDUC', 'ALUMNOS. PRIORITARIOS ASIS. DE',
-                'ASIG.Por Tramo de Desarrollo P', 'Rec. Doc. Establ. Als Priorita',
-                'Planilla Suplementaria', 'ART.5°TRANS. LEY20.903', '  TOTAL HABERES',
-                '  IMPOSICIONES antic', '  SALUD', '  Imposicion Voluntaria', '  MONTO IMPONIBLE',
-                '  MONTO IMP.DESAHUCIO', '  IMPUESTO UNICO', '  MONTO TRIBUTABLE',
-                '  DIA NO TRABAJADO', '  RET. JUDICIAL', '  A.P.V', '  SEGURO DE CESANTIA',
-                '  HDI CIA. DE SEGUROS', '  HDI CONDUCTORES', '  AGRUPACION CODOCENTE',
-                '  TEMUCOOP (COOPERATIVA DE AHO', '  COOPAHOCRED.KUMEMOGEN LTDA',
-                '  CRED. COOPEUCH BIENESTAR', '  PRESTAMO/ACCIONES- COOPEUCH',
-                '  MUTUAL DE SEGUROS DE CHILE', '  1% PROFESORES DE RELIGION',
-                '  CUOTA BIENESTAR 1%', '  CHILENA CONSOLIDADA - SEGURO', '  ATRASOS',
-                '  VIDA SECURITY - SEGUROS DE V', '  BIENESTAR CUOTA INCORP. CUO',
-                '  REINTEGRO', '  CAJA LOS ANDES - SEGUROS Y P', '  CAJA LOS ANDES - AHORRO',
-                '  COLEGIO PROFESORES 1%', '  APORTE SEG. INV. SOB.', '  REINTEGRO BIENIO',
-                '  1% ASOC.AGFAE', '  AHORRO AFP', '  RETENCION POR LICEN. MEDICA',
-                '  BONO DOCENTE', '  SEGURO DE CESANTIA', '  SEGURO FALP',
-                '  COLEGIO PROFESORES 1% HABER', '  Ajuste IMPOSICIONES'
-            ]
-            datos_combinados['SUMA POR FILA'] = datos_combinados['PIE'] + datos_combinados['SN']
-            for columna in columnas_salarios_beneficios:
-                if columna not in datos_combinados:
-                    logging.warning(f"Aviso: La columna {columna} no está en los datos combinados.")
-                    continue
-                valor_por_hora = datos_combinados[columna] / datos_combinados['TOTAL HORAS POR DOCENTE']
-                valor_por_hora.replace([np.inf, -np.inf, np.nan], 0, inplace=True)
-                datos_combinados[f'{columna}_nuevo'] = (valor_por_hora * datos_combinados['SUMA POR FILA']).round().fillna(0).astype(int)
-            progress_callback(70, "Ajustes finales PIE...")
-            datos_combinados.fillna(0, inplace=True)
-            datos_combinados.replace([np.inf, -np.inf], 0, inplace=True)
-            datos_combinados.sort_values(['Rut', 'Nombre'], inplace=True)
-            docentes_con_exceso = False
-            for index, row in datos_combinados.iterrows():
-                if row['TOTAL HORAS POR DOCENTE'] > 44:
-                    logging.warning(f"Alerta: El docente {row['Nombre']} (RUT: {row['Rut']}) tiene {row['TOTAL HORAS POR DOCENTE']} horas, excede 44.")
-                    docentes_con_exceso = True
-            if not docentes_con_exceso:
-                logging.info("No se encontró personal que supere las 44 horas totales")
+            with self.timed('lectura'):
+                df_horas, df_total = self.read_input(file_path)
+            datos_combinados = self.process_input(df_horas, df_total, progress_callback)
+            with self.timed('conciliacion'):
+                self.save_reconciliation()
+            with self.timed('historial'):
+                self.record_history(
+                    datos_combinados, self.PROGRAM, ['PIE', 'SN'] + self.prorated_columns(datos_combinados),
+                    self.input_label(file_path)
+                )
             progress_callback(90, "Exportando datos PIE...")
-            self.safe_save(datos_combinados, output_path) 
+            with self.timed('escritura'):
+                self.save_output(datos_combinados, output_path, progress_callback)
             progress_callback(100, "Proceso PIE completado!")
         except Exception as e:
             logging.error(f"Error en PIE process_file: {str(e)}", exc_info=True)
             raise
+
+    def prorate_sources(self):
+        return self.COLUMNAS_ESPECIALES + self.COLUMNAS_SALARIOS_BENEFICIOS
+
+    def process_data(self, df_horas, df_total, progress_callback=None):
+        return self.run_stages(df_horas, df_total, progress_callback)
+
+    def combine_data(self, df_horas, df_total, progress_callback=None):
+        progress_callback = progress_callback or (lambda value, message: None)
+        progress_callback(10, "Calculando horas PIE...")
+        df_horas = df_horas[(df_horas['PIE'] + df_horas['SN']) != 0]
+        claves = self.merge_keys()
+        # Suma de horas por docente sin materializar un segundo merge
+        agrupado = df_horas.groupby(claves + ['Nombre'])
+        df_horas = df_horas.assign(**{
+            'TOTAL HORAS POR DOCENTE': agrupado['PIE'].transform('sum') + agrupado['SN'].transform('sum')
+        })
+        progress_callback(30, "Combinando datos PIE...")
+        # Fila de TOTAL de cada fila cruzada (prorrateo exacto)
+        grupos = merge_rows(df_total[claves], df_horas[claves]) if self.exact_proration() else None
+        datos_combinados = merge_left(df_total, df_horas, on=claves)
+        datos_combinados.fillna({'PIE': 0, 'SN': 0, 'TOTAL HORAS POR DOCENTE': 0}, inplace=True)
+        progress_callback(50, "Calculando salarios y beneficios PIE...")
+        horas_totales = datos_combinados['TOTAL HORAS POR DOCENTE']
+        suma_por_fila = datos_combinados['PIE'] + datos_combinados['SN']
+        nuevas = list(self.prorate_columns(
+            datos_combinados,
+            [col for col in self.COLUMNAS_ESPECIALES if col in datos_combinados.columns],
+            horas_totales, [('{} PIE', datos_combinados['PIE']), ('{} SN', datos_combinados['SN'])], grupos
+        ))
+        nuevas.append(('SUMA POR FILA', suma_por_fila))
+        nuevas.extend(self.prorate_columns(
+            datos_combinados,
+            [col for col in self.COLUMNAS_SALARIOS_BENEFICIOS if col in datos_combinados],
+            horas_totales, [('{}_nuevo', suma_por_fila)], grupos
+        ))
+        return self.insert_columns(datos_combinados, nuevas)
+
+    def finalize_data(self, datos_combinados, progress_callback=None):
+        progress_callback = progress_callback or (lambda value, message: None)
+        progress_callback(70, "Ajustes finales PIE...")
+        faltantes = [col for col in self.COLUMNAS_SALARIOS_BENEFICIOS if col not in datos_combinados]
+        if faltantes:
+            self.log_summary(f"Aviso: {len(faltantes)} columna(s) no están en los datos combinados:", faltantes)
+        # Solo las columnas con vacíos (las de HORAS sin cruce y las de TOTAL con celdas
+        # vacías); las columnas calculadas nunca quedan vacías
+        con_vacios = datos_combinados.columns[datos_combinados.isna().any().to_numpy()]
+        fill_zeros(datos_combinados, con_vacios)
+        # Orden de sort_values(['Rut', 'Nombre']) (en el modo panel, antes por periodo)
+        # aplicado con take_rows (columnas dispersas), solo si las filas no están ya en ese orden
+        claves = self.merge_keys() + ['Nombre']
+        orden = datos_combinados[claves].reset_index(drop=True).sort_values(claves).index
+        if not orden.equals(pd.RangeIndex(len(orden))):
+            datos_combinados = take_rows(datos_combinados, orden)
+        self.validate_hours(datos_combinados)
+        return datos_combinados
+
+    def validate_hours(self, datos_combinados):
+        exceso = datos_combinados.loc[
+            datos_combinados['TOTAL HORAS POR DOCENTE'] > MAX_HOURS, ['Nombre', 'Rut', 'TOTAL HORAS POR DOCENTE']
+        ]
+        if not exceso.empty:
+            detalle = exceso.head(MAX_LOG_ITEMS)
+            self.log_summary(
+                f"Alerta: {len(exceso)} registro(s) de docentes exceden las {MAX_HOURS} horas:",
+                "El docente " + detalle['Nombre'].astype(str) + " (RUT: " + detalle['Rut'].astype(str)
+                + ") tiene " + detalle['TOTAL HORAS POR DOCENTE'].astype(str) + " horas",
+                total=len(exceso)
+            )
+        else:
+            logging.info(f"No se encontró personal que supere las {MAX_HOURS} horas totales")
@@ -0,0 +1,222 @@
+"""
+Lector de hojas Excel con esquema declarado.
+
+Recorre las filas con openpyxl en modo de solo lectura y escribe cada celda
+directamente en arreglos NumPy preasignados según el tipo declarado de su
+columna: claves como texto, horas como enteros pequeños y montos como int64
+con las celdas vacías en 0. Las columnas sin tipo declarado se infieren como
+lo haría ``pd.read_excel``. Varias hojas del mismo libro se leen abriéndolo
+una sola vez.
+"""
+
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+import openpyxl
+
+# Tipos de columna admitidos en un esquema
+KEY = 'clave'
+HOURS = 'horas'
+MONEY = 'monto'
+AUTO = 'auto'
+
+# Celdas no numéricas de horas o montos leídas como 0, por columna (en ``DataFrame.attrs``)
+INVALID_CELLS = 'celdas_invalidas'
+# Filas que se reservan cuando la hoja no informa sus dimensiones
+_INITIAL_ROWS = 1024
+_NUMERO = re.compile(r'^[-+]?[\d.]*,?\d*$')
+_MILES = re.compile(r'^[-+]?\d{1,3}(\.\d{3})+$')
+
+
+class SheetSchema:
+    """
+    Esquema de una hoja: columnas clave (texto), de horas (enteros pequeños) y de
+    montos (int64, vacío = 0). ``usecols`` acepta posiciones o una función sobre
+    el nombre de la columna, como en ``pd.read_excel``.
+    """
+
+    def __init__(self, keys=(), hours=(), money=(), usecols=None):
+        self.kinds = {}
+        for kind, columnas in ((MONEY, money), (HOURS, hours), (KEY, keys)):
+            for col in columnas:
+                self.kinds[col] = kind
+        self.usecols = usecols
+
+    def kind(self, column) -> str:
+        return self.kinds.get(column, AUTO)
+
+    def selected(self, position: int, column) -> bool:
+        if self.usecols is None:
+            return True
+        if callable(self.usecols):
+            return bool(self.usecols(column))
+        return position in self.usecols
+
+
+def read_sheets(path, schemas: dict) -> dict:
+    """Lee las hojas ``{nombre: SheetSchema}`` del libro y devuelve ``{nombre: DataFrame}``."""
+    wb = openpyxl.load_workbook(str(path), read_only=True, data_only=True)
+    try:
+        frames = {}
+        for nombre, schema in schemas.items():
+            if nombre not in wb.sheetnames:
+                raise ValueError(f"Worksheet named '{nombre}' not found")
+            frames[nombre] = _read_sheet(wb[nombre], schema or SheetSchema(), nombre)
+        return frames
+    finally:
+        wb.close()
+
+
+def read_sheet(path, sheet_name: str, schema: SheetSchema = None) -> pd.DataFrame:
+    return read_sheets(path, {sheet_name: schema})[sheet_name]
+
+
+def _header_names(header):
+    """Nombres de columna con las mismas reglas que pandas (vacías y repetidas)."""
+    nombres, vistos = [], {}
+    for i, valor in enumerate(header):
+        nombre = f"Unnamed: {i}" if valor is None else valor
+        if nombre in vistos:
+            base = nombre
+            while nombre in vistos:
+                vistos[base] += 1
+                nombre = f"{base}.{vistos[base]}"
+        vistos[nombre] = 0
+        nombres.append(nombre)
+    return nombres
+
+
+def _to_number(valor):
+    """Convierte texto como ``1.234.567`` o ``12,5`` a número; None si no es numérico."""
+    texto = str(valor).strip().replace(' ', '')
+    if not texto:
+        return 0.0
+    if not _NUMERO.match(texto):
+        return None
+    if ',' in texto or _MILES.match(texto):
+        # Formato chileno: punto de miles y coma decimal
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        return float(texto)
+    except ValueError:
+        return None
+
+
+def _read_sheet(ws, schema: SheetSchema, sheet_name: str) -> pd.DataFrame:
+    filas = ws.iter_rows(values_only=True)
+    header = next(filas, None)
+    if header is None:
+        return pd.DataFrame()
+    # Las celdas vacías al final del encabezado no son columnas
+    ancho = len(header)
+    while ancho and header[ancho - 1] is None:
+        ancho -= 1
+    nombres = _header_names(header[:ancho])
+    columnas = [(i, nombre) for i, nombre in enumerate(nombres) if schema.selected(i, nombre)]
+
+    capacidad = max((ws.max_row or 0) - 1, 0) or _INITIAL_ROWS
+    arreglos = []
+    for _, nombre in columnas:
+        kind = schema.kind(nombre)
+        arreglos.append(np.zeros(capacidad, dtype=np.float64) if kind in (HOURS, MONEY)
+                        else np.empty(capacidad, dtype=object))
+    plan = [(i, arreglos[j], schema.kind(nombre) in (HOURS, MONEY), nombre) for j, (i, nombre) in enumerate(columnas)]
+    invalidos = {}
+
+    n = 0
+    ultima = 0
+    for fila in filas:
+        if n == capacidad:
+            capacidad *= 2
+            for j, arreglo in enumerate(arreglos):
+                nuevo = np.zeros(capacidad, dtype=arreglo.dtype) if arreglo.dtype != object \
+                    else np.empty(capacidad, dtype=object)
+                nuevo[:n] = arreglo[:n]
+                arreglos[j] = nuevo
+            plan = [(i, arreglos[j], numerico, nombre) for j, (i, _, numerico, nombre) in enumerate(plan)]
+        vacia = True
+        largo = len(fila)
+        for i, arreglo, numerico, nombre in plan:
+            valor = fila[i] if i < largo else None
+            if valor is None:
+                continue
+            vacia = False
+            if not numerico:
+                arreglo[n] = valor
+            elif type(valor) in (int, float, bool):
+                arreglo[n] = valor
+            else:
+                numero = _to_number(valor)
+                if numero is None:
+                    invalidos.setdefault(nombre, []).append(valor)
+                    numero = 0.0
+                arreglo[n] = numero
+        n += 1
+        if not vacia:
+            ultima = n
+    # Como pandas, se descartan las filas vacías del final
+    n = ultima
+
+    datos = {}
+    for (i, nombre), arreglo in zip(columnas, arreglos):
+        kind = schema.kind(nombre)
+        valores = arreglo[:n]
+        if kind == MONEY:
+            datos[nombre] = _as_integers(valores, np.int64)
+        elif kind == HOURS:
+            datos[nombre] = _as_integers(valores, np.int16)
+        elif kind == KEY:
+            datos[nombre] = _as_keys(valores)
+        else:
+            datos[nombre] = _infer(valores)
+    _log_invalid(sheet_name, invalidos)
+    frame = pd.DataFrame(datos, columns=[nombre for _, nombre in columnas])
+    if invalidos:
+        frame.attrs[INVALID_CELLS] = invalidos
+    return frame
+
+
+def _log_invalid(sheet_name: str, invalidos: dict):
+    if invalidos:
+        detalle = [f"{col}: {', '.join(map(str, valores[:5]))}" for col, valores in invalidos.items()]
+        logging.warning(
+            "Hoja {}: {} celda(s) no numéricas en columnas de horas o montos se leyeron como 0:\n  {}".format(
+                sheet_name, sum(len(v) for v in invalidos.values()), "\n  ".join(detalle)
+            )
+        )
+
+
+def _as_integers(valores: np.ndarray, dtype) -> np.ndarray:
+    """Entero del tipo pedido si todos los valores son enteros y caben; si no, float64."""
+    enteros = np.round(valores)
+    if not np.array_equal(enteros, valores):
+        return valores
+    info = np.iinfo(dtype)
+    if len(valores) and (valores.min() < info.min or valores.max() > info.max):
+        dtype = np.int64
+    return valores.astype(dtype)
+
+
+def _infer(valores: np.ndarray) -> pd.Series:
+    """Inferencia equivalente a la de read_excel: vacíos como NaN y floats enteros como int."""
+    lista = [
+        np.nan if valor is None else int(valor) if type(valor) is float and valor.is_integer() else valor
+        for valor in valores
+    ]
+    return pd.Series(lista, dtype=None if lista else object)
+
+
+def _as_keys(valores: np.ndarray) -> np.ndarray:
+    """Claves como texto sin espacios en los extremos; los números enteros sin '.0'."""
+    claves = np.empty(len(valores), dtype=object)
+    for i, valor in enumerate(valores):
+        if valor is None or valor != valor:
+            claves[i] = np.nan
+        elif isinstance(valor, float) and valor.is_integer():
+            claves[i] = str(int(valor))
+        else:
+            texto = str(valor).strip()
+            claves[i] = texto if texto else np.nan
+    return claves
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+# Pesos del módulo 11 para el cuerpo del RUT rellenado a 9 dígitos (de izquierda a derecha)
+_PESOS = np.array([4, 3, 2, 7, 6, 5, 4, 3, 2], dtype=np.int64)
+# Dígito verificador según 11 - (suma % 11), indexado por ese valor (1..11)
+_DV = np.array(['', '1', '2', '3', '4', '5', '6', '7', '8', '9', 'K', '0'], dtype='U1')
+# Dígitos significativos del cuerpo: los códigos numéricos cortos (p. ej. '19' o '108')
+# no se leen como RUT aunque cumplan el módulo 11
+MIN_BODY_DIGITS = 6
+_PATRON = rf'^0*([1-9]\d{{{MIN_BODY_DIGITS - 1},8}})([0-9K])$'
+# Guion explícito antes del dígito verificador
+_SEPARADOR = r'[\-‐]\s*[0-9Kk]$'
+
+
+def normalize_ruts(values: pd.Series):
+    """
+    Canoniza una columna de RUTs al formato ``12345678-9`` y valida el dígito
+    verificador (módulo 11) para toda la columna a la vez.
+
+    Acepta puntos, espacios, guion opcional y ``k`` minúscula. El cuerpo debe tener
+    al menos MIN_BODY_DIGITS dígitos; sin guion antes del dígito verificador el
+    valor solo se lee como RUT si ese dígito es correcto (``12345678`` puede ser un
+    cuerpo sin dígito verificador). Devuelve ``(normalizados, es_rut, valido)``: la
+    serie canonizada (los valores que no tienen forma de RUT se conservan sin
+    espacios en los extremos), una máscara de valores con forma de RUT y una
+    máscara de los que además tienen DV correcto.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        texto = values.astype('Int64').astype('string')
+    else:
+        texto = values.astype('string')
+    texto = texto.str.strip()
+    limpio = texto.str.upper().str.replace(r'[\s.\-‐]', '', regex=True)
+    partes = limpio.str.extract(_PATRON)
+    con_forma = partes[0].notna().to_numpy()
+
+    cuerpo = partes[0][con_forma]
+    dv = partes[1][con_forma].to_numpy(dtype='U1')
+    digitos = (cuerpo.str.zfill(9).to_numpy(dtype='S9').view(np.uint8).reshape(-1, 9) - ord('0'))
+    suma = digitos.astype(np.int64) @ _PESOS
+    correcto = _DV[11 - suma % 11] == dv
+    separado = texto[con_forma].str.contains(_SEPARADOR, regex=True).to_numpy(dtype=bool, na_value=False)
+
+    es_rut = np.zeros(len(values), dtype=bool)
+    es_rut[con_forma] = separado | correcto
+    valido = np.zeros(len(values), dtype=bool)
+    valido[con_forma] = correcto
+
+    normalizados = texto.astype(object).where(texto.notna(), np.nan)
+    canonicos = cuerpo + '-' + partes[1][con_forma]
+    normalizados[es_rut] = canonicos[es_rut[con_forma]].astype(object).to_numpy()
+    return normalizados, es_rut, valido
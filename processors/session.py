@@ -0,0 +1,152 @@
+"""
+Sesión de simulación ("qué pasa si") sobre una planilla SEP/PIE.
+
+La planilla se carga y procesa una sola vez; HORAS, TOTAL y el resultado
+quedan en memoria indexados por Rut. Al cambiar las horas o un monto de un
+docente solo se vuelven a calcular sus filas (suma de horas, prorrateos y
+control de las 44 horas). El archivo se escribe únicamente al guardar.
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from processors.base import MAX_HOURS
+from processors.sparse import densify
+from processors.rut import normalize_ruts
+
+
+class WhatIfSession:
+    """Estado en memoria de una planilla con recálculo por docente."""
+
+    def __init__(self, processor, file_path, progress_callback=None):
+        self.processor = processor
+        self.file_path = file_path
+        self.horas, self.total = processor.load_data(file_path)
+        resultado = densify(processor.process_data(self.horas.copy(), self.total.copy()))
+        # Las ediciones escriben celdas sueltas: TOTAL se mantiene en columnas normales
+        self.total = densify(self.total)
+        # Índice único por fila y orden de salida: las filas recalculadas de un
+        # docente ocupan el lugar de las anteriores
+        self.result = resultado.reset_index(drop=True)
+        self._orden = pd.Series(np.arange(len(self.result), dtype=np.float64), index=self.result.index)
+        self._siguiente = len(self.result)
+        self._filas = self._index(self.result)
+        self._horas = self._index(self.horas)
+        self._total = self._index(self.total)
+        self.edited = set()
+
+    @staticmethod
+    def _index(df: pd.DataFrame) -> dict:
+        """Rut -> etiquetas de índice de sus filas."""
+        return {rut: df.index[posiciones] for rut, posiciones in df.groupby('Rut', sort=False).indices.items()}
+
+    def canonical_rut(self, rut) -> str:
+        normalizado, _, _ = normalize_ruts(pd.Series([rut], dtype=object))
+        canonico = normalizado.iloc[0]
+        if canonico not in self._horas and canonico not in self._total:
+            raise KeyError(f"El RUT {rut} no está en HORAS ni en TOTAL")
+        return canonico
+
+    def teacher(self, rut) -> pd.DataFrame:
+        """Filas del resultado de un docente."""
+        rut = self.canonical_rut(rut)
+        return self.result.loc[self._filas.get(rut, self.result.index[:0])]
+
+    def hours_rows(self, rut) -> pd.DataFrame:
+        """Filas de HORAS de un docente (la etiqueta de índice identifica cada fila)."""
+        rut = self.canonical_rut(rut)
+        return self.horas.loc[self._horas.get(rut, self.horas.index[:0])]
+
+    def total_rows(self, rut) -> pd.DataFrame:
+        rut = self.canonical_rut(rut)
+        return self.total.loc[self._total.get(rut, self.total.index[:0])]
+
+    def exceeds_limit(self, rut) -> bool:
+        filas = self.teacher(rut)
+        return bool((filas['TOTAL HORAS POR DOCENTE'] > MAX_HOURS).any())
+
+    def over_limit(self) -> pd.DataFrame:
+        """Docentes que superan el máximo de horas: Rut, Nombre y total de horas."""
+        exceso = self.result[self.result['TOTAL HORAS POR DOCENTE'] > MAX_HOURS]
+        return exceso[['Rut', 'Nombre', 'TOTAL HORAS POR DOCENTE']].drop_duplicates(['Rut', 'Nombre'])
+
+    def set_hours(self, rut, columna: str, valor, fila=None) -> pd.DataFrame:
+        """Cambia las horas de una fila de HORAS del docente y recalcula solo sus filas."""
+        if columna not in self.processor.HOURS_COLUMNS:
+            raise ValueError(f"Columna de horas no reconocida: {columna} "
+                             f"(opciones: {', '.join(self.processor.HOURS_COLUMNS)})")
+        rut = self.canonical_rut(rut)
+        self._set(self.horas, self._horas.get(rut), columna, valor, fila, 'HORAS')
+        return self.recompute(rut)
+
+    def set_amount(self, rut, columna: str, valor, fila=None) -> pd.DataFrame:
+        """Cambia un monto de TOTAL del docente y recalcula solo sus filas."""
+        if columna not in self.total.columns or columna == 'Rut':
+            raise ValueError(f"La hoja TOTAL no tiene la columna {columna}")
+        rut = self.canonical_rut(rut)
+        self._set(self.total, self._total.get(rut), columna, valor, fila, 'TOTAL')
+        return self.recompute(rut)
+
+    def _set(self, df: pd.DataFrame, etiquetas, columna, valor, fila, hoja):
+        if etiquetas is None or not len(etiquetas):
+            raise KeyError(f"El docente no tiene filas en {hoja}")
+        if fila is None:
+            if len(etiquetas) > 1:
+                raise ValueError(f"El docente tiene {len(etiquetas)} filas en {hoja}: indique cuál "
+                                 f"({', '.join(map(str, etiquetas))})")
+            fila = etiquetas[0]
+        elif fila not in etiquetas:
+            raise ValueError(f"La fila {fila} de {hoja} no corresponde al docente")
+        # Los enteros se mantienen enteros; un valor con decimales cambia la columna a float
+        if pd.api.types.is_integer_dtype(df[columna]) and float(valor) != int(valor):
+            df[columna] = df[columna].astype(np.float64)
+        df.loc[fila, columna] = valor
+
+    def recompute(self, rut) -> pd.DataFrame:
+        """Vuelve a cruzar y prorratear las filas de un docente y reevalúa sus horas."""
+        horas = self.horas.loc[self._horas.get(rut, self.horas.index[:0])].copy()
+        total = self.total.loc[self._total.get(rut, self.total.index[:0])].copy()
+        nuevas = self.processor.finalize_data(self.processor.combine_data(horas, total))
+        nuevas = nuevas.reindex(columns=self.result.columns)
+        anteriores = self._filas.get(rut, self.result.index[:0])
+
+        if len(nuevas) == len(anteriores):
+            self._assign(self.result.index.get_indexer(anteriores), nuevas)
+        else:
+            # Cambió la cantidad de filas (p. ej. horas que pasan a 0): se reemplaza el bloque
+            inicio = self._orden.loc[anteriores].min() if len(anteriores) else float(self._siguiente)
+            etiquetas = pd.RangeIndex(self._siguiente, self._siguiente + len(nuevas))
+            self._siguiente += len(nuevas)
+            nuevas.index = etiquetas
+            self.result = pd.concat([self.result.drop(index=anteriores), nuevas])
+            self._orden = pd.concat([
+                self._orden.drop(index=anteriores),
+                pd.Series(inicio + np.arange(len(nuevas)) / (len(nuevas) + 1), index=etiquetas),
+            ])
+            self._filas[rut] = etiquetas
+        self.edited.add(rut)
+        return self.result.loc[self._filas[rut]]
+
+    def _assign(self, posiciones, nuevas: pd.DataFrame):
+        """Escribe las filas nuevas sobre las anteriores, una asignación por tipo de columna."""
+        grupos = {}
+        for j, (actual, nuevo) in enumerate(zip(self.result.dtypes, nuevas.dtypes)):
+            if actual != nuevo and actual != object:
+                # p. ej. horas enteras que pasan a tener decimales
+                self.result.isetitem(j, self.result.iloc[:, j].astype(np.result_type(actual, nuevo)))
+            grupos.setdefault(self.result.dtypes.iloc[j], []).append(j)
+        for columnas in grupos.values():
+            self.result.iloc[posiciones, columnas] = nuevas.iloc[:, columnas].to_numpy()
+
+    def ordered_result(self) -> pd.DataFrame:
+        return self.result.loc[self._orden.sort_values(kind='stable').index].reset_index(drop=True)
+
+    def save(self, output_path, progress_callback=None) -> Path:
+        """Guarda el resultado actual (con el perfil y la división de salida del procesador)."""
+        output_path = self.processor.resolve_output_path(Path(output_path))
+        ruta = self.processor.save_output(self.ordered_result(), output_path, progress_callback)
+        logging.info(f"Simulación guardada en {ruta} ({len(self.edited)} docente(s) modificados)")
+        return ruta
@@ -0,0 +1,150 @@
+"""
+Salida dividida: un libro por establecimiento o centro de costo.
+
+El resultado se reparte según los valores de una columna y cada parte se
+escribe en su propio archivo, en paralelo en un pool de procesos y con
+openpyxl en modo de solo escritura (fila a fila, sin armar el libro en
+memoria). Un manifiesto JSON lista los archivos con sus filas y totales.
+"""
+
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import openpyxl
+
+from processors.base import atomic_write
+from processors.parallel import _init_partition_worker, _worker_log_queue
+
+MANIFEST_NAME = 'manifiesto.json'
+# Nombre de la parte para las filas sin valor en la columna de división
+NO_VALUE = 'sin_valor'
+
+
+def shard_label(valor) -> str:
+    """Texto del valor para el nombre de archivo (los números enteros sin '.0')."""
+    if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+        return NO_VALUE
+    if isinstance(valor, (float, np.floating)) and float(valor).is_integer():
+        valor = int(valor)
+    texto = re.sub(r'[^\w\-]+', '_', str(valor).strip()).strip('_')
+    return texto or NO_VALUE
+
+
+def split_shards(datos: pd.DataFrame, column) -> list:
+    """Devuelve ``[(etiqueta, posiciones)]`` en el orden de aparición de cada valor."""
+    if column not in datos.columns:
+        raise ValueError(f"El resultado no tiene la columna para dividir la salida: {column}")
+    codigos, valores = pd.factorize(datos[column], use_na_sentinel=True)
+    # Las filas sin valor van juntas al final
+    codigos = np.where(codigos < 0, len(valores), codigos)
+    orden = np.argsort(codigos, kind='stable')
+    cortes = np.flatnonzero(np.diff(codigos[orden])) + 1
+    etiquetas, usadas = [], {}
+    for grupo in np.split(orden, cortes) if len(orden) else []:
+        codigo = codigos[grupo[0]]
+        etiqueta = shard_label(valores[codigo] if codigo < len(valores) else None)
+        # Valores distintos con la misma etiqueta (p. ej. '1 A' y '1/A') no se pisan
+        usadas[etiqueta] = usadas.get(etiqueta, 0) + 1
+        if usadas[etiqueta] > 1:
+            etiqueta = f"{etiqueta}_{usadas[etiqueta]}"
+        etiquetas.append((etiqueta, grupo))
+    return etiquetas
+
+
+def _cell_rows(frame: pd.DataFrame):
+    """Filas con tipos de Python y None en las celdas vacías, como las escribe to_excel."""
+    columnas = []
+    for col in frame.columns:
+        valores = frame[col]
+        if valores.dtype.kind in 'iub':
+            columnas.append(valores.tolist())
+        else:
+            columnas.append([None if v is pd.NaT or v != v else v for v in valores.astype(object).tolist()])
+    return zip(*columnas)
+
+
+def write_shard(frame: pd.DataFrame, path: Path) -> Path:
+    """Escribe una parte fila a fila en un libro de solo escritura, de forma atómica."""
+    def write(ruta):
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet('Sheet1')
+        ws.append([str(col) for col in frame.columns])
+        for fila in _cell_rows(frame):
+            ws.append(fila)
+        wb.save(ruta)
+    return atomic_write(path, write)
+
+
+def shard_totals(frame: pd.DataFrame, columnas) -> dict:
+    return {str(col): int(np.rint(frame[col].sum())) for col in columnas if col in frame.columns}
+
+
+def write_shards(processor, datos: pd.DataFrame, output_path: Path, progress_callback=None) -> Path:
+    """
+    Divide ``datos`` por ``processor.shard_column``, aplica el perfil de salida a
+    cada parte y la escribe en ``<salida>_por_<columna>/<salida>_<valor>.xlsx``.
+    Devuelve la ruta del manifiesto.
+    """
+    progress_callback = progress_callback or (lambda value, message: None)
+    output_path = Path(output_path)
+    column = processor.shard_column
+    carpeta = output_path.parent / f"{output_path.stem}_por_{shard_label(column)}"
+    carpeta.mkdir(parents=True, exist_ok=True)
+
+    partes = []
+    for etiqueta, posiciones in split_shards(datos, column):
+        frame = processor.select_output(datos.iloc[posiciones])
+        partes.append((etiqueta, frame, carpeta / f"{output_path.stem}_{etiqueta}.xlsx"))
+    if not partes:
+        raise ValueError("El resultado no tiene filas para dividir.")
+
+    workers = min(len(partes), os.cpu_count() or 1)
+    progress_callback(75, f"Escribiendo {len(partes)} archivo(s) por {column}...")
+    rutas = {}
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_partition_worker,
+                                 initargs=(_worker_log_queue(),)) as pool:
+            futuros = {pool.submit(write_shard, frame, ruta): etiqueta for etiqueta, frame, ruta in partes}
+            for hechos, futuro in enumerate(as_completed(futuros), start=1):
+                rutas[futuros[futuro]] = futuro.result()
+                progress_callback(75 + 20 * hechos // len(partes), f"Archivos escritos: {hechos}/{len(partes)}")
+    else:
+        for etiqueta, frame, ruta in partes:
+            rutas[etiqueta] = write_shard(frame, ruta)
+
+    columnas = list(processor.HOURS_COLUMNS) + processor.prorated_columns(partes[0][1])
+    archivos = [
+        {
+            'valor': etiqueta,
+            'archivo': rutas[etiqueta].name,
+            'filas': len(frame),
+            'totales': shard_totals(frame, columnas),
+        }
+        for etiqueta, frame, _ in partes
+    ]
+    manifiesto = {
+        'procesador': type(processor).__name__,
+        'columna': str(column),
+        'perfil': processor.output_profile,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'filas': sum(parte['filas'] for parte in archivos),
+        'totales': {
+            col: sum(parte['totales'].get(col, 0) for parte in archivos)
+            for col in archivos[0]['totales']
+        },
+        'archivos': archivos,
+    }
+
+    def write(ruta):
+        with open(ruta, 'w', encoding='utf-8') as file:
+            json.dump(manifiesto, file, ensure_ascii=False, indent=1)
+    ruta_manifiesto = atomic_write(carpeta / MANIFEST_NAME, write)
+    logging.info(f"Salida dividida por {column}: {len(archivos)} archivo(s) en {carpeta}")
+    return ruta_manifiesto
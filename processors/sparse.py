@@ -0,0 +1,125 @@
+"""
+Columnas dispersas para los montos de TOTAL casi siempre en 0.
+
+La mayoría de las columnas del catálogo (préstamos de cooperativas, seguros,
+retroactivos, retenciones judiciales, etc.) solo tienen valor para unos pocos
+docentes. Esas columnas se guardan como ``SparseDtype`` con relleno 0: solo
+se almacenan las filas distintas de 0 y el prorrateo recorre solo esas filas
+(ver BaseProcessor.prorate_columns). Las funciones de este módulo reordenan y
+expanden esas columnas sin pasar por la ruta genérica de pandas, que es lenta
+con arreglos dispersos.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Columnas de montos "casi vacías": a lo más esta fracción de filas distintas de 0
+SPARSE_DENSITY = 0.1
+# Índice de posiciones de SparseArray (pandas no lo expone en su API pública)
+_IntIndex = type(pd.arrays.SparseArray([0]).sp_index)
+
+
+def is_sparse(columna) -> bool:
+    return isinstance(columna.dtype, pd.SparseDtype)
+
+
+def sparse_columns(frame: pd.DataFrame) -> list:
+    return [col for col, dtype in frame.dtypes.items() if isinstance(dtype, pd.SparseDtype)]
+
+
+def sparsify(frame: pd.DataFrame, columnas, densidad=SPARSE_DENSITY) -> list:
+    """
+    Convierte en el lugar a ``SparseDtype`` (relleno 0) las columnas numéricas
+    indicadas con a lo más ``densidad`` de filas distintas de 0. Devuelve las
+    columnas convertidas.
+    """
+    convertidas = []
+    for col in dict.fromkeys(columnas):
+        if col not in frame.columns or not len(frame):
+            continue
+        valores = frame[col]
+        if is_sparse(valores) or valores.dtype.kind not in 'if':
+            continue
+        if np.count_nonzero(valores.to_numpy()) <= densidad * len(frame):
+            frame[col] = pd.arrays.SparseArray(valores.to_numpy(), fill_value=valores.dtype.type(0))
+            convertidas.append(col)
+    return convertidas
+
+
+def densify(frame: pd.DataFrame) -> pd.DataFrame:
+    """El mismo DataFrame con las columnas dispersas convertidas a arreglos normales."""
+    dispersas = sparse_columns(frame)
+    if not dispersas:
+        return frame
+    return frame.assign(**{col: frame[col].sparse.to_dense() for col in dispersas})
+
+
+def sparse_from(valores: np.ndarray, filas: np.ndarray, largo: int, fill_value=0) -> pd.arrays.SparseArray:
+    """Arreglo disperso de ``largo`` filas con ``valores`` en las posiciones ``filas`` (crecientes)."""
+    indice = _IntIndex(largo, np.asarray(filas, dtype=np.int32))
+    return pd.arrays.SparseArray(valores, sparse_index=indice, fill_value=fill_value)
+
+
+def take_sparse(arreglo: pd.arrays.SparseArray, posiciones: np.ndarray) -> pd.arrays.SparseArray:
+    """``arreglo.take(posiciones)`` (posiciones válidas, con repeticiones) recorriendo solo los valores distintos de 0."""
+    destino = np.full(len(arreglo), -1, dtype=np.intp)
+    destino[arreglo.sp_index.indices] = np.arange(arreglo.sp_index.npoints)
+    elegidos = destino[posiciones]
+    filas = np.flatnonzero(elegidos >= 0)
+    return sparse_from(arreglo.sp_values[elegidos[filas]], filas, len(posiciones), arreglo.fill_value)
+
+
+def _move_sparse(arreglo: pd.arrays.SparseArray, destino: np.ndarray, largo: int) -> pd.arrays.SparseArray:
+    """Lleva cada valor distinto de 0 a la fila ``destino`` (-1 = se descarta)."""
+    filas = destino[arreglo.sp_index.indices]
+    conservadas = np.flatnonzero(filas >= 0)
+    orden = conservadas[np.argsort(filas[conservadas], kind='stable')]
+    return sparse_from(arreglo.sp_values[orden], filas[orden], largo, arreglo.fill_value)
+
+
+def take_rows(frame: pd.DataFrame, posiciones) -> pd.DataFrame:
+    """``frame.take(posiciones)`` con las columnas dispersas reordenadas por ``take_sparse``."""
+    posiciones = np.asarray(posiciones, dtype=np.intp)
+    dispersas = {j for j, dtype in enumerate(frame.dtypes) if isinstance(dtype, pd.SparseDtype)}
+    if not dispersas:
+        return frame.take(posiciones)
+    densas = frame.iloc[:, [j for j in range(frame.shape[1]) if j not in dispersas]].take(posiciones)
+    # Sin posiciones repetidas (orden o subconjunto de filas) basta con mover los valores distintos de 0
+    destino = np.full(len(frame), -1, dtype=np.intp)
+    destino[posiciones] = np.arange(len(posiciones))
+    unicas = np.count_nonzero(destino >= 0) == len(posiciones)
+    resultado = pd.concat([
+        densas,
+        pd.DataFrame({
+            j: _move_sparse(frame.iloc[:, j].array, destino, len(posiciones)) if unicas
+            else take_sparse(frame.iloc[:, j].array, posiciones)
+            for j in sorted(dispersas)
+        }, index=densas.index),
+    ], axis=1, copy=False)
+    # Mismo orden de columnas que el original (los nombres pueden repetirse)
+    orden = np.empty(frame.shape[1], dtype=np.intp)
+    orden[[j for j in range(frame.shape[1]) if j not in dispersas] + sorted(dispersas)] = np.arange(frame.shape[1])
+    resultado = resultado.iloc[:, orden]
+    resultado.columns = frame.columns
+    return resultado
+
+
+def merge_left(izquierda: pd.DataFrame, derecha: pd.DataFrame, on) -> pd.DataFrame:
+    """
+    ``pd.merge(izquierda, derecha, on=on, how='left')`` en el que las columnas
+    dispersas de la izquierda se reordenan con ``take_sparse``.
+    """
+    dispersas = [col for col in sparse_columns(izquierda) if col not in derecha.columns]
+    if not dispersas:
+        return pd.merge(izquierda, derecha, on=on, how='left')
+    fila = '__fila_izquierda'
+    densas = izquierda.drop(columns=dispersas).assign(**{fila: np.arange(len(izquierda))})
+    datos = pd.merge(densas, derecha, on=on, how='left')
+    posiciones = datos.pop(fila).to_numpy()
+    # Las columnas de la izquierda quedan primero y en su orden (con sufijo si se repiten)
+    propias = iter(datos.columns[:densas.shape[1] - 1])
+    columnas = [col if col in dispersas else next(propias) for col in izquierda.columns]
+    columnas += list(datos.columns[densas.shape[1] - 1:])
+    nuevas = pd.DataFrame({col: take_sparse(izquierda[col].array, posiciones) for col in dispersas},
+                          index=datos.index)
+    return pd.concat([datos, nuevas], axis=1, copy=False)[columnas]
@@ -0,0 +1,84 @@
+"""
+Datos sintéticos compartidos por las pruebas: planillas HORAS/TOTAL con RUT
+válidos y montos enteros, con el mismo orden de columnas que las reales.
+"""
+
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from processors.sep import SEPProcessor  # noqa: E402
+
+
+def check_digit(cuerpo: int) -> str:
+    """Dígito verificador (módulo 11) del cuerpo de un RUT."""
+    suma, factor = 0, 2
+    while cuerpo:
+        suma += (cuerpo % 10) * factor
+        cuerpo //= 10
+        factor = 2 if factor == 7 else factor + 1
+    resto = 11 - suma % 11
+    return '0' if resto == 11 else 'K' if resto == 10 else str(resto)
+
+
+def sample_frames(docentes: int = 50, seed: int = 0, filas_por_docente: int = 3):
+    """
+    HORAS (columnas Rut, Nombre, RBD, ESTABLECIMIENTO, SEP, X, PIE, SN, NORMAL,
+    OTRO, como en la planilla) y TOTAL con los montos de SEP: cada docente tiene
+    entre 1 y ``filas_por_docente`` filas de horas.
+    """
+    rng = np.random.default_rng(seed)
+    cuerpos = rng.choice(np.arange(5_000_000, 25_000_000), docentes, replace=False)
+    ruts = [f"{cuerpo}-{check_digit(int(cuerpo))}" for cuerpo in cuerpos]
+    repeticiones = rng.integers(1, filas_por_docente + 1, docentes)
+    filas = len(np.repeat(ruts, repeticiones))
+    horas = pd.DataFrame({
+        'Rut': np.repeat(ruts, repeticiones),
+        'Nombre': np.repeat([f"DOCENTE {i}" for i in range(docentes)], repeticiones),
+        'RBD': rng.integers(1, 6, filas),
+        'ESTABLECIMIENTO': [f"ESCUELA {i}" for i in rng.integers(1, 6, filas)],
+        'SEP': rng.integers(0, 20, filas),
+        'X': 0,
+        'PIE': rng.integers(0, 15, filas),
+        'SN': rng.integers(0, 15, filas),
+        'NORMAL': 0,
+        'OTRO': '',
+    })
+    columnas = list(dict.fromkeys(SEPProcessor.COLUMNAS_SALARIOS))
+    montos = rng.integers(0, 900_000, (docentes, len(columnas)))
+    # Los descuentos (columnas con sangría) casi siempre van en 0
+    descuentos = np.array([col.startswith('  ') for col in columnas])
+    montos[:, descuentos] *= rng.random((docentes, descuentos.sum())) < 0.05
+    total = pd.concat([pd.DataFrame({'Rut': ruts}), pd.DataFrame(montos, columns=columnas)], axis=1)
+    return horas, total
+
+
+def write_workbook(path: Path, horas: pd.DataFrame, total: pd.DataFrame) -> Path:
+    with pd.ExcelWriter(path) as writer:
+        horas.to_excel(writer, sheet_name='HORAS', index=False)
+        total.to_excel(writer, sheet_name='TOTAL', index=False)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    """Los procesadores registran muchos avisos esperados; no se muestran en las pruebas."""
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def frames():
+    return sample_frames()
+
+
+@pytest.fixture
+def workbook(tmp_path, frames):
+    return write_workbook(tmp_path / 'planilla.xlsx', *frames)
@@ -0,0 +1,39 @@
+"""Permisos de los resultados escritos con atomic_write."""
+
+import os
+import stat
+import sys
+
+import pytest
+
+from processors.base import _UMASK, atomic_write
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="permisos POSIX")
+
+
+def _write(contenido):
+    def write(path):
+        with open(path, 'w') as file:
+            file.write(contenido)
+    return write
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_output_gets_umask_permissions(tmp_path):
+    destino = atomic_write(tmp_path / 'salida.xlsx', _write('a'))
+
+    assert _mode(destino) == 0o666 & ~_UMASK
+
+
+def test_replaced_output_keeps_its_permissions(tmp_path):
+    destino = tmp_path / 'salida.xlsx'
+    destino.write_text('antes')
+    os.chmod(destino, 0o640)
+
+    atomic_write(destino, _write('después'))
+
+    assert destino.read_text() == 'después'
+    assert _mode(destino) == 0o640
@@ -0,0 +1,67 @@
+"""Lotes: bitácora reanudable, permisos del archivo y entradas de texto (HORAS/TOTAL en CSV)."""
+
+import os
+import stat
+import sys
+
+import pytest
+
+from core.batch import BatchJournal, run_batch
+from processors.base import _UMASK
+
+
+def test_journal_survives_reload(tmp_path):
+    salida = tmp_path / 'a_sep.xlsx'
+    salida.write_bytes(b'')
+    journal = BatchJournal(tmp_path / '.remupro_lote.json')
+    key = BatchJournal.key('huella', 'sep', 1, salida.name, {'profile': True})
+
+    journal.mark_completed(key, tmp_path / 'a.xlsx', salida)
+
+    assert BatchJournal(journal.path).completed(key) == salida.resolve()
+    assert BatchJournal.key('huella', 'sep', 1, salida.name) == key
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="permisos POSIX")
+def test_journal_gets_umask_permissions(tmp_path):
+    journal = BatchJournal(tmp_path / '.remupro_lote.json')
+    journal.mark_completed('clave', tmp_path / 'a.xlsx', tmp_path / 'a_sep.xlsx')
+
+    assert stat.S_IMODE(os.stat(journal.path).st_mode) == 0o666 & ~_UMASK
+
+
+def _text_input(carpeta):
+    carpeta.mkdir()
+    (carpeta / 'HORAS.csv').write_text('Rut;Nombre;SEP\n1-9;ANA;10\n', encoding='utf-8')
+    (carpeta / 'TOTAL.csv').write_text('Rut;SUELDO BASE\n1-9;1000\n', encoding='utf-8')
+    return carpeta
+
+
+def _run(inputs, salidas, llamadas):
+    def runner(name, entradas, salida, progress_callback, options):
+        llamadas.append(entradas[0])
+        salida.write_bytes(b'')
+        return salida
+    return run_batch('sep', inputs, salidas, lambda value, message: None, runner=runner)
+
+
+def test_text_pair_is_processed_once(tmp_path):
+    carpeta = _text_input(tmp_path / 'texto')
+    llamadas = []
+
+    _run([carpeta / 'HORAS.csv', carpeta / 'TOTAL.csv', carpeta], tmp_path / 'salidas', llamadas)
+
+    assert llamadas == [carpeta / 'HORAS.csv']
+
+
+def test_resume_reprocesses_when_only_the_paired_file_changes(tmp_path):
+    carpeta = _text_input(tmp_path / 'texto')
+    llamadas = []
+    _run([carpeta / 'HORAS.csv'], tmp_path / 'salidas', llamadas)
+    _run([carpeta / 'HORAS.csv'], tmp_path / 'salidas', llamadas)
+    assert len(llamadas) == 1
+
+    (carpeta / 'TOTAL.csv').write_text('Rut;SUELDO BASE\n1-9;2000\n', encoding='utf-8')
+    _run([carpeta / 'HORAS.csv'], tmp_path / 'salidas', llamadas)
+
+    assert len(llamadas) == 2
@@ -0,0 +1,59 @@
+"""HORAS y TOTAL como archivos de texto delimitado (processors.delimited)."""
+
+import pandas as pd
+import pytest
+
+from conftest import write_workbook
+from processors.delimited import read_delimited, text_sources
+from processors.pie import PIEProcessor
+from processors.reader import SheetSchema
+
+
+def _export(carpeta, horas, total, **opciones):
+    carpeta.mkdir()
+    horas.to_csv(carpeta / 'HORAS.csv', index=False, **opciones)
+    total.to_csv(carpeta / 'TOTAL.csv', index=False, **opciones)
+    return carpeta
+
+
+def test_text_export_reads_like_the_workbook(tmp_path, frames):
+    horas, total = frames
+    horas = horas.assign(Nombre=horas['Nombre'].str.replace('DOCENTE', 'MUÑOZ'))
+    libro = write_workbook(tmp_path / 'planilla.xlsx', horas, total)
+    carpeta = _export(tmp_path / 'texto', horas, total, sep=';', decimal=',', encoding='cp1252')
+    processor = PIEProcessor()
+    processor.text_encoding = 'cp1252'
+
+    for esperado, leido in zip(PIEProcessor().read_input(libro), processor.read_input(carpeta)):
+        pd.testing.assert_frame_equal(leido, esperado)
+
+
+def test_text_sources(tmp_path, frames):
+    carpeta = _export(tmp_path / 'texto', *frames)
+    esperado = {'HORAS': carpeta / 'HORAS.csv', 'TOTAL': carpeta / 'TOTAL.csv'}
+
+    assert text_sources(carpeta) == esperado
+    # Un archivo encuentra a su pareja; un par sin nombres reconocibles es HORAS y luego TOTAL
+    assert text_sources(carpeta / 'TOTAL.csv') == esperado
+    assert text_sources([tmp_path / 'a.csv', tmp_path / 'b.csv']) == {
+        'HORAS': tmp_path / 'a.csv', 'TOTAL': tmp_path / 'b.csv'
+    }
+    assert text_sources(tmp_path / 'planilla.xlsx') is None
+
+    (carpeta / 'TOTAL.csv').unlink()
+    with pytest.raises(ValueError, match='TOTAL'):
+        text_sources(carpeta)
+    with pytest.raises(FileNotFoundError):
+        text_sources(carpeta / 'HORAS.csv')
+
+
+def test_delimiter_and_decimal(tmp_path):
+    path = tmp_path / 'HORAS.tsv'
+    path.write_text('Rut\tMONTO\tSEP\n1-9\t1.234,5\t10\n2-7\t"12,0"\tdiez\n', encoding='utf-8')
+    schema = SheetSchema(keys=('Rut',), hours=('SEP',), money=('MONTO',))
+
+    df = read_delimited(path, schema)
+
+    assert df['Rut'].tolist() == ['1-9', '2-7']
+    assert df['MONTO'].tolist() == [1234.5, 12.0]
+    assert df['SEP'].tolist() == [10, 0]
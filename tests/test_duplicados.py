@@ -0,0 +1,64 @@
+"""Consolidación de duplicados: un archivo (pandas) y mezcla de k vías de varios."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from processors.duplicados import ORIGIN_COLUMN, DuplicadosProcessor
+
+
+def _hoja(claves, montos, nombres=None):
+    return pd.DataFrame({
+        'DUPLICADOS': claves,
+        'NOMBRE': nombres or [f"N{i}" for i in range(len(claves))],
+        'MONTO': montos,
+    })
+
+
+def _write(path, hoja):
+    hoja.to_excel(path, sheet_name='Hoja1', index=False)
+    return path
+
+
+@pytest.fixture
+def hojas():
+    return [
+        _hoja(['B', 'A', None, '12.345.678-5', 'C'], [1, 2, 3, 4, 5]),
+        _hoja(['A', None, '12345678-5', 'D', 'B'], [10, 20, 30, 40, 50]),
+        _hoja(['E', 'A', None], [100, 200, 300]),
+    ]
+
+
+def test_merge_matches_single_file_consolidation(tmp_path, hojas):
+    entradas = [_write(tmp_path / f"mes_{i}.xlsx", hoja) for i, hoja in enumerate(hojas)]
+    processor = DuplicadosProcessor()
+    processor.process_files(entradas, tmp_path / 'consolidado.xlsx', lambda value, message: None)
+    mezcla = pd.read_excel(processor.saved_path)
+
+    esperado, _ = DuplicadosProcessor().process_frame(pd.concat(hojas, ignore_index=True))
+
+    columnas = ['DUPLICADOS', 'NOMBRE', 'MONTO']
+    esperado = esperado[columnas].reset_index(drop=True)
+    esperado['DUPLICADOS'] = esperado['DUPLICADOS'].where(esperado['DUPLICADOS'].notna(), np.nan)
+    pd.testing.assert_frame_equal(mezcla[columnas], esperado, check_dtype=False)
+    assert mezcla['DUPLICADOS'].tolist()[:-1] == ['12345678-5', 'A', 'B', 'C', 'D', 'E']
+    assert mezcla['MONTO'].tolist() == [34, 212, 51, 5, 40, 100, 3]
+    assert mezcla[ORIGIN_COLUMN].tolist()[:3] == ['mes_0.xlsx, mes_1.xlsx', 'mes_0.xlsx, mes_1.xlsx, mes_2.xlsx',
+                                                  'mes_0.xlsx, mes_1.xlsx']
+
+
+def test_blank_keys_are_not_summed(hojas):
+    resultado, reporte = DuplicadosProcessor().process_frame(pd.concat(hojas, ignore_index=True))
+    vacias = resultado[resultado['DUPLICADOS'].isna()]
+    assert len(vacias) == 1 and vacias['MONTO'].item() == 3
+    assert reporte['filas_eliminadas'] == 13 - 7
+
+
+def test_polars_engine_matches_pandas(hojas):
+    pytest.importorskip('polars')
+    entrada = pd.concat(hojas, ignore_index=True)
+    pandas_resultado, _ = DuplicadosProcessor().process_frame(entrada)
+    processor = DuplicadosProcessor()
+    processor.engine = 'polars'
+    polars_resultado, _ = processor.process_frame(entrada)
+    pd.testing.assert_frame_equal(polars_resultado.reset_index(drop=True), pandas_resultado.reset_index(drop=True))
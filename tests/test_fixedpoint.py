@@ -0,0 +1,76 @@
+"""Prorrateo exacto: reparto por el resto mayor que suma exactamente el monto de TOTAL."""
+
+import numpy as np
+import pandas as pd
+
+from conftest import sample_frames
+from processors.fixedpoint import ExactSplitter, merge_rows
+from processors.pie import PIEProcessor
+from processors.sep import SEPProcessor
+
+
+def test_largest_remainder_split():
+    # Grupo 0: tres filas con las mismas horas; grupo 1: una fila sin horas; grupo 2: sin horas
+    repartidor = ExactSplitter([0, 0, 0, 1, 1, 2], [[100, 100, 100, 300, 0, 0]])
+
+    reparto = repartidor.split([100, 100, 100, 7, 7, 5])[:, 0]
+
+    # A igual resto el peso que falta va a la primera fila
+    assert reparto.tolist() == [34, 33, 33, 7, 0, 0]
+
+
+def test_split_of_unsorted_groups():
+    repartidor = ExactSplitter([1, 0, 1, 0], [[1, 1, 2, 1], [0, 1, 0, 0]])
+
+    reparto = repartidor.split([10, 5, 10, 5])
+
+    assert reparto.tolist() == [[3, 0], [2, 2], [7, 0], [1, 0]]
+
+
+def test_split_of_selected_rows_matches_full_split():
+    repartidor = ExactSplitter([0, 0, 1, 1, 2], [[1, 2, 1, 1, 1]])
+
+    completo = repartidor.split([5, 5, 0, 0, 3])
+    parcial = repartidor.split([5, 5, 3], filas=np.array([0, 1, 4]))
+
+    np.testing.assert_array_equal(parcial, completo[[0, 1, 4]])
+
+
+def test_merge_rows_follows_left_merge():
+    izquierda = pd.Series(['a', 'b', None, 'c'])
+    derecha = pd.Series(['a', 'a', None, None, 'c'])
+
+    assert merge_rows(izquierda, derecha).tolist() == [0, 0, 1, 2, 2, 3]
+
+
+def _teacher_sums(resultado, columnas):
+    return resultado.groupby('Rut')[columnas].sum()
+
+
+def test_sep_exact_proration_adds_up_to_total():
+    horas, total = sample_frames(docentes=200, seed=3)
+    processor = SEPProcessor()
+    processor.proration = 'exacto'
+
+    resultado, _ = processor.process_frames(horas, total)
+
+    con_horas = horas.groupby('Rut')['SEP'].sum().loc[lambda s: s > 0].index
+    montos = total.set_index('Rut').loc[con_horas, SEPProcessor.COLUMNAS_SALARIOS[:20]]
+    prorrateados = _teacher_sums(resultado, [f"{col}_SEP" for col in montos.columns]).loc[con_horas]
+    np.testing.assert_array_equal(prorrateados.to_numpy(), montos.to_numpy())
+
+
+def test_pie_exact_proration_adds_up_to_total():
+    horas, total = sample_frames(docentes=200, seed=4)
+    processor = PIEProcessor()
+    processor.proration = 'exacto'
+
+    resultado, _ = processor.process_frames(horas, total)
+
+    sumas = horas.groupby('Rut')[['PIE', 'SN']].sum().sum(axis=1)
+    con_horas = sumas[sumas > 0].index
+    columnas = PIEProcessor.COLUMNAS_ESPECIALES
+    montos = total.set_index('Rut').loc[con_horas, columnas].to_numpy()
+    pie = _teacher_sums(resultado, [f"{col} PIE" for col in columnas]).loc[con_horas].to_numpy()
+    sn = _teacher_sums(resultado, [f"{col} SN" for col in columnas]).loc[con_horas].to_numpy()
+    np.testing.assert_array_equal(pie + sn, montos)
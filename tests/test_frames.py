@@ -0,0 +1,38 @@
+"""Procesamiento en memoria (process_frames) con las columnas de HORAS tomadas por nombre."""
+
+import pandas as pd
+import pytest
+
+from processors.pie import PIEProcessor
+from processors.sep import SEPProcessor
+from processors.sparse import densify
+
+
+def _file_result(processor_class, workbook):
+    processor = processor_class()
+    df_horas, df_total = processor.load_data(workbook)
+    return processor.select_output(densify(processor.process_input(df_horas, df_total)))
+
+
+@pytest.mark.parametrize('processor_class', [SEPProcessor, PIEProcessor])
+def test_frames_returned_by_read_input(processor_class, workbook):
+    horas, total = processor_class().read_input(workbook)
+
+    resultado, _ = processor_class().process_frames(horas, total)
+
+    pd.testing.assert_frame_equal(resultado, _file_result(processor_class, workbook))
+
+
+@pytest.mark.parametrize('processor_class', [SEPProcessor, PIEProcessor])
+def test_reordered_hours_columns(processor_class, workbook):
+    horas, total = processor_class().read_input(workbook)
+
+    resultado, _ = processor_class().process_frames(horas[horas.columns[::-1]], total)
+
+    pd.testing.assert_frame_equal(resultado, _file_result(processor_class, workbook), check_like=True)
+
+
+def test_missing_hours_column_is_reported(frames):
+    horas, total = frames
+    with pytest.raises(ValueError, match='SN'):
+        PIEProcessor().process_frames(horas.drop(columns='SN'), total)
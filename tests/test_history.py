@@ -0,0 +1,27 @@
+"""Consultas del historial con RUT escritos de distintas formas."""
+
+import pandas as pd
+import pytest
+
+from core.history import HistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    with HistoryStore(tmp_path / 'historial.sqlite') as store:
+        resultado = pd.DataFrame({
+            'Rut': ['15425000-K', ' 15.425.000-k ', '5126663-3'],
+            'Nombre': ['ANA', 'ANA', 'LUIS'],
+            'SUELDO BASE_SEP': [100, 50, 30],
+        })
+        store.append(resultado, '2024-03', 'SEP', ['SUELDO BASE_SEP'])
+        yield store
+
+
+@pytest.mark.parametrize('rut', ['15425000-K', '15.425.000-k', ' 15425000k', '15425000-k'])
+def test_by_rut_matches_any_rut_format(store, rut):
+    assert store.by_rut(rut) == [('2024-03', 'SEP', 'SUELDO BASE_SEP', 150.0)]
+
+
+def test_by_period_filters_by_canonical_rut(store):
+    assert store.by_period('2024-03', rut='5.126.663-3') == [('SEP', '5126663-3', 'LUIS', 'SUELDO BASE_SEP', 30.0)]
@@ -0,0 +1,14 @@
+"""El log no crea directorios al importarse, solo al configurarse."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def test_import_creates_no_directories(tmp_path):
+    entorno = {'HOME': str(tmp_path), 'USERPROFILE': str(tmp_path), 'PYTHONPATH': str(RAIZ)}
+    codigo = "import core.logging_setup, core.profiling, core.cli"
+    subprocess.run([sys.executable, '-c', codigo], env=entorno, cwd=tmp_path, check=True)
+    assert list(tmp_path.iterdir()) == []
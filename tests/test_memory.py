@@ -0,0 +1,36 @@
+"""
+Regresión de memoria de SEP/PIE: el pico de memoria del proceso (validación,
+cruce, prorrateo y conciliación) debe quedar bajo un múltiplo fijo del tamaño
+de HORAS y TOTAL ya tipados, como quedan al leer la planilla. Una copia
+completa de más de la planilla ancha sube la proporción en al menos 1, por lo
+que los límites dejan poco margen.
+"""
+
+import tracemalloc
+
+import pytest
+
+from conftest import sample_frames
+from processors.pie import PIEProcessor
+from processors.sep import SEPProcessor
+
+# Pico de memoria permitido, como múltiplo del tamaño de la entrada tipada
+MAX_PEAK_RATIO = {SEPProcessor: 7, PIEProcessor: 10}
+
+
+@pytest.mark.parametrize('processor_class', [SEPProcessor, PIEProcessor])
+def test_peak_memory_within_input_multiple(processor_class):
+    processor = processor_class()
+    df_horas, df_total = processor.frames_input(*sample_frames(docentes=2000, seed=1))
+    entrada = df_horas.memory_usage(deep=True).sum() + df_total.memory_usage(deep=True).sum()
+
+    tracemalloc.start()
+    try:
+        processor.process_input(df_horas, df_total)
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert pico / entrada < MAX_PEAK_RATIO[processor_class], (
+        f"Pico de {pico / 2**20:.1f} MiB para una entrada de {entrada / 2**20:.1f} MiB"
+    )
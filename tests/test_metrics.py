@@ -0,0 +1,38 @@
+"""Registro de métricas: la memoria máxima es la de cada ejecución."""
+
+import sys
+from types import SimpleNamespace
+
+from core.metrics import MetricsStore, RunPeakMemory, recorded_run
+
+MB = 2**20
+
+
+def _run(tmp_path, reservar_mb):
+    processor = SimpleNamespace(result=None, input_shape=(10, 2), output_profile='',
+                                metrics_path=tmp_path / 'metricas.sqlite')
+    with recorded_run(processor, 'sep', []):
+        bloque = bytearray(reservar_mb * MB)
+        bloque[::4096] = b'\1' * len(bloque[::4096])
+        del bloque
+    with MetricsStore(processor.metrics_path) as store:
+        return store.runs()[-1]['memoria_pico']
+
+
+def test_peak_memory_is_measured_per_run(tmp_path):
+    grande = _run(tmp_path, 200)
+    pequena = _run(tmp_path, 1)
+
+    assert grande is not None and grande >= 200 * MB
+    # La ejecución pequeña no hereda el máximo de la anterior
+    assert pequena is None or pequena < grande - 150 * MB
+
+
+def test_overlapping_runs_do_not_record_a_peak():
+    primera = RunPeakMemory()
+    segunda = RunPeakMemory()
+
+    assert segunda.result() is None
+    assert primera.result() is None
+    # Sin otra ejecución en curso se vuelve a medir
+    assert RunPeakMemory().result() is not None or sys.platform != 'linux'
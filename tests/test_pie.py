@@ -0,0 +1,36 @@
+"""Relleno de vacíos de PIE sin la inferencia de tipos deprecada de fillna."""
+
+import warnings
+
+import pandas as pd
+
+from conftest import sample_frames
+from processors.pie import PIEProcessor, fill_zeros
+
+
+def test_fill_zeros_converts_numeric_text_columns():
+    df = pd.DataFrame({
+        'enteros': pd.Series([1, None, 3], dtype=object),
+        'decimales': pd.Series([1.5, None, 2], dtype=object),
+        'texto': pd.Series(['a', None, 'c'], dtype=object),
+        'numero': [1.0, None, 2.0],
+    })
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        fill_zeros(df, df.columns)
+    assert df['enteros'].tolist() == [1, 0, 3] and df['enteros'].dtype == 'int64'
+    assert df['decimales'].tolist() == [1.5, 0, 2] and df['decimales'].dtype == 'float64'
+    assert df['texto'].tolist() == ['a', 0, 'c']
+    assert df['numero'].tolist() == [1.0, 0.0, 2.0]
+
+
+def test_unmatched_rows_process_without_warnings():
+    horas, total = sample_frames(docentes=20)
+    total['OBSERVACION'] = pd.Series([1, None] * 10, dtype=object)
+    # Docentes de TOTAL sin horas: sus columnas de HORAS quedan vacías tras el cruce
+    horas = horas[horas['Rut'] != total['Rut'].iloc[0]]
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', FutureWarning)
+        resultado, _ = PIEProcessor().process_frames(horas, total)
+    assert resultado['OBSERVACION'].dtype == 'int64'
+    assert not resultado[['OBSERVACION', 'ESTABLECIMIENTO', 'PIE', 'SN']].isna().any().any()
@@ -0,0 +1,30 @@
+"""Perfilado: memoria por etapa y nombres de reporte únicos."""
+
+from core.profiling import profiled, report_paths
+from processors.base import BaseProcessor
+
+
+def test_snapshot_taken_at_stage_with_highest_peak(tmp_path):
+    processor = BaseProcessor()
+    with profiled('prueba', log_dir=tmp_path, processor=processor):
+        with processor.timed('chica'):
+            bytearray(1 << 20)
+        with processor.timed('grande'):
+            temporal = bytearray(32 << 20)
+            del temporal
+        with processor.timed('chica'):
+            pass
+
+    assert processor.stage_listener is None
+    reporte = next(tmp_path.glob('*_memoria.txt')).read_text(encoding='utf-8')
+    etapas = reporte.split("Pico de memoria por etapa:\n")[1].splitlines()
+    assert etapas[0].startswith("  grande: 3") and etapas[1].startswith("  chica: 1")
+    assert "la etapa de mayor pico, grande" in reporte
+
+
+def test_report_paths_are_unique(tmp_path):
+    primero, _ = report_paths(tmp_path, 'sep')
+    primero.touch()
+    segundo, memoria = report_paths(tmp_path, 'sep')
+    assert segundo != primero and not segundo.exists()
+    assert memoria.name == segundo.name.replace('.prof', '_memoria.txt')
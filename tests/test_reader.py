@@ -0,0 +1,80 @@
+"""Lector de hojas Excel con esquema declarado (processors.reader)."""
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from processors.reader import INVALID_CELLS, SheetSchema, _read_sheet, read_sheet, read_sheets
+from processors.sep import SEPProcessor
+
+
+def _workbook(path, filas):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'HORAS'
+    for fila in filas:
+        ws.append(fila)
+    wb.save(path)
+    return path
+
+
+def test_declared_types(tmp_path):
+    path = _workbook(tmp_path / 'libro.xlsx', [
+        ('Rut', 'Nombre', 'SEP', 'MONTO', 'OTRA'),
+        (12345678, ' ANA ', 10, '1.234.567', 'x'),
+        ('9876543-2', 'LUIS', None, 1500, None),
+        ('5555555-5', 'EVA', 'abc', '12,5', 3),
+        (None, None, None, None, None),
+    ])
+    schema = SheetSchema(keys=('Rut', 'Nombre'), hours=('SEP',), money=('MONTO',), usecols=(0, 1, 2, 3))
+
+    df = read_sheet(path, 'HORAS', schema)
+
+    assert list(df.columns) == ['Rut', 'Nombre', 'SEP', 'MONTO']
+    # Las filas vacías del final se descartan, como en read_excel
+    assert len(df) == 3
+    assert df['Rut'].tolist() == ['12345678', '9876543-2', '5555555-5']
+    assert df['Nombre'].tolist() == ['ANA', 'LUIS', 'EVA']
+    assert df['SEP'].dtype == np.int16 and df['SEP'].tolist() == [10, 0, 0]
+    # Con un decimal el monto queda en float64
+    assert df['MONTO'].tolist() == [1234567, 1500, 12.5]
+    assert df.attrs[INVALID_CELLS] == {'SEP': ['abc']}
+
+
+def test_undeclared_columns_match_read_excel(workbook):
+    esperado = pd.read_excel(workbook, sheet_name=['HORAS', 'TOTAL'])
+
+    hojas = read_sheets(workbook, {'HORAS': SheetSchema(), 'TOTAL': SheetSchema()})
+
+    for hoja in ('HORAS', 'TOTAL'):
+        pd.testing.assert_frame_equal(hojas[hoja], esperado[hoja])
+
+
+def test_read_input_types(workbook, frames):
+    horas, total = SEPProcessor().read_input(workbook)
+
+    assert horas['SEP'].dtype == np.int16
+    # Los montos casi siempre en 0 quedan dispersos (ver processors.sparse)
+    montos = [total[col].dtype for col in SEPProcessor().prorate_sources() if col in total]
+    assert montos and all(getattr(dtype, 'subtype', dtype) == np.int64 for dtype in montos)
+    pd.testing.assert_series_equal(horas['Rut'], frames[0]['Rut'].astype(object))
+
+
+class _SheetWithoutDimensions:
+    """Hoja que no informa sus dimensiones (algunos exportadores no las escriben)."""
+    max_row = None
+
+    def __init__(self, filas):
+        self.filas = filas
+
+    def iter_rows(self, values_only=True):
+        return iter(self.filas)
+
+
+def test_rows_beyond_initial_capacity():
+    filas = [('Rut', 'SEP')] + [(str(i), i % 40) for i in range(3000)]
+
+    df = _read_sheet(_SheetWithoutDimensions(filas), SheetSchema(keys=('Rut',), hours=('SEP',)), 'HORAS')
+
+    assert len(df) == 3000
+    assert df['Rut'].iloc[-1] == '2999' and df['SEP'].sum() == sum(i % 40 for i in range(3000))
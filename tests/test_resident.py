@@ -0,0 +1,22 @@
+"""Clave de autenticación del proceso residente."""
+
+import stat
+import sys
+
+import pytest
+
+from core import resident
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="permisos POSIX")
+def test_authkey_is_private_from_creation(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    key_path = resident._authkey_path(resident.default_address())
+    key_path.write_bytes(b'clave anterior')
+
+    resident._write_authkey(key_path, b'clave nueva')
+
+    assert key_path.parent.parent == tmp_path / '.remupro'
+    assert stat.S_IMODE(key_path.parent.stat().st_mode) == 0o700
+    assert stat.S_IMODE(key_path.stat().st_mode) == 0o600
+    assert key_path.read_bytes() == b'clave nueva'
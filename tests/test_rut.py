@@ -0,0 +1,46 @@
+"""Canonización y validación (módulo 11) de RUT."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from processors.duplicados import DuplicadosProcessor
+from processors.rut import normalize_ruts
+
+
+@pytest.mark.parametrize('texto, canonico', [
+    ('12.345.678-5', '12345678-5'),
+    (' 12345678-5 ', '12345678-5'),
+    ('123456785', '12345678-5'),
+    ('5.126.663-3', '5126663-3'),
+    ('15.425.000-k', '15425000-K'),
+    ('15425000K', '15425000-K'),
+    ('015425000-K', '15425000-K'),
+])
+def test_valid_ruts_are_canonicalized(texto, canonico):
+    normalizados, es_rut, valido = normalize_ruts(pd.Series([texto]))
+    assert normalizados.iloc[0] == canonico and es_rut[0] and valido[0]
+
+
+def test_numeric_column_is_canonicalized():
+    normalizados, _, valido = normalize_ruts(pd.Series([123456785, 51266633]))
+    assert list(normalizados) == ['12345678-5', '5126663-3'] and valido.all()
+
+
+@pytest.mark.parametrize('texto', ['19', '108', '1-9', '10-8', '12345678', 'ABC', '12.345-6'])
+def test_codes_and_bare_bodies_are_kept(texto):
+    normalizados, es_rut, valido = normalize_ruts(pd.Series([texto]))
+    assert normalizados.iloc[0] == texto and not es_rut[0] and not valido[0]
+
+
+def test_wrong_check_digit_with_separator_is_reported_as_rut():
+    normalizados, es_rut, valido = normalize_ruts(pd.Series(['12.345.678-9', None]))
+    assert normalizados.iloc[0] == '12345678-9' and es_rut[0] and not valido[0]
+    assert pd.isna(normalizados.iloc[1]) and not es_rut[1]
+
+
+def test_duplicate_keys_keep_short_codes():
+    hoja = pd.DataFrame({'DUPLICADOS': ['19', '108', '12345678', ' 12.345.678-5', '12345678-9', np.nan]})
+    invalidos = DuplicadosProcessor().normalize_duplicate_keys(hoja)
+    assert hoja['DUPLICADOS'].tolist()[:5] == ['19', '108', '12345678', '12345678-5', '12345678-9']
+    assert invalidos == ['12345678-9']
@@ -0,0 +1,42 @@
+"""Retención de trabajos del servicio HTTP (sin iniciar el pool ni el servidor)."""
+
+from concurrent.futures import Future
+
+from core.service import Job, ProcessingService
+
+
+def _finished_job(service, job_id, finished):
+    job = Job(job_id, 'sep', service.workdir / job_id)
+    job.directory.mkdir()
+    job.state, job.finished = 'completado', finished
+    service.jobs[job_id] = job
+    return job
+
+
+def test_evicts_expired_and_excess_finished_jobs(tmp_path):
+    service = ProcessingService(workdir=tmp_path, result_ttl=100, max_finished=2)
+    vencido = _finished_job(service, 'vencido', finished=0)
+    antiguo = _finished_job(service, 'antiguo', finished=950)
+    recientes = [_finished_job(service, f'reciente{i}', finished=960 + i) for i in range(2)]
+    activo = Job('activo', 'pie', tmp_path / 'activo')
+    service.jobs['activo'] = activo
+
+    assert service.evict_finished(now=1000) == 2
+
+    assert set(service.jobs) == {'activo', 'reciente0', 'reciente1'}
+    assert not vencido.directory.exists() and not antiguo.directory.exists()
+    assert all(job.directory.exists() for job in recientes)
+
+
+def test_finish_keeps_the_path_returned_by_the_processor(tmp_path):
+    service = ProcessingService(workdir=tmp_path)
+    job = Job('trabajo', 'duplicados', tmp_path / 'trabajo')
+    service.jobs[job.id] = job
+    future = Future()
+    future.set_result(str(job.directory / 'resultado (1).xlsx'))
+
+    service._finish(job, future)
+
+    assert job.state == 'completado'
+    assert job.output_path == job.directory / 'resultado (1).xlsx'
+    assert job.finished is not None
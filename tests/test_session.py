@@ -0,0 +1,69 @@
+"""Sesión de simulación: el recálculo por docente coincide con reprocesar la planilla."""
+
+import pandas as pd
+import pytest
+
+from conftest import sample_frames, write_workbook
+from processors.base import MAX_HOURS
+from processors.pie import PIEProcessor
+from processors.sep import SEPProcessor
+from processors.session import WhatIfSession
+from processors.sparse import densify
+
+
+def _processed(processor_class, path):
+    processor = processor_class()
+    df_horas, df_total = processor.load_data(path)
+    return densify(processor.process_data(df_horas, df_total)).reset_index(drop=True)
+
+
+def _single_row_teacher(horas, columna):
+    filas = horas.groupby('Rut').size()
+    return next(rut for rut in filas[filas == 1].index if horas.loc[horas['Rut'] == rut, columna].iloc[0] > 0)
+
+
+@pytest.mark.parametrize('processor_class, columna', [(SEPProcessor, 'SEP'), (PIEProcessor, 'PIE')])
+def test_edits_match_reprocessing(tmp_path, processor_class, columna):
+    horas, total = sample_frames(docentes=40, seed=5)
+    rut = _single_row_teacher(horas, columna)
+    session = WhatIfSession(processor_class(), write_workbook(tmp_path / 'planilla.xlsx', horas, total))
+
+    session.set_hours(rut, columna, 30)
+    session.set_amount(rut, 'SUELDO BASE', 1_000_001)
+    # Horas en 0: en SEP el docente pierde sus filas válidas
+    otro = _single_row_teacher(horas[horas['Rut'] != rut], columna)
+    session.set_hours(otro, columna, 0)
+
+    horas.loc[horas['Rut'] == rut, columna] = 30
+    horas.loc[horas['Rut'] == otro, columna] = 0
+    total.loc[total['Rut'] == rut, 'SUELDO BASE'] = 1_000_001
+    esperado = _processed(processor_class, write_workbook(tmp_path / 'editada.xlsx', horas, total))
+    pd.testing.assert_frame_equal(session.ordered_result(), esperado, check_dtype=False)
+    assert session.edited == {rut, otro}
+
+
+def test_hours_limit_and_save(tmp_path):
+    horas, total = sample_frames(docentes=20, seed=6)
+    rut = _single_row_teacher(horas, 'SEP')
+    session = WhatIfSession(SEPProcessor(), write_workbook(tmp_path / 'planilla.xlsx', horas, total))
+    salida = tmp_path / 'simulacion.xlsx'
+
+    session.set_hours(rut, 'SEP', MAX_HOURS + 1)
+
+    assert session.exceeds_limit(rut)
+    assert rut in session.over_limit()['Rut'].tolist()
+    assert not salida.exists()
+    assert session.save(salida).exists()
+
+
+def test_rejected_edits(tmp_path):
+    horas, total = sample_frames(docentes=20, seed=7)
+    session = WhatIfSession(SEPProcessor(), write_workbook(tmp_path / 'planilla.xlsx', horas, total))
+    varias = horas.groupby('Rut').size().loc[lambda s: s > 1].index[0]
+
+    with pytest.raises(KeyError):
+        session.teacher('11111111-1')
+    with pytest.raises(ValueError, match='Columna de horas'):
+        session.set_hours(varias, 'PIE', 1)
+    with pytest.raises(ValueError, match='indique'):
+        session.set_hours(varias, 'SEP', 1)
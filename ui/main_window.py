@@ -1,33 +1,27 @@
 import sys
 import logging
 from pathlib import Path
+from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QLabel,
-    QProgressBar, QFileDialog, QMessageBox, QComboBox, QHBoxLayout, QFrame
+    QProgressBar, QFileDialog, QMessageBox, QComboBox, QHBoxLayout, QFrame, QCheckBox
 )
 from processors.sep import SEPProcessor
 from processors.pie import PIEProcessor
 from processors.duplicados import DuplicadosProcessor
-from core.workers import ProcessorWorker, DuplicadosWorker
+from processors.base import OUTPUT_PROFILES, PRORATION_MODES
+from core.workers import ProcessorWorker, DuplicadosWorker, ConsolidacionWorker, PreviewWorker
+from core.logging_setup import configure_logging
+from ui.preview import PreviewPanel
 
 # Configuración de logging
-log_path = Path.home() / "AppData" / "Local" / "RemuPro" / "logs" if sys.platform == 'win32' else Path('.')
-log_path.mkdir(parents=True, exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_path / 'proceso_remuneraciones.log'),
-        logging.StreamHandler()
-    ]
-)
+configure_logging()
 
 class ExcelProcessorApp(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("RemuPro | v1.0")
-        self.resize(700, 600)
+        self.resize(900, 750)
         
         # Variables para SEP/PIE
         self.input_path = None
@@ -39,6 +33,7 @@ class ExcelProcessorApp(QWidget):
         self.input_dup2 = None
         self.output_dup = None
         self.worker_dup = None
+        self.worker_preview = None
         
         self.init_ui()
     
@@ -54,6 +49,26 @@ class ExcelProcessorApp(QWidget):
         modo_layout.addWidget(self.combo_modo)
         layout.addLayout(modo_layout)
         
+        perfil_layout = QHBoxLayout()
+        lbl_perfil = QLabel("Columnas de salida:")
+        self.combo_perfil = QComboBox()
+        for nombre, descripcion in OUTPUT_PROFILES.items():
+            self.combo_perfil.addItem(nombre.capitalize(), nombre)
+            self.combo_perfil.setItemData(self.combo_perfil.count() - 1, descripcion, Qt.ToolTipRole)
+        perfil_layout.addWidget(lbl_perfil)
+        perfil_layout.addWidget(self.combo_perfil)
+        layout.addLayout(perfil_layout)
+
+        prorrateo_layout = QHBoxLayout()
+        lbl_prorrateo = QLabel("Prorrateo:")
+        self.combo_prorrateo = QComboBox()
+        for nombre, descripcion in PRORATION_MODES.items():
+            self.combo_prorrateo.addItem(nombre.capitalize(), nombre)
+            self.combo_prorrateo.setItemData(self.combo_prorrateo.count() - 1, descripcion, Qt.ToolTipRole)
+        prorrateo_layout.addWidget(lbl_prorrateo)
+        prorrateo_layout.addWidget(self.combo_prorrateo)
+        layout.addLayout(prorrateo_layout)
+        
         self.label_input = QLabel("Archivo Excel de entrada: No seleccionado")
         self.btn_select_input = QPushButton("Seleccionar Archivo Excel")
         self.btn_select_input.clicked.connect(self.select_input_file)
@@ -62,18 +77,32 @@ class ExcelProcessorApp(QWidget):
         self.btn_select_output = QPushButton("Seleccionar destino")
         self.btn_select_output.clicked.connect(self.select_output_file)
         
+        preview_layout = QHBoxLayout()
+        self.combo_hoja = QComboBox()
+        self.combo_hoja.addItems(["HORAS", "TOTAL"])
+        self.btn_preview_input = QPushButton("Vista previa de entrada")
+        self.btn_preview_input.clicked.connect(self.preview_input)
+        self.btn_preview_input.setEnabled(False)
+        preview_layout.addWidget(self.combo_hoja)
+        preview_layout.addWidget(self.btn_preview_input)
+        
         self.btn_start = QPushButton("Iniciar Proceso")
         self.btn_start.clicked.connect(self.start_process)
         self.btn_start.setEnabled(False)
         
+        self.check_profile = QCheckBox("Modo perfilado (diagnóstico de rendimiento)")
+        self.check_profile.setToolTip("Guarda un perfil de tiempo y memoria junto al archivo de log")
+        
         self.progress_bar = QProgressBar()
         self.status_label = QLabel("Esperando acción...")
         
         layout.addWidget(self.label_input)
         layout.addWidget(self.btn_select_input)
+        layout.addLayout(preview_layout)
         layout.addWidget(self.label_output)
         layout.addWidget(self.btn_select_output)
         layout.addWidget(self.btn_start)
+        layout.addWidget(self.check_profile)
         layout.addWidget(self.progress_bar)
         layout.addWidget(self.status_label)
         
@@ -109,6 +138,9 @@ class ExcelProcessorApp(QWidget):
         self.btn_start_dup.clicked.connect(self.start_duplicados_process)
         self.btn_start_dup.setEnabled(False)
         
+        self.btn_consolidar = QPushButton("Consolidar varios archivos (Hoja1 por DUPLICADOS)...")
+        self.btn_consolidar.clicked.connect(self.start_consolidacion)
+        
         # Agregar controles de Duplicados al layout del contenedor
         dup_layout.addWidget(self.label_input_dup1)
         dup_layout.addWidget(self.btn_select_input_dup1)
@@ -117,11 +149,17 @@ class ExcelProcessorApp(QWidget):
         dup_layout.addWidget(self.label_output_dup)
         dup_layout.addWidget(self.btn_select_output_dup)
         dup_layout.addWidget(self.btn_start_dup)
+        dup_layout.addWidget(self.btn_consolidar)
         
         self.dup_frame.setLayout(dup_layout)
         self.dup_frame.hide()  # Ocultar por defecto
         layout.addWidget(self.dup_frame)
         
+        # --- Vista previa de tablas (oculta hasta cargar una) ---
+        self.preview = PreviewPanel()
+        self.preview.hide()
+        layout.addWidget(self.preview, stretch=1)
+        
         self.setLayout(layout)
     
     def toggle_dup_options(self, checked):
@@ -136,13 +174,14 @@ class ExcelProcessorApp(QWidget):
     def select_input_file(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Seleccionar archivo Excel", str(Path.home()),
-            "Excel Files (*.xlsx *.xls)"
+            "Excel Files (*.xlsx *.xls);;Texto HORAS/TOTAL (*.csv *.tsv *.txt)"
         )
         if file_path:
             self.input_path = Path(file_path)
-            self.label_input.setText(f"Archivo Excel de entrada: {self.input_path}")
+            self.label_input.setText(f"Archivo de entrada: {self.input_path}")
             self.output_path = None
             self.label_output.setText("Guardar archivo en: No seleccionado")
+            self.btn_preview_input.setEnabled(True)
             self.check_enable_start()
     
     def select_output_file(self):
@@ -163,6 +202,31 @@ class ExcelProcessorApp(QWidget):
     def check_enable_start(self):
         self.btn_start.setEnabled(bool(self.input_path and self.output_path))
     
+    def preview_input(self):
+        if not self.input_path:
+            return
+        self.btn_preview_input.setEnabled(False)
+        self.status_label.setText(f"Cargando vista previa de {self.combo_hoja.currentText()}...")
+        self.worker_preview = PreviewWorker(self.input_path, self.combo_hoja.currentText())
+        self.worker_preview.loaded_signal.connect(self.preview_loaded)
+        self.worker_preview.error_signal.connect(self.preview_error)
+        self.worker_preview.start()
+    
+    def preview_loaded(self, df, title):
+        self.preview.show_frame(df, title)
+        self.btn_preview_input.setEnabled(self.input_path is not None)
+        self.status_label.setText("Esperando acción...")
+    
+    def preview_error(self, error_msg):
+        QMessageBox.warning(self, "Vista previa", f"No se pudo cargar la vista previa:\n{error_msg}")
+        self.btn_preview_input.setEnabled(self.input_path is not None)
+        self.status_label.setText("Esperando acción...")
+    
+    def show_result_preview(self, worker, output_path_str):
+        result = getattr(worker.processor, 'result', None)
+        if result is not None:
+            self.preview.show_frame(result, f"resultado {Path(output_path_str).name}")
+    
     def start_process(self):
         if not self.input_path or not self.output_path:
             QMessageBox.warning(self, "Error", "Debe seleccionar archivo de entrada y destino.")
@@ -184,6 +248,9 @@ class ExcelProcessorApp(QWidget):
             self.reset_ui()
             return
         
+        processor.profile = self.check_profile.isChecked()
+        processor.output_profile = self.combo_perfil.currentData()
+        processor.proration = self.combo_prorrateo.currentData()
         self.worker = ProcessorWorker(processor, self.input_path, self.output_path)
         self.worker.progress_signal.connect(self.update_progress)
         self.worker.finished_signal.connect(self.process_finished)
@@ -242,17 +309,47 @@ class ExcelProcessorApp(QWidget):
         self.status_label.setText("Iniciando proceso de duplicados...")
         
         processor = DuplicadosProcessor()
+        processor.profile = self.check_profile.isChecked()
         self.worker_dup = DuplicadosWorker(processor, self.input_dup1, self.input_dup2, self.output_dup)
         self.worker_dup.progress_signal.connect(self.update_progress)
         self.worker_dup.finished_signal.connect(self.process_finished_dup)
         self.worker_dup.error_signal.connect(self.process_error)
         self.worker_dup.start()
     
+    def start_consolidacion(self):
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Seleccionar archivos a consolidar", str(Path.home()),
+            "Excel Files (*.xlsx)"
+        )
+        if not file_paths:
+            return
+        input_paths = [Path(p) for p in file_paths]
+        default_path = str(Path.home() / "Downloads" / f"consolidado_{len(input_paths)}_archivos.xlsx")
+        output_path, _ = QFileDialog.getSaveFileName(
+            self, "Guardar consolidado", default_path, "Excel Files (*.xlsx)"
+        )
+        if not output_path:
+            return
+        
+        self.btn_consolidar.setEnabled(False)
+        self.btn_start_dup.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.status_label.setText(f"Consolidando {len(input_paths)} archivos...")
+        
+        processor = DuplicadosProcessor()
+        processor.profile = self.check_profile.isChecked()
+        self.worker_dup = ConsolidacionWorker(processor, input_paths, Path(output_path))
+        self.worker_dup.progress_signal.connect(self.update_progress)
+        self.worker_dup.finished_signal.connect(self.process_finished_dup)
+        self.worker_dup.error_signal.connect(self.process_error)
+        self.worker_dup.start()
+    
     def update_progress(self, value, message):
         self.progress_bar.setValue(value)
         self.status_label.setText(message)
     
     def process_finished(self, output_path_str):
+        self.show_result_preview(self.worker, output_path_str)
         reply = QMessageBox.question(
             self,
             "Proceso completado",
@@ -266,6 +363,7 @@ class ExcelProcessorApp(QWidget):
             self.close()
     
     def process_finished_dup(self, output_path_str):
+        self.show_result_preview(self.worker_dup, output_path_str)
         reply = QMessageBox.question(
             self,
             "Proceso de Duplicados completado",
@@ -291,6 +389,7 @@ class ExcelProcessorApp(QWidget):
         self.btn_start.setEnabled(False)
         self.btn_select_input.setEnabled(True)
         self.btn_select_output.setEnabled(True)
+        self.btn_preview_input.setEnabled(False)
         
         # Reinicia controles para Duplicados
         self.input_dup1 = None
@@ -303,6 +402,7 @@ class ExcelProcessorApp(QWidget):
         self.btn_select_input_dup1.setEnabled(True)
         self.btn_select_input_dup2.setEnabled(True)
         self.btn_select_output_dup.setEnabled(True)
+        self.btn_consolidar.setEnabled(True)
         
         self.status_label.setText("Esperando acción...")
         self.progress_bar.setValue(0)
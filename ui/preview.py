@@ -0,0 +1,71 @@
+import pandas as pd
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QGroupBox, QHBoxLayout, QHeaderView, QLabel, QLineEdit, QTableView, QVBoxLayout
+
+from ui.table_model import DataFrameTableModel
+
+# Espera tras la última tecla antes de aplicar el filtro
+FILTER_DELAY_MS = 200
+ROW_HEIGHT = 22
+COLUMN_WIDTH = 120
+
+
+class PreviewPanel(QGroupBox):
+    """Vista previa de una tabla (entrada o resultado) sin abrirla en Excel."""
+
+    def __init__(self, parent=None):
+        super().__init__("Vista previa", parent)
+        self.model = DataFrameTableModel(parent=self)
+
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filtrar por Rut o Nombre...")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.info_label = QLabel("")
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(FILTER_DELAY_MS)
+        self._filter_timer.timeout.connect(self.apply_filter)
+        self.filter_edit.textChanged.connect(self._filter_timer.start)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.setAlternatingRowColors(True)
+        self.table.setWordWrap(False)
+        # Tamaños fijos: la vista no mide el contenido de cada fila o columna
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(ROW_HEIGHT)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setDefaultSectionSize(COLUMN_WIDTH)
+        self.table.horizontalHeader().setSortIndicatorShown(True)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+
+        top = QHBoxLayout()
+        top.addWidget(self.filter_edit)
+        top.addWidget(self.info_label)
+        layout = QVBoxLayout()
+        layout.addLayout(top)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+    def show_frame(self, frame: pd.DataFrame, title: str):
+        self.setTitle(f"Vista previa: {title}")
+        self.filter_edit.blockSignals(True)
+        self.filter_edit.clear()
+        self.filter_edit.blockSignals(False)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.model.set_frame(frame)
+        self._update_info()
+        self.show()
+
+    def apply_filter(self):
+        self.model.set_filter(self.filter_edit.text())
+        self._update_info()
+
+    def _update_info(self):
+        visibles, total = self.model.rowCount(), self.model.total_rows()
+        columnas = self.model.columnCount()
+        if visibles == total:
+            self.info_label.setText(f"{total} filas x {columnas} columnas")
+        else:
+            self.info_label.setText(f"{visibles} de {total} filas x {columnas} columnas")
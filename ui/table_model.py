@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+# Columnas por las que filtra la vista previa (las que existan en la tabla)
+FILTER_COLUMNS = ('Rut', 'Nombre', 'DUPLICADOS')
+
+
+class DataFrameTableModel(QAbstractTableModel):
+    """
+    Modelo de solo lectura sobre un DataFrame. La vista solo pide las celdas
+    visibles y cada una se formatea al dibujarse; ordenar y filtrar reordenan un
+    arreglo de posiciones sin copiar el DataFrame.
+    """
+
+    def __init__(self, frame: pd.DataFrame = None, parent=None):
+        super().__init__(parent)
+        self._frame = pd.DataFrame()
+        self._columns = []
+        self._order = np.arange(0)
+        self._view = self._order
+        self._filter_text = ''
+        self._search_cache = {}
+        if frame is not None:
+            self.set_frame(frame)
+
+    def set_frame(self, frame: pd.DataFrame):
+        self.beginResetModel()
+        self._frame = frame
+        # Arreglos por columna, obtenidos recién cuando la columna se dibuja
+        self._columns = [None] * frame.shape[1]
+        self._order = np.arange(len(frame))
+        self._view = self._order
+        self._filter_text = ''
+        self._search_cache = {}
+        self.endResetModel()
+
+    def frame(self) -> pd.DataFrame:
+        return self._frame
+
+    def total_rows(self) -> int:
+        return len(self._frame)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._view)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._frame.shape[1]
+
+    def _column(self, col: int) -> np.ndarray:
+        valores = self._columns[col]
+        if valores is None:
+            valores = self._columns[col] = self._frame.iloc[:, col].to_numpy()
+        return valores
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            valor = self._column(index.column())[self._view[index.row()]]
+            if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+                return ''
+            if isinstance(valor, (float, np.floating)) and float(valor).is_integer():
+                return str(int(valor))
+            return str(valor)
+        if role == Qt.TextAlignmentRole:
+            if self._column(index.column()).dtype.kind in 'iufb':
+                return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return str(self._frame.columns[section])
+        # Número de fila en el DataFrame original (1 = primera fila de datos)
+        return str(self._view[section] + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        if column < 0 or column >= self._frame.shape[1]:
+            # Sin columna de orden: se vuelve al orden original
+            self._order = np.arange(len(self._frame))
+            self._apply_filter()
+            self.layoutChanged.emit()
+            return
+        valores = pd.Series(self._column(column))
+        ascendente = order == Qt.AscendingOrder
+        try:
+            orden = valores.sort_values(ascending=ascendente, kind='stable').index.to_numpy()
+        except TypeError:
+            # Columnas con tipos mezclados: se ordenan como texto
+            orden = valores.astype(str).sort_values(ascending=ascendente, kind='stable').index.to_numpy()
+        self._order = orden
+        self._apply_filter()
+        self.layoutChanged.emit()
+
+    def set_filter(self, text: str):
+        """Deja visibles las filas cuyo Rut o Nombre contiene el texto (sin distinguir mayúsculas)."""
+        self.beginResetModel()
+        self._filter_text = text.strip().lower()
+        self._apply_filter()
+        self.endResetModel()
+
+    def _apply_filter(self):
+        if not self._filter_text:
+            self._view = self._order
+            return
+        coincide = np.zeros(len(self._frame), dtype=bool)
+        for nombre in FILTER_COLUMNS:
+            if nombre in self._frame.columns:
+                coincide |= self._search_column(nombre).str.contains(self._filter_text, regex=False).to_numpy()
+        self._view = self._order[coincide[self._order]]
+
+    def _search_column(self, nombre: str) -> pd.Series:
+        texto = self._search_cache.get(nombre)
+        if texto is None:
+            columna = self._frame[nombre]
+            if isinstance(columna, pd.DataFrame):
+                columna = columna.iloc[:, 0]
+            texto = self._search_cache[nombre] = columna.astype(str).str.lower()
+        return texto